@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Check-in memory: a list of dicts (what json.loads gives) vs CheckinLog,
+plus the cost of building it and of a full pass over mood.
+    python benchmarks/bench_checkins.py [n_checkins]
+"""
+
+import datetime as dt, gc, io, random, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from psychbot.checkins import CheckinLog  # noqa: E402
+from psychbot.columnar import write_columnar  # noqa: E402
+
+NOTES = ["", "gym", "slept badly", "good day", "deadline"]
+
+
+def make_rows(n, seed=7):
+    rnd = random.Random(seed)
+    t = dt.datetime(2020, 1, 1, 8, 0)
+    rows = []
+    for i in range(n):
+        c = {"ts": (t + dt.timedelta(minutes=47 * i)).isoformat(timespec="minutes"),
+             "mood": rnd.randint(1, 5), "stress": rnd.randint(1, 5),
+             "sleep": rnd.choice((5.5, 6.0, 6.5, 7.0, 7.5, 8.0))}
+        note = rnd.choice(NOTES)
+        if note:
+            c["note"] = note
+        rows.append(c)
+    return rows
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = build()
+    dt_ = time.perf_counter() - t0
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size, dt_
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    # build the dicts under tracemalloc too, with fresh strings per row like json.loads
+    rows, dict_bytes, _ = measure(lambda: make_rows(n))
+    log, log_bytes, build = measure(lambda: CheckinLog(rows))
+    print(f"{n:,} check-ins")
+    print(f"  list of dicts  {dict_bytes / 2**20:>8.1f} MiB  ({dict_bytes / n:.0f} B/row)")
+    print(f"  CheckinLog     {log_bytes / 2**20:>8.1f} MiB  ({log_bytes / n:.0f} B/row), "
+          f"built in {build:.2f}s")
+
+    mood = log.columns()["mood"]
+    print(f"  mean mood: dicts {timed(lambda: sum(c['mood'] for c in rows) / n) * 1e3:.0f}ms, "
+          f"views {timed(lambda: sum(c['mood'] for c in log) / n) * 1e3:.0f}ms, "
+          f"columns {timed(lambda: sum(mood) / n) * 1e3:.0f}ms")
+    print(f"  columnar export: dicts {timed(lambda: write_columnar(io.BytesIO(), {'check_ins': rows})):.2f}s, "
+          f"CheckinLog {timed(lambda: write_columnar(io.BytesIO(), {'check_ins': log})):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Crisis screen micro-benchmark: per-pattern re.search loop vs the shared matcher.
+    python benchmarks/bench_crisis.py
+"""
+
+import random, re, sys, timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from psychbot.guard import CRISIS_PATTERNS, MATCHER  # noqa: E402
+
+WORDS = ("today i went to work and felt tired but the meeting was fine later "
+         "we walked home cooked dinner and talked about the weekend plans").split()
+LOOP_TERMS = [rf"\b{f}\b" for frags in CRISIS_PATTERNS.values() for f in frags]
+
+
+def per_pattern(text):
+    low = text.lower()
+    return [p for p in LOOP_TERMS if re.search(p, low)]
+
+
+def main():
+    rnd = random.Random(42)
+    for n_words in (50, 2_000, 50_000):
+        text = " ".join(rnd.choice(WORDS) for _ in range(n_words))
+        reps = max(3, 200_000 // n_words)
+        old = timeit.timeit(lambda: per_pattern(text), number=reps) / reps
+        new = timeit.timeit(lambda: MATCHER.categories(text), number=reps) / reps
+        print(f"{n_words:>7} words  loop {old*1e6:>10.1f} µs  matcher {new*1e6:>10.1f} µs  ×{old/new:.1f}")
+    batch = [" ".join(rnd.choice(WORDS) for _ in range(40)) for _ in range(5_000)]
+    old = timeit.timeit(lambda: [per_pattern(t) for t in batch], number=3) / 3
+    new = timeit.timeit(lambda: MATCHER.screen_many(batch), number=3) / 3
+    print(f"batch of {len(batch)}  loop {old*1e3:>8.1f} ms  screen_many {new*1e3:>8.1f} ms  ×{old/new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Distortion classifier micro-benchmark.
+Compares the old nested label/cue loop, a pure-Python Aho–Corasick automaton,
+and the prebuilt DistortionClassifier (which also returns spans).
+    python benchmarks/bench_distortion.py
+"""
+
+import random, sys, timeit
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from psychbot.distort import DistortionClassifier  # noqa: E402
+
+DISTORTIONS = {
+    "all-or-nothing": ["always", "never", "perfect", "ruined", "completely", "totally"],
+    "overgeneralization": ["everyone", "no one", "nobody", "every time", "nothing works"],
+    "mind reading": ["they think", "people think", "must think", "they probably"],
+    "catastrophizing": ["disaster", "ruined", "worst", "collapse", "impossible", "hopeless"],
+    "labeling": ["i am a failure", "i'm stupid", "i'm weak"],
+    "should statements": ["should", "must", "have to"],
+}
+WORDS = ("today i went to work and felt tired but the meeting was fine later we "
+         "walked home they think it was ok and i have to finish it").split()
+
+
+def nested(text):
+    low = text.lower()
+    return [name for name, cues in DISTORTIONS.items() if any(c in low for c in cues)]
+
+
+def build_ac(cues):
+    goto, out, fail = [{}], [[]], [0]
+    for cue in cues:
+        s = 0
+        for ch in cue:
+            if ch not in goto[s]:
+                goto.append({}); out.append([]); fail.append(0)
+                goto[s][ch] = len(goto) - 1
+            s = goto[s][ch]
+        out[s].append(cue)
+    q = deque(goto[0].values())
+    while q:
+        r = q.popleft()
+        for ch, s in goto[r].items():
+            q.append(s)
+            f = fail[r]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[s] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != s else 0
+            out[s] = out[s] + out[fail[s]]
+    def run(text):
+        s, hits = 0, []
+        for i, ch in enumerate(text.lower()):
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            for cue in out[s]:
+                hits.append((i - len(cue) + 1, cue))
+        return hits
+    return run
+
+
+def main():
+    clf = DistortionClassifier(DISTORTIONS)
+    ac = build_ac(clf.cue_labels)
+    rnd = random.Random(7)
+    for n_words in (20, 1_000, 50_000):
+        text = " ".join(rnd.choice(WORDS) for _ in range(n_words))
+        reps = max(3, 100_000 // n_words)
+        t = {name: timeit.timeit(lambda f=f: f(text), number=reps) / reps * 1e6
+             for name, f in (("nested", nested), ("aho-corasick", ac), ("classifier.scan", clf.scan),
+                             ("classifier.labels", clf.labels))}
+        print(f"{n_words:>6} words  " + "  ".join(f"{k} {v:>9.1f} µs" for k, v in t.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Router throughput: the old if/elif + replace/split chain vs the trie router,
+then end-to-end batch mode (parse + handler + WAL) on a scratch data file.
+    python benchmarks/bench_router.py [n_lines]
+"""
+
+import os, random, sys, tempfile, time, timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from psychbot.core import ROUTER  # noqa: E402
+
+LINES = [
+    "/checkin mood=3 stress=2 sleep=7",
+    "/journal add walked to the park and felt lighter",
+    "/reframe they think I never finish anything",
+    "/journal list",
+    "/review",
+    "/breathe",
+    "/export csv --since 2024-01-01",
+    "/nope",
+]
+
+
+def if_chain(line):
+    """Shape of the pre-router loops: compare, then re-split/replace per branch."""
+    if line == "/help": return "help", ""
+    elif line.startswith("/checkin"): return "checkin", line.split()[1:]
+    elif line.startswith("/reframe"): return "reframe", line.replace("/reframe", "", 1).strip()
+    elif line == "/breathe": return "breathe", ""
+    elif line.startswith("/journal"): return "journal", line.replace("/journal", "", 1).strip() or "list"
+    elif line == "/review": return "review", ""
+    elif line.startswith("/export"): return "export", line.split(maxsplit=1)[1] if len(line.split()) > 1 else ""
+    elif line.startswith("/import"): return "import", line.split()[1:]
+    elif line in ("/quit", "/exit"): return "quit", ""
+    return None, ""
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rnd = random.Random(7)
+    lines = [rnd.choice(LINES) for _ in range(n)]
+    old = timeit.timeit(lambda: [if_chain(l) for l in lines], number=3) / 3
+    new = timeit.timeit(lambda: [ROUTER.parse(l) for l in lines], number=3) / 3
+    print(f"route {n} lines   if/elif {n/old:>12,.0f} lines/s   trie {n/new:>12,.0f} lines/s")
+
+    work = [l for l in lines if not l.startswith("/export")][: min(n, 20_000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        import psych_bot
+        from psychbot.batch import run_batch
+        t = time.perf_counter()
+        ok, failed = run_batch(work, lambda l: psych_bot.dispatch(l, interactive=False),
+                               psych_bot.STORE, out=lambda s: None)
+        dt = time.perf_counter() - t
+        psych_bot.COMMITS.close()  # commit now and drop its atexit hook: the tempdir is about to go
+        psych_bot.STORE.close()
+        os.chdir(ROOT)
+    print(f"batch {ok + failed} lines  {(ok + failed)/dt:>12,.0f} lines/s  ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
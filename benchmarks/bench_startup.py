@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: cold `import psych_bot` + /help vs + /review, as the data
+file grows. /help should stay flat; /review pays for the load.
+    python benchmarks/bench_startup.py
+"""
+
+import json, os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SNIPPETS = {
+    "/help": "import psych_bot; psych_bot.cmd_help()",
+    "/breathe": "import psych_bot; psych_bot.cmd_breathe()",
+    "/review": "import psych_bot; psych_bot.cmd_review()",
+}
+
+
+def make_db(path, n):
+    entries = [{"id": i + 1, "ts": f"2024-01-{i % 28 + 1:02d}T09:00", "text": f"note {i} " * 8}
+               for i in range(n)]
+    check_ins = [{"ts": f"2024-01-{i % 28 + 1:02d}T08:00", "mood": 3, "stress": 2, "sleep": 7.0}
+                 for i in range(n)]
+    path.write_text(json.dumps({"user_profile": {}, "check_ins": check_ins, "entries": entries,
+                                "system_score": {"weekly": 0, "streak_days": 0}}))
+
+
+def run(cwd, code, reps=5):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                       stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    print(f"{'records':>9}  " + "  ".join(f"{k:>10}" for k in SNIPPETS))
+    for n in (0, 10_000, 100_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            if n:
+                make_db(Path(tmp) / "psych_data.json", n)
+            row = [run(tmp, code) * 1e3 for code in SNIPPETS.values()]
+        print(f"{n:>9}  " + "  ".join(f"{ms:>8.1f}ms" for ms in row))
+
+
+if __name__ == "__main__":
+    main()
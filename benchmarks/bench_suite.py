@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+How load/save, review, export, the crisis screen and the distortion
+classifier scale with history size, in each edition.
+
+    python benchmarks/bench_suite.py [--sizes 1k,100k,1m] [--editions classic,casual,command]
+                                     [--save base.json] [--compare base.json] [--threshold 1.25]
+
+Every (edition, size) runs in its own process on a history from
+benchmarks/synth.py (same seed → same data), so peak memory isn't skewed by
+an earlier run. Each edition is exec'd from its own section of psych_bot.py
+and timed through its own functions:
+
+    op          classic            casual            command
+    load        load()             load_db()         _load()
+    save        save(db)           save_db(db)       _save(STATE)
+    review      cmd_review(db)     review(db)        cmd_review()
+    export      cmd_export csv     export_data csv   cmd_export csv
+    crisis      risk_check         crisis_scan       risk_screen        (every entry's text)
+    distortion  guess_distortion   —                 guess_distortion   (every entry's text)
+
+An op repeats until it has used ``--budget`` seconds (at least once, at most
+25 times); latency is the median, throughput is records (or texts) per
+second at that median, and peak is the most memory allocated during one
+extra, traced call (``--no-memory`` skips it). ``--save`` writes the numbers
+as JSON; ``--compare`` sets each op's best time against a saved run (the
+least noisy of the two) and exits 1 if any got slower by more than
+``--threshold``.
+"""
+
+import argparse, contextlib, gc, io, json, os, platform, statistics, subprocess, sys
+import tempfile, time, tracemalloc, types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import synth  # noqa: E402
+from psychbot.importer import entry_text  # noqa: E402
+
+SOURCE = ROOT / "psych_bot.py"
+MAIN_GUARD = 'if __name__ == "__main__":\n    main()\n'
+OPS = ("load", "save", "review", "export", "crisis", "distortion")
+MAX_REPS = 25
+
+
+def load_edition(name):
+    """Run one edition's section of psych_bot.py as its own module (cwd = data dir)."""
+    src = SOURCE.read_text(encoding="utf-8")
+    parts = src.split(MAIN_GUARD)
+    i = synth.EDITIONS.index(name)
+    offset = sum(p.count("\n") + MAIN_GUARD.count("\n") for p in parts[:i])
+    mod = types.ModuleType(f"psych_bot_{name}")
+    mod.__file__ = str(SOURCE)
+    exec(compile("\n" * offset + parts[i], str(SOURCE), "exec"), mod.__dict__)
+    return mod
+
+
+def edition_ops(name, mod):
+    """``{op: (fn, records it touches)}`` for a loaded edition."""
+    if name == "classic":
+        db = mod.load()
+        mod.save(db)  # fold the one-time upgrades into the snapshot
+        ops = {"load": mod.load, "save": lambda: mod.save(db), "review": lambda: mod.cmd_review(db),
+               "export": lambda: mod.cmd_export(db, "csv"), "crisis": mod.risk_check,
+               "distortion": mod.guess_distortion}
+    elif name == "casual":
+        db = mod.load_db()
+        mod.save_db(db)
+        ops = {"load": mod.load_db, "save": lambda: mod.save_db(db), "review": lambda: mod.review(db),
+               "export": lambda: mod.export_data(db, "csv"), "crisis": mod.crisis_scan}
+    else:
+        db = mod.STATE
+        db.get("entries")  # first touch loads it
+        mod._save(db)
+        ops = {"load": mod._load, "save": lambda: mod._save(db), "review": mod.cmd_review,
+               "export": lambda: mod.cmd_export(["csv"]), "crisis": mod.risk_screen,
+               "distortion": mod.guess_distortion}
+    n = len(db["check_ins"]) + len(db["entries"])
+    texts = [entry_text(e) for e in db["entries"]]
+    out = {}
+    for op, fn in ops.items():
+        if op in ("crisis", "distortion"):
+            out[op] = ((lambda f: lambda: [f(t) for t in texts])(fn), len(texts))
+        else:
+            out[op] = (fn, None if op == "review" else n)  # review reads the rollups
+    return out
+
+
+def measure(fn, budget, memory):
+    times = []
+    while len(times) < MAX_REPS and (not times or sum(times) < budget):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"median": statistics.median(times), "min": min(times), "reps": len(times), "peak": peak}
+
+
+def run_one(edition, n, seed, ops, budget, memory):
+    """Benchmark one (edition, size) in this process; returns ``{op: stats}``."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        synth.write(edition, n, tmp, seed)
+        os.chdir(tmp)
+        mod = load_edition(edition)
+        for op, (fn, count) in edition_ops(edition, mod).items():
+            if op in ops:
+                stats = measure(fn, budget, memory)
+                stats["throughput"] = count / stats["median"] if count and stats["median"] else None
+                results[op] = stats
+        if hasattr(mod, "COMMITS"):
+            mod.COMMITS.commit()
+        os.chdir(ROOT)
+        for name in ("STORE", "DB_LOG"):
+            store = getattr(mod, name, None)
+            if store is not None and hasattr(store, "close"):
+                store.close()
+    return results
+
+
+def spawn(edition, n, args):
+    cmd = [sys.executable, __file__, "--one", edition, str(n), "--seed", str(args.seed),
+           "--ops", ",".join(args.ops), "--budget", str(args.budget)]
+    if not args.memory:
+        cmd.append("--no-memory")
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"{edition} @ {n:,} failed")
+    return json.loads(proc.stdout)
+
+
+# --- Report -----------------------------------------------------------------------
+def fmt_rate(r):
+    if r is None:
+        return "—"
+    return f"{r / 1e6:.1f}M/s" if r >= 1e6 else f"{r / 1e3:.1f}k/s" if r >= 1e3 else f"{r:.0f}/s"
+
+
+def report(results, base=None, threshold=1.25):
+    """Print the table; returns the keys that regressed against ``base``."""
+    slower = []
+    print(f"{'edition':<8} {'records':>9}  {'op':<10} {'median':>10} {'min':>10} {'throughput':>11} "
+          f"{'peak':>9}" + ("   vs base" if base else ""))
+    for key, s in results.items():
+        edition, n, op = key.split("/")
+        peak = f"{s['peak'] / 2**20:.1f}MiB" if s["peak"] is not None else "—"
+        line = (f"{edition:<8} {int(n):>9,}  {op:<10} {s['median'] * 1e3:>8.2f}ms {s['min'] * 1e3:>8.2f}ms "
+                f"{fmt_rate(s['throughput']):>11} {peak:>9}")
+        old = (base or {}).get(key)
+        if old:
+            ratio = s["min"] / old["min"] if old["min"] else 1.0
+            line += f"   ×{ratio:.2f}"
+            if ratio > threshold:
+                line += "  ⚠ slower"
+                slower.append(key)
+        print(line)
+    return slower
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="1k,100k")
+    ap.add_argument("--editions", default=",".join(synth.EDITIONS))
+    ap.add_argument("--ops", default=",".join(OPS))
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--budget", type=float, default=1.0, help="seconds of repeats per op")
+    ap.add_argument("--no-memory", dest="memory", action="store_false")
+    ap.add_argument("--save", help="write results as a JSON baseline")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25)
+    ap.add_argument("--one", nargs=2, metavar=("EDITION", "N"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    args.ops = [o for o in args.ops.split(",") if o]
+
+    if args.one:
+        edition, n = args.one
+        print(json.dumps(run_one(edition, int(n), args.seed, args.ops, args.budget, args.memory)))
+        return
+
+    base = None
+    if args.compare:
+        base = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+    results = {}
+    for n in map(synth.parse_size, args.sizes.split(",")):
+        for edition in args.editions.split(","):
+            for op, stats in spawn(edition, n, args).items():
+                results[f"{edition}/{n}/{op}"] = stats
+    slower = report(results, base, args.threshold)
+    if args.save:
+        meta = {"python": platform.python_version(), "platform": platform.platform(),
+                "backend": os.environ.get("PSYCHBOT_BACKEND", "json"), "seed": args.seed,
+                "when": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        Path(args.save).write_text(json.dumps({"meta": meta, "results": results}, indent=1) + "\n",
+                                   encoding="utf-8")
+    if slower:
+        raise SystemExit(f"{len(slower)} op(s) slower than ×{args.threshold} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic histories in each edition's on-disk schema.
+
+    python benchmarks/synth.py --edition classic --records 100000 --out DIR [--seed 7]
+
+One event stream per (seed, size): ~60% check-ins, the rest entries
+(journal notes and reframes; reframes only for casual), timestamps 1–16h apart and always increasing. Sleep, stress
+and mood are correlated (mood tracks sleep and the inverse of stress, plus
+a weekday effect), entry text is drawn from everyday words with thinking-
+trap cues and #tags mixed in, and each edition gets its own field names,
+timestamp format and entry shapes:
+
+    classic  psych_data.json     ts to the second; reframes keep a label list
+    casual   data/psych_log.json UTC ts with Z; reframes carry evidence/result
+    command  psych_data.json     ts to the minute; note only when given
+
+Derived keys (rollups, id meta) are left out, exactly as an older file
+would have them; the editions add them on first load.
+"""
+
+import argparse, datetime as dt, json, random
+from pathlib import Path
+
+EDITIONS = ("classic", "casual", "command")
+PATHS = {"classic": "psych_data.json", "casual": "data/psych_log.json", "command": "psych_data.json"}
+START = dt.datetime(2018, 1, 1, 7, 30)
+CHECKIN_SHARE = 0.6
+REFRAME_SHARE = 0.4  # of entries
+
+WORDS = ("today work meeting walk dinner call friend family tired coffee gym run slept "
+         "late early project deadline email boss team lunch park rain sun music read "
+         "book cooked cleaned talked laughed quiet busy calm anxious proud stuck moved "
+         "finished started again better worse little enough time week plan small step "
+         "felt noticed wanted tried helped asked waited went came home office train").split()
+CUES = ("always", "never", "everyone", "no one", "they think", "disaster", "ruined",
+        "should", "must", "completely", "every time", "i'm stupid", "worst")
+TAGS = ("work", "family", "health", "sleep", "gym", "friends", "money", "study")
+NOTES = ("gym", "slept badly", "good day", "deadline", "headache", "long walk")
+ACTIONS = ("Send one application", "Walk 10 minutes", "Text a friend", "Draft the intro",
+           "Tidy the desk", "Ask for feedback")
+CLASSIC_LABELS = ("all-or-nothing", "overgeneralization", "mind reading", "catastrophizing", "labeling")
+CASUAL_LABELS = ("all-or-nothing", "overgeneralization", "mind-reading", "catastrophizing",
+                 "labeling", "should-statements")
+COMMAND_LABELS = ("all-or-nothing", "overgeneralization", "mind reading", "catastrophizing",
+                  "should statements", "unknown")
+
+
+def _sentence(rnd, lo, hi):
+    words = [rnd.choice(WORDS) for _ in range(rnd.randint(lo, hi))]
+    if rnd.random() < 0.3:
+        words.insert(rnd.randrange(len(words) + 1), rnd.choice(CUES))
+    return " ".join(words)
+
+
+def _checkin(rnd, t, edition):
+    sleep = min(10.0, max(3.0, round(rnd.gauss(7.0, 1.1) * 2) / 2))
+    stress = min(5, max(1, round(rnd.gauss(3.0, 1.0))))
+    weekday = (0.3, 0.1, 0.0, 0.0, 0.2, 0.5, 0.4)[t.weekday()]
+    mood = min(5, max(1, round(3 + 0.45 * (sleep - 7) - 0.4 * (stress - 3) + weekday
+                               + rnd.gauss(0, 0.7))))
+    note = rnd.choice(NOTES) if rnd.random() < 0.25 else ""
+    c = {"ts": _ts(t, edition), "mood": mood, "stress": stress, "sleep": sleep}
+    if edition != "command" or note:
+        c["note"] = note
+    return c
+
+
+def _entry(rnd, t, edition, eid):
+    ts = _ts(t, edition)
+    thought = _sentence(rnd, 5, 18)
+    if edition == "casual" or rnd.random() < REFRAME_SHARE:  # casual only logs reframes
+        if edition == "classic":
+            return {"id": eid, "ts": ts, "trigger": thought,
+                    "distortion": rnd.sample(CLASSIC_LABELS, rnd.randint(1, 2)),
+                    "reframe": _sentence(rnd, 6, 14), "action": rnd.choice(ACTIONS),
+                    "fallback": rnd.choice(ACTIONS), "done": rnd.random() < 0.5}
+        if edition == "casual":
+            return {"id": eid, "ts": ts, "trigger": thought, "distortion": rnd.choice(CASUAL_LABELS),
+                    "evidence": _sentence(rnd, 4, 12), "reframe": _sentence(rnd, 6, 14),
+                    "action": rnd.choice(ACTIONS),
+                    "result": rnd.choice(("", "done", "done, felt better", "blocked"))}
+        return {"id": eid, "ts": ts, "trigger": "thought_reframe",
+                "distortion": rnd.choice(COMMAND_LABELS), "reframe": _sentence(rnd, 6, 14),
+                "text": thought}
+    text = ". ".join(_sentence(rnd, 4, 16) for _ in range(rnd.randint(1, 4)))
+    tags = rnd.sample(TAGS, rnd.choice((0, 0, 1, 2)))
+    if edition == "classic":
+        return {"id": eid, "ts": ts, "journal": text, "tags": tags}
+    return {"id": eid, "ts": ts, "text": text + "".join(f" #{t}" for t in tags)}
+
+
+def _ts(t, edition):
+    if edition == "classic":
+        return t.isoformat(timespec="seconds")
+    if edition == "casual":
+        return t.isoformat(timespec="seconds") + "Z"
+    return t.isoformat(timespec="minutes")
+
+
+def generate(edition, n, seed=7):
+    """A database dict for ``edition`` holding ``n`` check-ins + entries."""
+    if edition not in EDITIONS:
+        raise ValueError(f"unknown edition {edition!r} (use {', '.join(EDITIONS)})")
+    rnd = random.Random(f"{seed}:{edition}:{n}")
+    t, checks, entries = START, [], []
+    for _ in range(n):
+        t += dt.timedelta(minutes=rnd.randint(60, 960))
+        if rnd.random() < CHECKIN_SHARE:
+            checks.append(_checkin(rnd, t, edition))
+        else:
+            entries.append(_entry(rnd, t, edition, len(entries) + 1))
+    day = t.date().isoformat()
+    if edition == "classic":
+        return {"profile": {"values": ["mastery", "equity", "legacy"]}, "check_ins": checks,
+                "entries": entries, "system_score": {"weekly": 42, "streak_days": 9, "last_day": day}}
+    score = {"weekly": 42, "streak_days": 9}
+    if edition == "casual":
+        score["last_check_date"] = day
+    return {"user_profile": {"values": [], "supports": []}, "check_ins": checks,
+            "entries": entries, "system_score": score}
+
+
+def write(edition, n, out_dir, seed=7):
+    """Write the generated history where ``edition`` looks for it under ``out_dir``."""
+    path = Path(out_dir) / PATHS[edition]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(generate(edition, n, seed), ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def parse_size(s):
+    """``1k`` / ``100k`` / ``1m`` / ``2500`` -> int."""
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--edition", choices=EDITIONS, default="command")
+    ap.add_argument("--records", type=parse_size, default=1_000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", default=".")
+    args = ap.parse_args()
+    path = write(args.edition, args.records, args.out, args.seed)
+    print(f"{args.records:,} records ({args.edition}) → {path}")
+
+
+if __name__ == "__main__":
+    main()
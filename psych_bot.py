@@ -5,7 +5,7 @@ Calm wellness copilot. Not a therapist.
 - /checkin (mood/stress/sleep)
 - /reframe <thought>
 - /breathe
-- /journal add|list|delete
+- /journal add|list|search|delete
 - /review (weekly)
 - /export json|csv
 - /help
@@ -16,14 +16,23 @@ Crisis guardrails: shows resources on risk keywords.
 import json, os, re, sys, csv, datetime as dt
 from pathlib import Path
 
+from psychbot import activity, aggregates, journal as journal_ids, search as journal_search
+from psychbot.aggregates import AGG_KEY, Rollup
+from psychbot.core import Result
+from psychbot.distort import DistortionClassifier
+from psychbot.export import FORMATS as EXPORT_FORMATS, export as stream_export, parse_export_args
+from psychbot.guard import screen as crisis_screen  # shared precompiled matchers
+from psychbot.importer import entry_text
+from psychbot.lazy import LazyState
+from psychbot.metrics import METRICS
+from psychbot.router import Router
+from psychbot.store import ConflictError, entry_kind, open_store
+
 DATA_PATH = Path("psych_data.json")
-EXPORT_DIR = Path("exports")
-EXPORT_DIR.mkdir(exist_ok=True)
+EXPORT_DIR = Path("exports")  # created on first export
+STORE = open_store(DATA_PATH)  # json log or sqlite, see PSYCHBOT_BACKEND
+ROLLUP = Rollup(STORE)  # running review aggregates
 
-RISK_TERMS = [
-    r"\bsuicide\b", r"\bkill myself\b", r"\bself[- ]?harm\b",
-    r"\bhurt (myself|someone)\b", r"\bno reason to live\b"
-]
 DISTORTIONS = {
     "all-or-nothing": ["always", "never", "completely", "totally"],
     "overgeneralization": ["everyone", "no one", "nobody", "every time"],
@@ -31,29 +40,37 @@ DISTORTIONS = {
     "catastrophizing": ["disaster", "ruined", "worst", "collapse"],
     "labeling": ["i am a failure", "i'm stupid", "i'm weak"],
 }
+CLASSIFIER = DistortionClassifier(DISTORTIONS)  # cue table built once
 
 def load():
-    if DATA_PATH.exists():
-        return json.loads(DATA_PATH.read_text())
-    return {
-        "profile": {"values": ["mastery","equity","legacy"]},
-        "check_ins": [],
-        "entries": [],
-        "system_score": {"weekly": 0, "streak_days": 0, "last_day": None}
-    }
+    with METRICS.timed("load") as m:
+        db = STORE.load(default={
+            "profile": {"values": ["mastery","equity","legacy"]},
+            "check_ins": [],
+            "entries": [],
+            "system_score": {"weekly": 0, "streak_days": 0, "last_day": None}
+        })
+        ROLLUP.ensure(db)
+        activity.ensure(db, STORE)  # days with a check-in, for streaks
+        journal_ids.ensure(db, STORE)  # stable entry ids
+        journal_search.attach(db["entries"], journal_search.sidecar(DATA_PATH))
+        m["records"] = len(db["check_ins"]) + len(db["entries"])
+    return db
 
 def save(db):
-    DATA_PATH.write_text(json.dumps(db, indent=2))
+    # full rewrite; day-to-day mutations go through STORE.add/set/patch/delete
+    written = STORE.bytes_written
+    with METRICS.timed("save") as m:
+        STORE.compact(db)
+        m["bytes"] = STORE.bytes_written - written
 
 def now_iso():
     return dt.datetime.now().isoformat(timespec="seconds")
 
 def risk_check(text):
-    low = text.lower()
-    for pat in RISK_TERMS:
-        if re.search(pat, low):
-            crisis_banner()
-            return True
+    if crisis_screen(text, "classic"):
+        crisis_banner()
+        return True
     return False
 
 def crisis_banner():
@@ -64,22 +81,55 @@ def crisis_banner():
     print("• Contact a trusted person now.\n")
 
 def guess_distortion(text):
-    low = text.lower()
-    hits = []
-    for name, cues in DISTORTIONS.items():
-        if any(cue in low for cue in cues):
-            hits.append(name)
-    return hits or ["—"]
-
-def system_score_update(db, done_action=False):
-    # simple weekly score: +3 for check-in, +5 for completed action
-    today = dt.date.today().isoformat()
-    if db["system_score"]["last_day"] != today:
-        db["system_score"]["streak_days"] += 1
-        db["system_score"]["last_day"] = today
-        db["system_score"]["weekly"] += 3
+    return CLASSIFIER.labels(text) or ["—"]
+
+def score_mutations(db, day, checkin=None, done_action=False):
+    # weekly score (restarts each Monday): +3 for a day's first check-in, +5 for completed action
+    cal = activity.calendar(db)
+    score = activity.roll_week(db["system_score"], day)
+    muts = []
+    if checkin:
+        muts = activity.mark_mutations(cal, day)
+        if muts:
+            score["weekly"] += 3
+        score["last_day"] = checkin["ts"][:10]
+    score["streak_days"] = cal.current_streak(day)
     if done_action:
-        db["system_score"]["weekly"] += 5
+        score["weekly"] += 5
+    return score, muts + [{"op": "set", "key": "system_score", "value": score}]
+
+# --- Pure command bodies (see psychbot.core): the cmd_* adapters prompt, print and persist ---
+def checkin_result(db, mood, stress, sleep, note, now):
+    entry = {"ts": now.isoformat(timespec="seconds"), "mood": mood, "stress": stress, "sleep": sleep, "note": note}
+    score, muts = score_mutations(db, activity.day_number(now), checkin=entry)
+    muts = [{"op": "add", "coll": "check_ins", "item": entry}] + aggregates.checkin_mutations(entry) + muts
+    return Result(f"✓ Logged. System Score: {score['weekly']}", {"checkin": entry}, muts)
+
+def reframe_card(text):
+    hits = guess_distortion(text)
+    lines = [f"\n🧠 Detected distortion(s): {', '.join(hits)}"]
+    lines += [f"   “{phrase}” → {label}" for phrase, label in CLASSIFIER.triggers(text)]
+    lines += ["Evidence check:",
+              "• What facts support this thought?",
+              "• What facts challenge it?",
+              "• What would you tell a friend in the same situation?"]
+    return Result("\n".join(lines), {"distortion": hits})
+
+def reframe_result(db, text, alt, action, fallback, done, now):
+    eid, id_muts = journal_ids.allocate(db)
+    entry = {
+        "id": eid,
+        "ts": now.isoformat(timespec="seconds"),
+        "trigger": text,
+        "distortion": guess_distortion(text),
+        "reframe": alt or "This is one data point, not a pattern.",
+        "action": action or "Send 1 targeted application.",
+        "fallback": fallback or "Draft a 3-sentence value DM to a recruiter.",
+        "done": done
+    }
+    score, muts = score_mutations(db, activity.day_number(now), done_action=done)
+    muts = [{"op": "add", "coll": "entries", "item": entry}] + id_muts + aggregates.entry_mutations(entry) + muts
+    return Result(f"✓ Reframe logged. System Score: {score['weekly']}", {"entry": entry}, muts)
 
 def cmd_help():
     print("""
@@ -88,10 +138,12 @@ def cmd_help():
   /reframe <thought>      Spot distortion + build next action
   /breathe                90-second box breathing guide
   /journal add            Save a note (taggable)
-  /journal list           Show last 10 entries
-  /journal delete <n>     Delete by index from /journal list
+  /journal list           Show last 10 entries (--before ID --limit N --kind --tag --from/--to)
+  /journal search <terms> Find entries (tag:work from:2024-01 to:2024-03)
+  /journal delete <id>    Delete by id from /journal list
   /review                 Weekly snapshot
-  /export json|csv        Export data
+  /export json|csv|ndjson|columnar  Export data (--since/--until DATE, --gzip)
+  /stats                  Command timings since start
   /help                   Show this help
     """)
 
@@ -101,11 +153,9 @@ def cmd_checkin(db):
     stress = int(input("Stress 1–5: ") or "3")
     sleep  = float(input("Sleep hours: ") or "6")
     note   = input("Note (optional): ").strip()
-    entry = {"ts": now_iso(), "mood": mood, "stress": stress, "sleep": sleep, "note": note}
-    db["check_ins"].append(entry)
-    system_score_update(db)
-    save(db)
-    print("✓ Logged. System Score:", db["system_score"]["weekly"])
+    result = checkin_result(db, mood, stress, sleep, note, dt.datetime.now())
+    STORE.apply(db, result.mutations)
+    print(result.text)
 
 def cmd_breathe():
     print("\n🫁 Box breathing (4•4•4•4) — 6 cycles")
@@ -118,32 +168,18 @@ def cmd_reframe(db, text):
         return
     if risk_check(text):
         return
-    hits = guess_distortion(text)
-    print(f"\n🧠 Detected distortion(s): {', '.join(hits)}")
-    print("Evidence check:")
-    for q in [
-        "• What facts support this thought?",
-        "• What facts challenge it?",
-        "• What would you tell a friend in the same situation?"
-    ]:
-        print(q)
-    alt = input("\nAlternative view (one sentence): ").strip() or "This is one data point, not a pattern."
-    action = input("Next controllable action (<10 min): ").strip() or "Send 1 targeted application."
-    fallback = input("IF blocked, THEN (fallback): ").strip() or "Draft a 3-sentence value DM to a recruiter."
+    print(reframe_card(text).text)
+    alt = input("\nAlternative view (one sentence): ").strip()
+    action = input("Next controllable action (<10 min): ").strip()
+    fallback = input("IF blocked, THEN (fallback): ").strip()
     done = input("Start now? (y/N): ").strip().lower() == "y"
+    result = reframe_result(db, text, alt, action, fallback, done, dt.datetime.now())
+    with journal_search.tracking(db, result.mutations):
+        STORE.apply(db, result.mutations)
+    print(result.text)
 
-    db["entries"].append({
-        "ts": now_iso(),
-        "trigger": text,
-        "distortion": hits,
-        "reframe": alt,
-        "action": action,
-        "fallback": fallback,
-        "done": done
-    })
-    system_score_update(db, done_action=done)
-    save(db)
-    print("✓ Reframe logged. System Score:", db["system_score"]["weekly"])
+def entry_line(e):
+    return f"[{e.get('id')}] ({entry_kind(e)}) {e.get('ts')} :: {entry_text(e)}"
 
 def cmd_journal(db, subcmd):
     if subcmd == "add":
@@ -151,31 +187,56 @@ def cmd_journal(db, subcmd):
         tags = [t.strip() for t in input("Tags (space or comma): ").replace(",", " ").split() if t.strip()]
         if risk_check(text):  # still log, but show resources
             pass
-        db["entries"].append({"ts": now_iso(), "journal": text, "tags": tags})
-        save(db)
-        print("✓ Saved.")
-    elif subcmd == "list":
-        last = db["entries"][-10:]
+        eid, id_muts = journal_ids.allocate(db)
+        muts = [{"op": "add", "coll": "entries", "item": {"id": eid, "ts": now_iso(), "journal": text, "tags": tags}}]
+        with journal_search.tracking(db, muts + id_muts):
+            STORE.apply(db, muts + id_muts)
+        print(f"✓ Saved as #{eid}.")
+    elif subcmd.split()[0] == "list":
+        try:
+            opts = journal_ids.parse_list_args(subcmd.split()[1:], limit=10)
+            last, older = journal_ids.page(db["entries"], **opts)
+        except ValueError as exc:
+            print(f"{exc}. Usage: {journal_ids.LIST_USAGE}")
+            return
         if not last:
             print("No entries yet.")
             return
-        for i, e in enumerate(last, start=max(0, len(db["entries"]) - len(last))):
-            kind = "journal" if "journal" in e else "reframe"
-            print(f"[{i}] ({kind}) {e.get('ts')} :: {e.get('journal', e.get('trigger',''))}")
+        for e in last:
+            print(entry_line(e))
+        if older:
+            print(f"Older: {journal_ids.list_command({**opts, 'before': older})}")
+    elif subcmd.startswith("search"):
+        args = subcmd.split()[1:]
+        if not args:
+            print("Usage: /journal search <terms> [tag:X] [from:DATE] [to:DATE]")
+            return
+        hits = journal_search.search(db["entries"], args, limit=10)
+        if not hits:
+            print("No matching entries.")
+        for _, e in hits:
+            print(entry_line(e))
     elif subcmd.startswith("delete"):
         try:
-            idx = int(subcmd.split()[-1])
-            _ = db["entries"].pop(idx)
-            save(db)
-            print("✓ Deleted.")
-        except Exception:
-            print("Usage: /journal delete <index>  (use /journal list first)")
+            eid = int(subcmd.split()[-1])
+        except ValueError:
+            print("Usage: /journal delete <id>  (use /journal list first)")
+            return
+        at = journal_ids.find(db["entries"], eid)
+        if at is None:
+            print(f"No entry #{eid}.")
+            return
+        muts = journal_ids.delete_mutations(db, at, now_iso())
+        with journal_search.tracking(db, muts):
+            STORE.apply(db, muts)
+        print("✓ Deleted.")
     else:
-        print("Usage: /journal add | list | delete <index>")
+        print("Usage: /journal add | list | search <terms> | delete <id>")
 
 def cmd_review(db):
-    week = db["system_score"]["weekly"]
-    streak = db["system_score"]["streak_days"]
+    cal, today = activity.calendar(db), activity.day_number(dt.date.today())
+    week = activity.roll_week(db["system_score"], today)["weekly"]
+    streak = cal.current_streak(today)
     checks = db["check_ins"][-7:]
     if checks:
         avg_mood = sum(c["mood"] for c in checks)/len(checks)
@@ -183,48 +244,48 @@ def cmd_review(db):
     else:
         avg_mood = avg_stress = 0
     print("\n📊 Weekly Review")
-    print(f"System Score: {week} | Streak days: {streak}")
+    print(f"System Score: {week} | Streak days: {streak} (best {cal.longest_streak()})")
     print(f"Avg mood: {avg_mood:.1f} | Avg stress: {avg_stress:.1f}")
     # top triggers
-    trig = {}
-    for e in db["entries"]:
-        t = e.get("trigger")
-        if t:
-            key = t.lower()[:40]
-            trig[key] = trig.get(key, 0) + 1
-    top = sorted(trig.items(), key=lambda x: x[1], reverse=True)[:3]
+    top = ROLLUP.top_triggers(db, 3)
+    METRICS.observe("/review", "scanned", len(checks) + len(db[AGG_KEY]["triggers"]))
     if top:
         print("Top triggers:")
         for k,v in top:
             print(f" • {k} ×{v}")
     print("Next week focus: 1) Sleep 2) Movement 3) One proof-of-work per day")
 
-def cmd_export(db, kind):
+def cmd_export(db, argline):
+    kind, since, until, gz = parse_export_args(argline.split())
     ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-    if kind == "json":
-        out = EXPORT_DIR / f"psych_export_{ts}.json"
-        out.write_text(json.dumps(db, indent=2))
-        print("✓ Exported:", out)
-    elif kind == "csv":
+    if kind == "csv":
         out = EXPORT_DIR / f"psych_entries_{ts}.csv"
-        with out.open("w", newline="") as f:
-            w = csv.writer(f)
-            w.writerow(["ts","type","text","distortion","action","done","tags"])
-            for e in db["entries"]:
-                if "journal" in e:
-                    w.writerow([e["ts"], "journal", e["journal"], "", "", "", " ".join(e.get("tags",[]))])
-                else:
-                    w.writerow([e["ts"], "reframe", e["trigger"], ",".join(e.get("distortion",[])), e.get("action",""), e.get("done",""), ""])
-        print("✓ Exported:", out)
+    elif kind in EXPORT_FORMATS:
+        out = EXPORT_DIR / f"psych_export_{ts}.{EXPORT_FORMATS[kind]}"
     else:
-        print("Usage: /export json|csv")
+        print("Usage: /export json|csv|ndjson|columnar [--since DATE] [--until DATE] [--gzip]")
+        return
+    EXPORT_DIR.mkdir(exist_ok=True)
+    out, n = stream_export(db, kind, out, since, until, gz)
+    print(f"✓ Exported {n} records:", out)
+
+ROUTES = Router()  # handlers take (db, text after the command word)
+ROUTES.add("/help", lambda db, rest: cmd_help())
+ROUTES.add("/checkin", lambda db, rest: cmd_checkin(db))
+ROUTES.add("/reframe", lambda db, rest: cmd_reframe(db, rest))
+ROUTES.add("/breathe", lambda db, rest: cmd_breathe())
+ROUTES.add("/journal", lambda db, rest: cmd_journal(db, rest or "list"))
+ROUTES.add("/review", lambda db, rest: cmd_review(db))
+ROUTES.add("/export", lambda db, rest: cmd_export(db, rest))
+ROUTES.add("/stats", lambda db, rest: print(METRICS.render()))
+ROUTES.add("/quit", None, aliases=("/exit",))
 
 def banner():
     print("Psych Bot — Command Edition  |  Calm • Ethical • Effective")
     print("Type /help to see commands. Ctrl+C to exit.\n")
 
 def main():
-    db = load()
+    db = LazyState(load)  # parsed on first command that needs data
     banner()
     if len(sys.argv) > 1 and sys.argv[1].startswith("/"):
         # allow quick one-shot CLI
@@ -238,21 +299,29 @@ def main():
             if not line:
                 line = ""
                 continue
-            if line == "/help": cmd_help()
-            elif line == "/checkin": cmd_checkin(db)
-            elif line.startswith("/reframe"):
-                cmd_reframe(db, line.replace("/reframe","",1).strip())
-            elif line == "/breathe": cmd_breathe()
-            elif line.startswith("/journal"):
-                cmd_journal(db, line.replace("/journal","",1).strip() or "list")
-            elif line == "/review": cmd_review(db)
-            elif line.startswith("/export"):
-                cmd_export(db, line.split(maxsplit=1)[1] if len(line.split())>1 else "")
-            elif line in ("/quit","/exit"): break
-            else: print("Unknown. Try /help")
+            if db.loaded and STORE.stale() and not STORE.refresh(db):
+                db.reload()  # another process wrote the file
+            call = ROUTES.parse(line)
+            if call.command is None: print("Unknown. Try /help")
+            elif call.command.handler is None: break  # /quit
+            else:
+                try:
+                    with METRICS.command(call.command.name) as m:
+                        written = STORE.bytes_written
+                        # one all-or-nothing write per command; no lock held while it prompts
+                        with STORE.batch(lock=False):
+                            call.command.handler(db, call.rest)
+                        if STORE.bytes_written > written:  # WAL appends (and any compaction)
+                            m["bytes"] = STORE.bytes_written - written
+                except ConflictError:
+                    db.reload()
+                    print("Your data changed in another window — reloaded, please try again.")
             line = ""  # loop
     except KeyboardInterrupt:
         print("\nBye.")
+    finally:
+        if db.loaded:
+            journal_search.save(db["entries"])
 
 if __name__ == "__main__":
     main()
@@ -261,14 +330,26 @@ if __name__ == "__main__":
 # A friendly wellness copilot using CBT-style micro-tools.
 # NOT A THERAPIST. If crisis terms are detected, it will show resources.
 
-import json, csv, os, sys, time
+import json, csv, os, sys, threading, time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from textwrap import dedent
 
+from psychbot import activity, journal as journal_ids, timers
+from psychbot.core import Result
+from psychbot.export import FORMATS as EXPORT_FORMATS, export as stream_export, parse_export_args
+from psychbot.guard import screen as crisis_screen  # shared precompiled matchers
+from psychbot.lazy import LazyState
+from psychbot.metrics import METRICS
+from psychbot.router import Router
+from psychbot.store import ConflictError, open_store
+
 APP_NAME = "Psych Bot — Command Edition"
 DATA_DIR = Path("data")
 DATA_FILE = DATA_DIR / "psych_log.json"
+DB_LOG = open_store(DATA_FILE)  # json log or sqlite, see PSYCHBOT_BACKEND
+TIMER_LOCK = threading.RLock()  # held while a command runs, so timers fire between commands
+BREATH_ROUND = 14  # seconds: inhale 4 • hold 4 • exhale 6
 
 CASUAL = {
     "hello": "Yo! I’m Psych Bot — your clarity buddy. I’m not a therapist, but I can help you reset, reframe, and plan your next move. Type /help to see what I can do.",
@@ -278,11 +359,6 @@ CASUAL = {
     "tip": "Pro tip: tiny actions beat perfect plans. 10 minutes > 0 minutes.",
 }
 
-CRISIS_KEYWORDS = {
-    "self_harm": ["suicide", "kill myself", "end it", "self harm", "self-harm", "hurt myself"],
-    "harm_others": ["kill them", "hurt someone", "harm others"],
-}
-
 CRISIS_MESSAGE = dedent("""
     🚨 I’m not equipped for emergencies.
     • If you’re in immediate danger: call 911 (US) or your local emergency number.
@@ -305,71 +381,105 @@ def now():
 
 def load_db():
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if DATA_FILE.exists():
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                pass
-    return {
+    fresh = {
         "user_profile": {"values": [], "supports": []},
         "check_ins": [],
         "entries": [],
         "system_score": {"weekly": 0, "streak_days": 0, "last_check_date": None}
     }
+    with METRICS.timed("load") as m:
+        try:
+            db = DB_LOG.load(default=fresh)
+        except json.JSONDecodeError:
+            # keep the unreadable file for recovery instead of overwriting it later
+            bad = DATA_FILE.with_name(f"{DATA_FILE.name}.corrupt-{int(time.time())}")
+            DATA_FILE.replace(bad)
+            print(f"⚠️ {DATA_FILE} was unreadable; moved it to {bad} and started fresh.")
+            db = DB_LOG.load(default=fresh)
+        activity.ensure(db, DB_LOG)  # days with a check-in, for streaks
+        journal_ids.ensure(db, DB_LOG)  # stable entry ids
+        m["records"] = len(db["check_ins"]) + len(db["entries"])
+    return db
 
 def save_db(db):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=2)
+    # full rewrite; day-to-day mutations go through DB_LOG.add/set/patch
+    written = DB_LOG.bytes_written
+    with METRICS.timed("save") as m:
+        DB_LOG.compact(db)
+        m["bytes"] = DB_LOG.bytes_written - written
 
 def crisis_scan(text: str) -> bool:
-    lower = text.lower()
-    for lst in CRISIS_KEYWORDS.values():
-        if any(k in lower for k in lst):
-            print("\n" + CRISIS_MESSAGE + "\n")
-            return True
+    if crisis_screen(text, "casual"):
+        print("\n" + CRISIS_MESSAGE + "\n")
+        return True
     return False
 
+# --- Pure command bodies (see psychbot.core): the adapters prompt, print and persist ---
+def pulse_result(db, mood, stress, sleep, note, now):
+    """The check-in from the pulse answers; ``now`` is UTC, like the stored timestamps."""
+    crisis = crisis_screen(note, "casual")
+    if crisis:
+        # Still log the check-in safely without the raw note content
+        note = "[redacted - crisis terms detected]"
+    ts = now.isoformat(timespec="seconds") + "Z"
+    item = {"ts": ts, "mood": int(mood or 3), "stress": int(stress or 3), "sleep": float(sleep or 6), "note": note}
+    muts = [{"op": "add", "coll": "check_ins", "item": item}]
+
+    # Streak: consecutive days on the activity calendar (UTC days, like the timestamps)
+    day = activity.day_number(ts)
+    cal = activity.calendar(db)
+    muts += activity.mark_mutations(cal, day)
+    score = activity.roll_week(db["system_score"], day)
+    score["streak_days"] = cal.current_streak(day)
+    score["last_check_date"] = ts[:10]
+
+    # Lightweight score bump
+    score["weekly"] = min(100, score.get("weekly", 0) + 2)
+    muts.append({"op": "set", "key": "system_score", "value": score})
+    text = f"\n{CASUAL['ok']} Streak: {score['streak_days']} days • Weekly Score: {score['weekly']}/100\n"
+    if crisis:
+        text = "\n" + CRISIS_MESSAGE + "\n" + text
+    return Result(text, {"checkin": item, "crisis": bool(crisis)}, muts)
+
+def reframe_result(db, thought, kind, evidence, alt, action, now):
+    ts = now.isoformat(timespec="seconds") + "Z"
+    eid, id_muts = journal_ids.allocate(db)
+    item = {
+        "id": eid, "ts": ts, "trigger": thought[:240],
+        "distortion": kind or "overgeneralization", "evidence": evidence[:240],
+        "reframe": alt[:240], "action": action[:240], "result": ""
+    }
+    muts = [{"op": "add", "coll": "entries", "item": item}] + id_muts
+    # Score for doing the work
+    score = activity.roll_week(db["system_score"], activity.day_number(ts))
+    score["weekly"] = min(100, score.get("weekly", 0) + 3)
+    muts.append({"op": "set", "key": "system_score", "value": score})
+
+    step = action[:60] or "your next step"
+    muts += timers.schedule(db, now.replace(tzinfo=timezone.utc), [
+        (10 * 60, "action", f"⏰ 10:00 is up: {step}. How did it go? Log it with /journal.", {}),
+        (60 * 60, "nudge", f"👋 Still open: {step}. Log the result with /journal when you can.", {"entry": eid}),
+    ])
+    return Result(f"\n{CASUAL['ack']} Timer 10:00 started. Do the action — I’ll ping you here when time’s up, then log /journal result.\n",
+                  {"entry": item}, muts)
+
 def pulse_check(db):
     print("\nLet’s do a 60-sec pulse. Numbers 1–5 (low→high).")
     mood = input("Mood (1–5): ").strip()
     stress = input("Stress (1–5): ").strip()
     sleep = input("Sleep hours (approx): ").strip()
     note = input("Anything quick to note? (enter to skip): ").strip()
+    result = pulse_result(db, mood, stress, sleep, note, datetime.utcnow())
+    DB_LOG.apply(db, result.mutations)
+    print(result.text)
 
-    if crisis_scan(note):
-        # Still log the check-in safely without the raw note content
-        note = "[redacted - crisis terms detected]"
-    ts = now()
-    db["check_ins"].append({
-        "ts": ts, "mood": int(mood or 3), "stress": int(stress or 3),
-        "sleep": float(sleep or 6), "note": note
-    })
-
-    # Streak logic (simple daily check-in)
-    today = datetime.utcnow().date().isoformat()
-    last = db["system_score"].get("last_check_date")
-    if last is None:
-        db["system_score"]["streak_days"] = 1
-    else:
-        from datetime import date, timedelta
-        if (date.fromisoformat(today) - date.fromisoformat(last)) == timedelta(days=1):
-            db["system_score"]["streak_days"] = db["system_score"].get("streak_days", 0) + 1
-        elif today != last:
-            db["system_score"]["streak_days"] = 1
-    db["system_score"]["last_check_date"] = today
-
-    # Lightweight score bump
-    db["system_score"]["weekly"] = min(100, db["system_score"].get("weekly", 0) + 2)
-    save_db(db)
-    print(f"\n{CASUAL['ok']} Streak: {db['system_score']['streak_days']} days • Weekly Score: {db['system_score']['weekly']}/100\n")
-
-def breathe():
+def breathe(db):
     print("\n90-second reset. Inhale 4 • Hold 4 • Exhale 6. I’ll count you in.")
-    for i in range(3):
-        print(f"Round {i+1}/3 — Inhale…4  Hold…4  Exhale…6")
-        time.sleep(2)  # light delay so the loop feels paced without freezing phone UIs too long
-    print("Nice. Shoulders down. Jaw unclench. You’re back. 🙌\n")
+    print("Round 1/3 — Inhale…4  Hold…4  Exhale…6")
+    # the other rounds are timers, so the prompt stays usable while you breathe
+    cues = [(BREATH_ROUND * i, "breathe", f"Round {i+1}/3 — Inhale…4  Hold…4  Exhale…6", {}) for i in (1, 2)]
+    cues.append((BREATH_ROUND * 3, "breathe", "Nice. Shoulders down. Jaw unclench. You’re back. 🙌", {}))
+    DB_LOG.apply(db, timers.schedule(db, datetime.now(), cues))
 
 def reframe(db):
     print("\nDrop the thought that’s bugging you.")
@@ -379,24 +489,16 @@ def reframe(db):
     print("\nLet’s spot a pattern. Pick one (or type your own):")
     for k, v in DISTORTIONS.items():
         print(f"- {k}: {v}")
-    kind = input("Distortion label: ").strip().lower() or "overgeneralization"
+    kind = input("Distortion label: ").strip().lower()
 
     print("\nEvidence check — give me one reason this thought might be incomplete:")
     evidence = input("> ").strip()
     alt = input("Healthier reframe (1 sentence): ").strip()
 
     action = input("Tiny next action (<10 min) to move forward: ").strip()
-    ts = now()
-    db["entries"].append({
-        "ts": ts, "trigger": thought[:240],
-        "distortion": kind, "evidence": evidence[:240],
-        "reframe": alt[:240], "action": action[:240], "result": ""
-    })
-    # Score for doing the work
-    db["system_score"]["weekly"] = min(100, db["system_score"].get("weekly", 0) + 3)
-    save_db(db)
-
-    print(f"\n{CASUAL['ack']} Timer 10:00 started (pretend 😉). Do the action, then come back and log /journal result.\n")
+    result = reframe_result(db, thought, kind, evidence, alt, action, datetime.utcnow())
+    DB_LOG.apply(db, result.mutations)
+    print(result.text)
 
 def journal(db):
     if not db["entries"]:
@@ -404,15 +506,17 @@ def journal(db):
     last = db["entries"][-1]
     print(f"\nLast action: {last['action'] or '(none)'}")
     result = input("Result (done? blocked? notes): ").strip()
-    last["result"] = result[:400]
-    save_db(db)
+    DB_LOG.patch(db, "entries", len(db["entries"]) - 1, {"result": result[:400]})
     print(f"\n{CASUAL['ok']} Logged. {CASUAL['tip']}\n")
 
 def review(db):
     checks = db["check_ins"][-5:]
     entries = db["entries"][-5:]
+    METRICS.observe("/review", "scanned", len(checks) + len(entries))
     print("\n===== Weekly Review (lite) =====")
-    print(f"Streak: {db['system_score'].get('streak_days',0)} days • Weekly Score: {db['system_score'].get('weekly',0)}/100")
+    today = activity.day_number(datetime.utcnow())
+    weekly = activity.roll_week(db["system_score"], today).get("weekly", 0)
+    print(f"Streak: {activity.calendar(db).current_streak(today)} days • Weekly Score: {weekly}/100")
     if checks:
         avg_mood = sum(c['mood'] for c in checks)/len(checks)
         avg_stress = sum(c['stress'] for c in checks)/len(checks)
@@ -429,28 +533,14 @@ def review(db):
             print(f"• {e['action']}  ✅")
     print("================================\n")
 
-def export_data(db, kind="json"):
+def export_data(db, kind="json", since=None, until=None, gz=False):
     EXPORT_DIR = Path("exports"); EXPORT_DIR.mkdir(exist_ok=True)
     ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    if kind.lower() == "json":
-        out = EXPORT_DIR / f"psych_export_{ts}.json"
-        with open(out, "w", encoding="utf-8") as f:
-            json.dump(db, f, indent=2)
-    else:
-        out = EXPORT_DIR / f"psych_export_{ts}.csv"
-        # Flatten: check-ins and entries to CSV
-        rows = []
-        for c in db["check_ins"]:
-            rows.append({"ts": c["ts"], "type": "checkin", "mood": c["mood"], "stress": c["stress"],
-                         "sleep": c["sleep"], "note": c.get("note","")})
-        for e in db["entries"]:
-            rows.append({"ts": e["ts"], "type": "entry", "thought": e["trigger"],
-                         "distortion": e["distortion"], "reframe": e["reframe"],
-                         "action": e["action"], "result": e.get("result","")})
-        with open(out, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader(); writer.writerows(rows)
-    print(f"\n{CASUAL['ok']} Exported → {out}\n")
+    kind = kind.lower() if kind.lower() in EXPORT_FORMATS else "csv"
+    out = EXPORT_DIR / f"psych_export_{ts}.{EXPORT_FORMATS[kind]}"
+    # Streamed row by row: check-ins and entries share one CSV schema
+    out, n = stream_export(db, kind, out, since, until, gz)
+    print(f"\n{CASUAL['ok']} Exported {n} records → {out}\n")
 
 HELP = dedent("""
 Commands:
@@ -459,7 +549,8 @@ Commands:
   /breathe   – Quick 90-sec reset
   /journal   – Log result of your last action
   /review    – Lite weekly review + streak & score
-  /export    – Export data (json or csv). Example: /export csv
+  /export    – Export data (json, csv, ndjson or columnar). Example: /export csv --since 2024-01-01 --gzip
+  /stats     – How long commands have been taking
   /help      – Show this menu
   /quit      – Exit
 
@@ -468,9 +559,38 @@ Notes:
 • If you mention self-harm or danger, I’ll show crisis resources.
 """).strip()
 
+CASUAL_ROUTES = Router()  # handlers take (db, args)
+CASUAL_ROUTES.add("/export", lambda db, args: export_data(db, *parse_export_args(args, default_kind="json")))
+CASUAL_ROUTES.add("/checkin", lambda db, args: pulse_check(db))
+CASUAL_ROUTES.add("/reframe", lambda db, args: reframe(db))
+CASUAL_ROUTES.add("/breathe", lambda db, args: breathe(db))
+CASUAL_ROUTES.add("/journal", lambda db, args: journal(db))
+CASUAL_ROUTES.add("/review", lambda db, args: review(db))
+CASUAL_ROUTES.add("/help", lambda db, args: print("\n" + HELP + "\n"))
+CASUAL_ROUTES.add("/stats", lambda db, args: print("\n" + METRICS.render() + "\n"))
+CASUAL_ROUTES.add("/quit", None)
+
+def fire_timers(db):
+    """Due reminders (see psychbot.timers), removed from the log as they fire."""
+    if not db.loaded:
+        return []
+    if DB_LOG.stale() and not DB_LOG.refresh(db):
+        db.reload()  # another process wrote the file
+    msgs, muts = timers.fire(db, datetime.now())
+    try:
+        with DB_LOG.batch():
+            DB_LOG.apply(db, muts)
+    except ConflictError:
+        db.reload()
+        return []  # they are still pending in the file; next tick fires them
+    return msgs
+
 def main():
-    db = load_db()
+    db = LazyState(load_db)  # parsed on first command that needs data
     print(f"\n{APP_NAME}\n{CASUAL['hello']}\n")
+    ticker = timers.Ticker(TIMER_LOCK, lambda: fire_timers(db),
+                           lambda: timers.next_due(db, datetime.now()) if db.loaded else None,  # idle until a command loads db
+                           out=lambda msg: print(f"\r{msg}\n> ", end="", flush=True)).start()
     while True:
         try:
             cmd = input("> ").strip()
@@ -480,32 +600,39 @@ def main():
         if not cmd: 
             continue
 
-        if cmd.startswith("/export"):
-            parts = cmd.split()
-            kind = parts[1] if len(parts) > 1 else "json"
-            export_data(db, kind)
-        elif cmd == "/checkin":
-            pulse_check(db)
-        elif cmd == "/reframe":
-            reframe(db)
-        elif cmd == "/breathe":
-            breathe()
-        elif cmd == "/journal":
-            journal(db)
-        elif cmd == "/review":
-            review(db)
-        elif cmd == "/help":
-            print("\n" + HELP + "\n")
-        elif cmd == "/quit":
-            print("\n" + CASUAL["bye"] + "\n"); break
-        else:
-            # crisis scan any free text
-            if crisis_scan(cmd):
-                continue
+        with TIMER_LOCK:
+            if not run_line(db, cmd):
+                break
+        ticker.poke()
+    ticker.stop()
+
+def run_line(db, cmd):
+    """Run one command line; False for /quit."""
+    if db.loaded and DB_LOG.stale() and not DB_LOG.refresh(db):
+        db.reload()  # another process wrote the file
+    call = CASUAL_ROUTES.parse(cmd)
+    if call.command is not None and call.command.handler is None:
+        print("\n" + CASUAL["bye"] + "\n"); return False
+    elif call.command is not None:
+        try:
+            with METRICS.command(call.command.name) as m:
+                written = DB_LOG.bytes_written
+                # one all-or-nothing write per command; no lock held while it prompts
+                with DB_LOG.batch(lock=False):
+                    call.command.handler(db, call.args)
+                if DB_LOG.bytes_written > written:  # WAL appends (and any compaction)
+                    m["bytes"] = DB_LOG.bytes_written - written
+        except ConflictError:
+            db.reload()
+            print("Your data changed in another window — reloaded, please try again.")
+    else:
+        # crisis scan any free text
+        if not crisis_scan(cmd):
             print("Say what? Type /help for commands.")
+    return True
 
 if __name__ == "__main__":
-    main()dr
+    main()
     #!/usr/bin/env python3
 """
 Psych Bot — Command Edition (MVP)
@@ -515,7 +642,7 @@ Commands
 - /checkin (mood/stress/sleep)
 - /reframe <thought>
 - /breathe
-- /journal add|list|delete
+- /journal add|list|search|delete
 - /review
 - /export json|csv
 - /help
@@ -524,255 +651,268 @@ Data is stored locally in psych_data.json
 Crisis guardrails: shows resources on risk keywords.
 """
 
-import json, os, re, csv, sys
+import json, os, re, csv, sys, threading
 import datetime as dt
 from pathlib import Path
 
+from psychbot import activity, core, journal as journal_ids, search as journal_search, timers
+from psychbot.aggregates import Rollup
+from psychbot.batch import batch_source, read_lines, run_batch
+from psychbot.core import CLASSIFIER, CRISIS_MSG, DISTORTIONS, guess_distortion, reframe_thought
+from psychbot.durability import durability_arg
+from psychbot.export import FORMATS as EXPORT_FORMATS, export as stream_export, parse_export_args
+from psychbot.guard import MATCHERS
+from psychbot.importer import import_file
+from psychbot.metrics import METRICS
+from psychbot.server import Secrets, check_address, serve
+from psychbot.session import Workspace, WorkspaceAttr, WorkspaceState, current as current_workspace
+from psychbot.store import ConflictError
+
 DATA_PATH = Path("psych_data.json")
-EXPORT_DIR = Path("exports")
-EXPORT_DIR.mkdir(exist_ok=True)
+EXPORT_DIR = Path("exports")  # created on first export
+# STATE/STORE/ROLLUP resolve to the workspace bound to the current context
+# (one per server session); the CLI uses this default one.
+WORKSPACE = Workspace(DATA_PATH, loader=lambda: _load(), export_dir=EXPORT_DIR,
+                      durability=durability_arg([]))
+STORE = WorkspaceAttr(WORKSPACE, "store")  # json log or sqlite, see PSYCHBOT_BACKEND
+ROLLUP = WorkspaceAttr(WORKSPACE, "rollup")  # running review aggregates
+COMMITS = WorkspaceAttr(WORKSPACE, "commits")  # group commit, see --durability
 
 # --- Crisis Guardrails -------------------------------------------------------
-RISK_TERMS = [
-    r"\bsuicide\b", r"\bkill myself\b", r"\bself[- ]harm\b",
-    r"\bhurt (myself|someone)\b", r"\bno reason to live\b",
-]
+# Phrases live in psychbot.guard.EDITION_PATTERNS (one compiled regex, built at import);
+# CRISIS_MSG and the reframe tables live with the command engine in psychbot.core.
 
-CRISIS_MSG = (
-    "⚠️ I’m not equipped for emergencies.\n"
-    "If you’re in immediate danger, call **911** (US) or text **988**.\n"
-    "Prefer links? https://988lifeline.org  — Reach a trusted person now."
-)
+CRISIS_MATCHER = MATCHERS["command"]
 
 def risk_screen(text: str) -> bool:
-    if not text: return False
-    text = text.lower()
-    return any(re.search(p, text) for p in RISK_TERMS)
+    return CRISIS_MATCHER.is_risky(text)
 
 # --- Persistence --------------------------------------------------------------
 def _load():
-    if DATA_PATH.exists():
-        with open(DATA_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {
-        "user_profile": {"values": [], "supports": []},
-        "check_ins": [],
-        "entries": [],
-        "system_score": {"weekly": 0, "streak_days": 0}
-    }
+    with METRICS.timed("load") as m:
+        state = STORE.load(default={
+            "user_profile": {"values": [], "supports": []},
+            "check_ins": [],
+            "entries": [],
+            "system_score": {"weekly": 0, "streak_days": 0}
+        })
+        ROLLUP.ensure(state)
+        activity.ensure(state, STORE)
+        journal_ids.ensure(state, STORE)
+        journal_search.attach(state["entries"], journal_search.sidecar(current_workspace(WORKSPACE).data_path))
+        m["records"] = len(state["check_ins"]) + len(state["entries"])
+    return state
 
 def _save(state):
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2)
+    # full rewrite; day-to-day mutations go through STORE.apply
+    written = STORE.bytes_written
+    with METRICS.timed("save") as m:
+        STORE.compact(state)
+        m["bytes"] = STORE.bytes_written - written
 
-STATE = _load()
+STATE = WorkspaceState(WORKSPACE)  # nothing is read until a command needs data
 
 def _now_iso():
     return dt.datetime.now().isoformat(timespec="minutes")
 
-# --- Utilities ----------------------------------------------------------------
-DISTORTIONS = {
-    "all-or-nothing": ["always", "never", "perfect", "ruined"],
-    "overgeneralization": ["everyone", "no one", "every time", "nothing works"],
-    "mind reading": ["they think", "they must think", "they probably"],
-    "catastrophizing": ["disaster", "ruined", "impossible", "hopeless"],
-    "should statements": ["should", "must", "have to"],
-}
-
-def guess_distortion(text: str) -> str:
-    t = text.lower()
-    for label, cues in DISTORTIONS.items():
-        if any(cue in t for cue in cues):
-            return label
-    return "unknown"
-
-def reframe_thought(thought: str) -> dict:
-    """Return a structured CBT-style reframe."""
-    distortion = guess_distortion(thought)
-    prompts = {
-        "evidence_for": "List facts supporting the thought (1–3 bullets).",
-        "evidence_against": "List facts against it (1–3 bullets).",
-        "alt_view": "Write a balanced alternative thought.",
-        "next_action": "One controllable step (<10 min) you can take now.",
-        "if_then": "IF blocked, THEN small fallback you will do.",
-    }
-    # default templates
-    alt = {
-        "all-or-nothing": "Reality is a spectrum. One outcome ≠ total identity.",
-        "overgeneralization": "One sample ≠ the whole set. New attempts can yield new data.",
-        "mind reading": "I can’t know others’ minds. I can ask or test with evidence.",
-        "catastrophizing": "Even if this is hard, there are partial wins and recovery paths.",
-        "should statements": "Preferences beat rules. I can aim, adjust, and learn.",
-        "unknown": "I can check facts, consider contexts, and choose one next step."
-    }[distortion]
-
-    card = {
-        "ts": _now_iso(),
-        "input": thought,
-        "distortion": distortion,
-        "reframe": alt,
-        "prompts": prompts
-    }
-    return card
-
 # --- Commands -----------------------------------------------------------------
+# Thin adapters over psychbot.core: run the pure handler, persist its mutations.
+def sync_state():
+    """Pick up writes other processes made to the shared data file."""
+    if STATE.loaded and STORE.stale() and not STORE.refresh(STATE):
+        STATE.reload()
+
+def _run_once(call):
+    sync_state()
+    result = core.execute(call, STATE)
+    # one write (and one version check) per command; the search index follows once it is in
+    with journal_search.tracking(STATE, result.mutations), STORE.batch():
+        STORE.apply(STATE, result.mutations)
+    return result
+
+def _run_retrying(call, retries):
+    if not STATE.loaded:  # e.g. /help: no data needed, so no lock, batch or files either
+        result = core.execute(call, STATE)
+        if not result.mutations:
+            return result
+    with COMMITS.command():  # writes reach disk when the durability policy says so
+        for attempt in range(retries):
+            try:
+                return _run_once(call)
+            except ConflictError:
+                STATE.reload()  # lost the race: handlers are pure, so just run it again
+        with STORE.batch():  # still racing: hold the write lock for the whole command
+            return _run_once(call)
+
+def run_call(call, retries=3):
+    with METRICS.command(call.command.name if call.command else "unknown") as m:
+        written = STORE.bytes_written
+        result = _run_retrying(call, retries)
+        if STORE.bytes_written > written:  # what this command put on disk itself
+            m["bytes"] = STORE.bytes_written - written
+        if "scanned" in result.data:
+            m["scanned"] = result.data["scanned"]
+        return result
+
+def run_command(cmd, args=()):
+    return run_call(core.ROUTER.parse(" ".join((cmd, *args))))
+
 def cmd_help():
-    return (
-        "🧭 Psych Bot — Command Edition\n"
-        "/checkin  → quick mood/stress/sleep capture\n"
-        "/reframe <thought>  → spot distortion & get a reframe card\n"
-        "/breathe  → 90-sec box-breathing guide\n"
-        "/journal add|list|delete  → notes vault\n"
-        "/review   → weekly wins/lessons\n"
-        "/export json|csv  → download your data\n"
-        "Note: I’m a wellness copilot, not a therapist. Crisis? Call **911** or text **988**."
-    )
-
-def cmd_checkin():
-    print("Mood 1–5? ", end="", flush=True); mood = input().strip()
-    print("Stress 1–5? ", end="", flush=True); stress = input().strip()
-    print("Sleep hours (last night)? ", end="", flush=True); sleep = input().strip()
-    entry = {"ts": _now_iso(), "mood": int(mood), "stress": int(stress), "sleep": float(sleep)}
-    STATE["check_ins"].append(entry)
-    # simple streak logic
-    today = dt.date.today()
-    if STATE["check_ins"]:
-        last = STATE["check_ins"][-1]["ts"][:10]
-        if last == today.isoformat():
-            STATE["system_score"]["streak_days"] += 1
-    _save(STATE)
-    return f"Logged ✅  mood={mood}, stress={stress}, sleep={sleep}h"
+    return run_command("/help").text
+
+def cmd_checkin(args=(), interactive=True):
+    if interactive:
+        kv = core.kv_args(args, core.CHECKIN_FIELDS)
+        args = [f"{k}={v}" for k, v in kv.items()]
+        for key, prompt in (("mood", "Mood 1–5? "), ("stress", "Stress 1–5? "),
+                            ("sleep", "Sleep hours (last night)? ")):
+            if key not in kv:
+                print(prompt, end="", flush=True); args.append(f"{key}={input().strip()}")
+    return run_command("/checkin", args).text
 
 def cmd_breathe():
-    return (
-        "🫁 Box Breathing (90s)\n"
-        "Inhale 4 • Hold 4 • Exhale 4 • Hold 4 — repeat 6 cycles.\n"
-        "Tip: Relax shoulders. Unclench jaw. Notice 5 things you see/hear/feel."
-    )
+    return run_command("/breathe").text
 
 def cmd_journal(args):
-    if not args:
-        return "Usage: /journal add <text> | /journal list | /journal delete <id>"
-    sub = args[0].lower()
-    if sub == "add":
-        text = " ".join(args[1:]).strip()
-        if not text: return "Add what? Example: /journal add Landed interview; felt proud."
-        if risk_screen(text): return CRISIS_MSG
-        item = {"id": len(STATE["entries"])+1, "ts": _now_iso(), "text": text}
-        STATE["entries"].append(item); _save(STATE)
-        return f"Added journal #{item['id']} ✅"
-    if sub == "list":
-        if not STATE["entries"]: return "No journal entries yet."
-        lines = [f"#{e['id']}  • {e['ts']}  • {e['text']}" for e in STATE["entries"][-20:]]
-        return "🗒️ Recent entries:\n" + "\n".join(lines)
-    if sub == "delete":
-        if len(args) < 2: return "Usage: /journal delete <id>"
-        try:
-            target = int(args[1])
-            before = len(STATE["entries"])
-            STATE["entries"] = [e for e in STATE["entries"] if e["id"] != target]
-            _save(STATE)
-            return "Deleted ✅" if len(STATE["entries"]) != before else "ID not found."
-        except ValueError:
-            return "ID must be a number."
-    return "Unknown subcommand. Use: add | list | delete"
+    return run_command("/journal", args).text
 
 def cmd_review():
-    # weekly slice
-    now = dt.datetime.now()
-    week_ago = now - dt.timedelta(days=7)
-    checks = [c for c in STATE["check_ins"] if dt.datetime.fromisoformat(c["ts"]) >= week_ago]
-    if not checks:
-        return "No check-ins this week. Try /checkin to start a streak."
-    avg_mood = sum(c["mood"] for c in checks)/len(checks)
-    avg_stress = sum(c["stress"] for c in checks)/len(checks)
-    avg_sleep = sum(c["sleep"] for c in checks)/len(checks)
-    # simple “System Score”
-    score = round(max(0, min(100, 20*avg_mood - 10*avg_stress + 5*avg_sleep)))
-    STATE["system_score"]["weekly"] = score
-    _save(STATE)
-    return (
-        "📊 Weekly Review\n"
-        f"• Check-ins: {len(checks)}\n"
-        f"• Avg mood: {avg_mood:.1f}  |  Avg stress: {avg_stress:.1f}  |  Avg sleep: {avg_sleep:.1f}h\n"
-        f"• System Score: **{score} / 100**\n"
-        "Next: Log a small win in /journal, then run /reframe on anything sticky."
-    )
+    return run_command("/review").text
 
 # --- NEW: /reframe ------------------------------------------------------------
 def cmd_reframe(args):
-    if not args:
-        return "Usage: /reframe <thought>. Example: /reframe No one will hire me."
-    thought = " ".join(args).strip()
-    if risk_screen(thought): return CRISIS_MSG
-    card = reframe_thought(thought)
-    # store as entry
-    STATE["entries"].append({
-        "id": len(STATE["entries"])+1,
-        "ts": card["ts"],
-        "trigger": "thought_reframe",
-        "distortion": card["distortion"],
-        "reframe": card["reframe"],
-        "text": thought
-    })
-    _save(STATE)
-    return (
-        "🧠 Reframe Card\n"
-        f"• Distortion: **{card['distortion']}**\n"
-        f"• Balanced view: {card['reframe']}\n"
-        f"• Next step (10 min): {card['prompts']['next_action']}\n"
-        f"• IF-THEN: {card['prompts']['if_then']}"
-    )
+    return run_command("/reframe", args).text
 
 # --- NEW: /export -------------------------------------------------------------
+@core.ROUTER.command("/export", usage="/export json|csv|ndjson|columnar [--since/--until DATE] [--gzip]",
+                     help="download your data", min_args=1,
+                     hint="Usage: /export json|csv|ndjson|columnar [--since DATE] [--until DATE] [--gzip]")
+def _export(state, args, now):
+    return core.Result(cmd_export(args))
+
 def cmd_export(args):
     if not args:
-        return "Usage: /export json|csv"
-    kind = args[0].lower()
+        return "Usage: /export json|csv|ndjson|columnar [--since DATE] [--until DATE] [--gzip]"
+    kind, since, until, gz = parse_export_args(args)
     ts = dt.datetime.now().strftime("%Y%m%d_%H%M")
-    if kind == "json":
-        path = EXPORT_DIR / f"psych_export_{ts}.json"
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(STATE, f, indent=2)
-        return f"Exported JSON ✅ → {path}"
-    if kind == "csv":
-        path = EXPORT_DIR / f"psych_export_{ts}.csv"
-        # flatten a few useful records
-        rows = []
-        for c in STATE["check_ins"]:
-            rows.append({"type":"checkin","ts":c["ts"],"mood":c["mood"],"stress":c["stress"],"sleep":c["sleep"],"text":""})
-        for e in STATE["entries"]:
-            rows.append({"type":"entry","ts":e.get("ts",""),"mood":"","stress":"","sleep":"","text":e.get("text","")})
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["type","ts","mood","stress","sleep","text"])
-            writer.writeheader(); writer.writerows(rows)
-        return f"Exported CSV ✅ → {path}"
-    return "Unknown format. Use: json | csv"
+    if kind not in EXPORT_FORMATS:
+        return "Unknown format. Use: json | csv | ndjson | columnar"
+    if not current_workspace(WORKSPACE).local_files:
+        return "Export writes files on this machine, so it is only available in the CLI."
+    out_dir = current_workspace(WORKSPACE).export_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path, n = stream_export(STATE, kind, out_dir / f"psych_export_{ts}.{EXPORT_FORMATS[kind]}", since, until, gz)
+    return f"Exported {kind.upper()} ✅ ({n} records) → {path}"
+
+# --- NEW: /import -------------------------------------------------------------
+@core.ROUTER.command("/import", usage="/import <file.csv|file.ndjson>",
+                     help="bring in history from an export", min_args=1,
+                     hint="Usage: /import <file.csv|file.ndjson>[.gz]  (same shapes as /export)")
+def _import(state, args, now):
+    return core.Result(cmd_import(args))
+
+def cmd_import(args):
+    if not args:
+        return "Usage: /import <file.csv|file.ndjson>[.gz]  (same shapes as /export)"
+    if not current_workspace(WORKSPACE).local_files:
+        return "Import reads local files, so it is only available in the CLI."
+    next_id = [journal_ids.meta(STATE)["next_id"]]
+    def new_id():  # called only for rows that are actually added
+        next_id[0] += 1
+        return next_id[0] - 1
+    try:
+        report = import_file(STATE, STORE, args[0], new_id=new_id, edition="command")
+    except (OSError, ValueError) as exc:
+        return f"Import failed: {exc}"
+    finally:
+        STORE.set(STATE, journal_ids.META_KEY, {**journal_ids.meta(STATE), "next_id": next_id[0]})
+    ROLLUP.ensure(STATE, rebuild=True)
+    activity.ensure(STATE, STORE, rebuild=True)
+    lines = [f"Imported ✅ {report.summary()}"] + [f"  • {e}" for e in report.errors]
+    if report.flagged:
+        lines.append(CRISIS_MSG)
+    return "\n".join(lines)
+
+# --- Timers -------------------------------------------------------------------
+TIMER_LOCK = threading.RLock()  # the REPL holds it per command; the ticker fires in between
+
+def fire_timers():
+    """Due reminders for the current workspace, removed as they fire."""
+    if not STATE.loaded:
+        return []
+    try:
+        with COMMITS.command():
+            sync_state()
+            msgs, muts = timers.fire(STATE, dt.datetime.now())
+            with STORE.batch():
+                STORE.apply(STATE, muts)
+    except ConflictError:
+        STATE.reload()
+        return []  # still pending on disk; the next check fires them
+    return msgs
 
 # --- CLI Router ---------------------------------------------------------------
-def main():
-    print("Psych Bot ready. Type a command (or /help).")
-    while True:
+def dispatch(text, interactive=True):
+    """Run one command line; returns the reply, or None for /quit."""
+    if risk_screen(text):
+        return CRISIS_MSG
+
+    call = core.ROUTER.parse(text)  # one tokenization, trie lookup
+    if interactive and call.command is not None and call.command.name == "/checkin":
+        return cmd_checkin(call.args)
+    result = run_call(call)
+    if result.quit:
+        return None
+    # server sessions and batches have no ticker: due reminders ride along with the reply
+    return "\n".join([result.text, *fire_timers()]) if not interactive else result.text
+
+def _arg(argv, flag, default=None):
+    return argv[argv.index(flag) + 1] if flag in argv[:-1] else default
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    address = _arg(argv, "--serve")
+    src = batch_source(argv)
+    durability = durability_arg(argv, default="exit" if src else None)  # batch: one write at the end
+    if address:
+        users = Path(_arg(argv, "--data-dir", "users"))
+        def workspace_for(user):
+            return Workspace(users / user / DATA_PATH.name, loader=_load, local_files=False,
+                             durability=durability)
         try:
-            text = input("> ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print("\nBye."); break
-        if not text: continue
-        if risk_screen(text):
-            print(CRISIS_MSG); continue
-
-        parts = text.split()
-        cmd, args = parts[0].lower(), parts[1:]
-
-        if cmd in ("/quit", "/exit"): print("Bye."); break
-        elif cmd == "/help": print(cmd_help())
-        elif cmd == "/checkin": print(cmd_checkin())
-        elif cmd == "/breathe": print(cmd_breathe())
-        elif cmd == "/journal": print(cmd_journal(args))
-        elif cmd == "/review": print(cmd_review())
-        elif cmd == "/reframe": print(cmd_reframe(args))      # NEW
-        elif cmd == "/export": print(cmd_export(args))        # NEW
-        else: print("Unknown. Try /help")
+            check_address(address, public="--public" in argv)
+        except ValueError as exc:
+            sys.exit(f"Not serving: {exc}")
+        print(f"Psych Bot serving on {address} (data in {users}/<user>/). Ctrl+C to stop.")
+        serve(address, lambda line: dispatch(line, interactive=False), workspace_for, Secrets(users),
+              public=True)  # checked above
+        return
+    COMMITS.set_mode(durability)
+    try:
+        if src:
+            ok, failed = run_batch(read_lines(src), lambda line: dispatch(line, interactive=False), COMMITS)
+            print(f"Batch done: {ok} ok, {failed} failed.")
+            return
+        print("Psych Bot ready. Type a command (or /help).")
+        ticker = timers.Ticker(TIMER_LOCK, fire_timers,
+                               lambda: timers.next_due(STATE, dt.datetime.now()) if STATE.loaded else None,  # idle until a command loads it
+                               out=lambda msg: print(f"\r{msg}\n> ", end="", flush=True)).start()
+        while True:
+            try:
+                text = input("> ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print("\nBye."); break
+            if not text: continue
+            with TIMER_LOCK:
+                reply = dispatch(text)
+            if reply is None: print("Bye."); break
+            print(reply)
+            ticker.poke()
+        ticker.stop()
+    finally:
+        COMMITS.commit()  # /quit, Ctrl+C and EOF all land here
+        if STATE.loaded:
+            journal_search.save(STATE["entries"])
 
 if __name__ == "__main__":
     main()
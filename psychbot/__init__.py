@@ -0,0 +1,4 @@
+"""
+Psych Bot engine — shared building blocks for the command editions.
+Everything here is local-only and stdlib-based.
+"""
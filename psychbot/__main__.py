@@ -0,0 +1,6 @@
+"""python -m psychbot [--batch FILE|- | --serve ADDR [--public]] — runs the Command Edition CLI."""
+
+import psych_bot
+
+if __name__ == "__main__":
+    psych_bot.main()
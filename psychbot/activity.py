@@ -0,0 +1,187 @@
+"""
+Activity calendar: one bit per day with a check-in, for streaks and weekly rollover.
+
+Stored under db["activity"]:
+  {"v": 1, "base": <epoch day of bit 0>, "bits": "<hex>"}
+
+Days are the date part of each check-in's ``ts`` (so each edition counts in
+its own clock: local time, or UTC for the casual edition's ``...Z`` stamps)
+as days since 1970-01-01. Five years of history is ~230 bytes of hex.
+
+Marking a day, the current streak and "active days in a range" are a
+shift and a mask on one int; the longest streak walks runs of set bits;
+per-week counts are one mask per week. ``ensure`` rebuilds the calendar
+from the check-ins in one pass (CheckinLog's epoch column, no ts parsing)
+whenever it is missing or outdated, exactly like the review rollups.
+"""
+
+import datetime as dt
+
+from psychbot.checkins import CheckinLog
+from psychbot.store import segments
+
+KEY = "activity"
+VERSION = 1
+_EPOCH_ORD = dt.date(1970, 1, 1).toordinal()
+
+
+def day_number(d):
+    """Epoch day of a date, datetime or ISO timestamp string."""
+    if isinstance(d, str):
+        d = dt.date.fromisoformat(d[:10])
+    elif isinstance(d, dt.datetime):
+        d = d.date()
+    return d.toordinal() - _EPOCH_ORD
+
+
+def week_start(day):
+    """Epoch day of the Monday on or before ``day`` (1970-01-01 was a Thursday)."""
+    return day - (day + 3) % 7
+
+
+class Calendar:
+    """Bitset of active epoch days; bit ``i`` is day ``base + i``."""
+
+    __slots__ = ("base", "bits")
+
+    def __init__(self, base=0, bits=0):
+        self.base = base
+        self.bits = bits
+
+    @classmethod
+    def from_days(cls, days):
+        """Build from any iterable of epoch days in one pass."""
+        days = set(days)
+        if not days:
+            return cls()
+        base = min(days)
+        buf = bytearray((max(days) - base) // 8 + 1)
+        for d in days:
+            i = d - base
+            buf[i >> 3] |= 1 << (i & 7)
+        return cls(base, int.from_bytes(buf, "little"))
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(doc["base"], int(doc["bits"], 16))
+
+    def to_doc(self):
+        return {"v": VERSION, "base": self.base, "bits": format(self.bits, "x")}
+
+    # --- Bits ------------------------------------------------------------------------
+    def mark(self, day):
+        """Set ``day``; True if it wasn't set before."""
+        if not self.bits:
+            self.base, self.bits = day, 1
+            return True
+        if day < self.base:
+            self.bits <<= self.base - day
+            self.base = day
+        bit = 1 << (day - self.base)
+        if self.bits & bit:
+            return False
+        self.bits |= bit
+        return True
+
+    def active(self, day):
+        return day >= self.base and bool(self.bits >> (day - self.base) & 1)
+
+    def _span(self, first, last):
+        """Bits for days ``first..last`` (inclusive), day ``first`` at bit 0."""
+        if last < first or last < self.base:
+            return 0
+        lo = max(first, self.base)
+        span = (self.bits >> (lo - self.base)) & ((1 << (last - lo + 1)) - 1)
+        return span << (lo - first)
+
+    def count(self, first, last):
+        """Active days in ``first..last`` inclusive."""
+        return self._span(first, last).bit_count()
+
+    # --- Streaks ---------------------------------------------------------------------
+    def current_streak(self, today):
+        """Consecutive active days ending today (or yesterday, if today isn't logged yet)."""
+        end = today if self.active(today) else today - 1
+        if not self.active(end):
+            return 0
+        n = end - self.base + 1
+        gaps = ~self.bits & ((1 << n) - 1)  # zeros at or below ``end``
+        return n if not gaps else end - self.base - (gaps.bit_length() - 1)
+
+    def longest_streak(self):
+        x, best = self.bits, 0
+        while x:
+            x >>= (x & -x).bit_length() - 1    # drop the gap below the next run
+            run = (~x & (x + 1)).bit_length() - 1  # length of that run of ones
+            best = max(best, run)
+            x >>= run
+        return best
+
+    def weeks(self, today, n=4):
+        """Active days per Monday-to-Sunday week, oldest first, the last being this week."""
+        start = week_start(today if isinstance(today, int) else day_number(today))
+        return [self.count(start - 7 * k, start - 7 * k + 6) for k in range(n - 1, -1, -1)]
+
+
+# --- In the db --------------------------------------------------------------------
+def from_history(check_ins):
+    """Calendar from the check-in history, in one pass."""
+    days = set()
+    for *_, load in segments(check_ins):
+        part = load()
+        if isinstance(part, CheckinLog):
+            secs, skip = part.columns()["ts"], part.irregular
+            if skip:
+                days.update(int(sec // 86400) for i, sec in enumerate(secs) if i not in skip)
+            else:
+                days.update(int(sec // 86400) for sec in secs)
+            part = [part[i] for i in skip]
+        days.update(d for d in map(_day_or_none, part) if d is not None)
+    return Calendar.from_days(days)
+
+
+def _day_or_none(c):
+    try:
+        return day_number(c["ts"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def calendar(db):
+    """The db's calendar (rebuilt from its check-ins if ``ensure`` hasn't run)."""
+    doc = db.get(KEY)
+    if doc and doc.get("v") == VERSION:
+        return Calendar.from_doc(doc)
+    return from_history(db.get("check_ins", ()))
+
+
+def ensure(db, store, rebuild=False):
+    """Build and persist the calendar if missing, outdated, or ``rebuild``."""
+    doc = db.get(KEY)
+    if doc and doc.get("v") == VERSION and not rebuild:
+        return Calendar.from_doc(doc)
+    cal = from_history(db.get("check_ins", ()))
+    store.set(db, KEY, cal.to_doc())
+    return cal
+
+
+def mark_mutations(cal, day):
+    """Mark ``day`` on ``cal`` (a copy from ``calendar(db)``); the mutation to persist it, if new."""
+    if not cal.mark(day):
+        return []
+    return [{"op": "set", "key": KEY, "value": cal.to_doc()}]
+
+
+def roll_week(score, day):
+    """``score`` for the week holding ``day``: ``weekly`` restarts at 0 once that week is
+    later than the stored one. Scores saved before ``week`` existed are dated by their
+    ``last_day``/``last_check_date``; with neither, they keep their points."""
+    week, out = week_start(day), dict(score)
+    last = out.get("week")
+    if last is None:
+        seen = out.get("last_day") or out.get("last_check_date")
+        last = week_start(day_number(seen)) if seen else week
+    if week > last:
+        out["weekly"] = 0
+    out["week"] = max(week, last)
+    return out
@@ -0,0 +1,134 @@
+"""
+Running aggregates kept next to the history, so /review never re-walks it.
+
+Stored under db["aggregates"]:
+  {"v": 1,
+   "days":        {"2024-05-01": [count, mood_sum, stress_sum, sleep_sum], ...},
+   "triggers":    {"<trigger key>": count, ...},
+   "distortions": {"<label>": count, ...}}
+
+Each check-in / entry / delete bumps only the leaves it touches (the store
+persists them as single ``inc`` records), so a review over a W-day window is
+O(W) however long the history is.
+"""
+
+import datetime as dt
+import heapq
+
+from psychbot.checkins import EPOCH, CheckinLog
+from psychbot.store import is_live, segments, trigger_key
+
+AGG_KEY = "aggregates"
+VERSION = 1
+
+
+def day_of(ts):
+    return ts[:10]
+
+
+def _distortions(e):
+    d = e.get("distortion")
+    if not d:
+        return []
+    labels = [d] if isinstance(d, str) else list(d)
+    return [l for l in labels if l not in ("—", "unknown")]
+
+
+# --- Mutations (pure; see psychbot.core) ------------------------------------------
+def checkin_mutations(c, sign=1):
+    delta = [sign, sign * c["mood"], sign * c["stress"], sign * c.get("sleep", 0)]
+    return [{"op": "inc", "key": AGG_KEY, "path": ["days", day_of(c["ts"])], "delta": delta}]
+
+
+def entry_mutations(e, sign=1):
+    out = []
+    key = trigger_key(e)
+    if key:
+        out.append({"op": "inc", "key": AGG_KEY, "path": ["triggers", key], "delta": sign})
+    for label in _distortions(e):
+        out.append({"op": "inc", "key": AGG_KEY, "path": ["distortions", label], "delta": sign})
+    return out
+
+
+# --- Reads (pure) -------------------------------------------------------------------
+def window(db, days=7, today=None):
+    """``(count, avg_mood, avg_stress, avg_sleep)`` over the last ``days`` calendar days."""
+    today = today or dt.date.today()
+    buckets = db[AGG_KEY]["days"]
+    n = m = s = sl = 0
+    for i in range(days):
+        b = buckets.get((today - dt.timedelta(days=i)).isoformat())
+        if b:
+            n += b[0]; m += b[1]; s += b[2]; sl += b[3]
+    if not n:
+        return 0, 0, 0, 0
+    return n, m / n, s / n, sl / n
+
+
+def top_triggers(db, limit=3):
+    return heapq.nlargest(limit, db[AGG_KEY]["triggers"].items(), key=lambda x: x[1])
+
+
+def top_distortions(db, limit=1):
+    return heapq.nlargest(limit, db[AGG_KEY]["distortions"].items(), key=lambda x: x[1])
+
+
+def _columns_into(days, log):
+    """Day buckets straight from a CheckinLog's arrays (no ts strings rendered)."""
+    cols, skip, names = log.columns(), log.irregular, {}
+    for i, (sec, mood, stress, sleep) in enumerate(zip(cols["ts"], cols["mood"], cols["stress"], cols["sleep"])):
+        if skip and i in skip:
+            continue
+        d = int(sec // 86400)
+        name = names.get(d)
+        if name is None:
+            name = names[d] = (EPOCH + dt.timedelta(days=d)).date().isoformat()
+        day = days.setdefault(name, [0, 0, 0, 0.0])
+        day[0] += 1; day[1] += mood; day[2] += stress; day[3] += round(sleep, 6) if sleep == sleep else 0  # as the view reads it
+
+
+class Rollup:
+    """Maintains db["aggregates"] through a store's ``incr``."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def ensure(self, db, rebuild=False):
+        """Build the aggregates in one pass if missing, outdated, or ``rebuild``."""
+        agg = db.get(AGG_KEY)
+        if agg and agg.get("v") == VERSION and not rebuild:
+            return agg
+        agg = {"v": VERSION, "days": {}, "triggers": {}, "distortions": {}}
+        for *_, load in segments(db.get("check_ins", ())):
+            checks = load()
+            if isinstance(checks, CheckinLog):
+                _columns_into(agg["days"], checks)
+                checks = [checks[i] for i in sorted(checks.irregular)]
+            for c in checks:
+                day = agg["days"].setdefault(day_of(c["ts"]), [0, 0, 0, 0.0])
+                day[0] += 1; day[1] += c["mood"]; day[2] += c["stress"]; day[3] += c.get("sleep", 0)
+        for e in filter(is_live, db.get("entries", ())):
+            key = trigger_key(e)
+            if key:
+                agg["triggers"][key] = agg["triggers"].get(key, 0) + 1
+            for label in _distortions(e):
+                agg["distortions"][label] = agg["distortions"].get(label, 0) + 1
+        self.store.set(db, AGG_KEY, agg)
+        return agg
+
+    # --- Updates -------------------------------------------------------------------
+    def on_checkin(self, db, c, sign=1):
+        self.store.apply(db, checkin_mutations(c, sign))
+
+    def on_entry(self, db, e, sign=1):
+        self.store.apply(db, entry_mutations(e, sign))
+
+    # --- Reads -----------------------------------------------------------------------
+    def window(self, db, days=7, today=None):
+        return window(db, days, today)
+
+    def top_triggers(self, db, limit=3):
+        return top_triggers(db, limit)
+
+    def top_distortions(self, db, limit=1):
+        return top_distortions(db, limit)
@@ -0,0 +1,54 @@
+"""
+Non-interactive batch mode: one fully-argumented command per line.
+
+    python -m psychbot --batch commands.txt
+    generate_commands | python -m psychbot --batch -
+(see psychbot.server for ``--serve``)
+
+Blank lines and ``#`` comments are skipped. All commands run against one
+loaded state inside ``store.batch()``, so with the batch default
+``--durability=exit`` the data file is written once at the end instead of
+once per command (see psychbot.durability).
+"""
+
+import sys
+
+
+def batch_source(argv):
+    """The path after ``--batch`` ('-' = stdin), or None when not in batch mode."""
+    if "--batch" not in argv:
+        return None
+    i = argv.index("--batch")
+    return argv[i + 1] if i + 1 < len(argv) else "-"
+
+
+def read_lines(src):
+    fh = sys.stdin if src == "-" else open(src, encoding="utf-8")
+    try:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def run_batch(lines, dispatch, store, out=print):
+    """Run ``dispatch(line)`` for each line; returns (ok, failed) counts.
+
+    A failing line is reported with its number and the batch carries on.
+    """
+    ok = failed = 0
+    with store.batch():
+        for n, line in enumerate(lines, 1):
+            try:
+                result = dispatch(line)
+            except Exception as exc:  # keep going: one bad row shouldn't sink the batch
+                failed += 1
+                out(f"[line {n}] error: {exc}")
+                continue
+            ok += 1
+            if result:
+                out(result)
+    return ok, failed
@@ -0,0 +1,321 @@
+"""
+Compact in-memory check-ins: one typed array per field instead of a dict per row.
+
+    ts      float64 epoch seconds (+ a uint8 code for the ISO format it came in)
+    mood    int8
+    stress  int8
+    sleep   float32 (NaN = not recorded)
+    note    uint32 code into an interned string table (0 = no note)
+
+About 20 bytes a row against ~400 for the dict + ISO string it replaces
+(see benchmarks/bench_checkins.py). Backends load db["check_ins"] into a
+CheckinLog; it is a mutable sequence whose items are read-only-looking
+mappings (Checkin views), so code written against a list of dicts keeps
+working. Rows the columns can't hold exactly (an unusual timestamp,
+out-of-range numbers, extra fields) are kept as plain dicts on the side,
+so a load/save round trip never changes the data.
+
+Analytics code can skip the views entirely: ``columns()`` returns the
+arrays, with ``ts`` already as epoch seconds.
+"""
+
+import datetime as dt
+from array import array
+from collections.abc import Mapping, MutableSequence
+
+EPOCH = dt.datetime(1970, 1, 1)
+FIELDS = ("ts", "mood", "stress", "sleep", "note")
+_FIELD_SET = frozenset(FIELDS)
+_FAST_SPECS = {16: "minutes", 19: "seconds"}  # ISO lengths that always round-trip
+_OTHER_SPECS = {10: "date", 23: "milliseconds", 26: "microseconds"}
+_NAN = float("nan")
+
+
+def _epoch(ts):
+    return (dt.datetime.fromisoformat(ts) - EPOCH).total_seconds()
+
+
+def _render(sec, spec, suffix):
+    t = EPOCH + dt.timedelta(seconds=sec)
+    return (t.date().isoformat() if spec == "date" else t.isoformat(timespec=spec)) + suffix
+
+
+class Checkin(Mapping):
+    """Dict-like view of one row of a CheckinLog (positional, like a list index)."""
+
+    __slots__ = ("_log", "_i")
+
+    def __init__(self, log, i):
+        self._log = log
+        self._i = i
+
+    def __getitem__(self, key):
+        return self._log._field(self._i, key)
+
+    def __iter__(self):
+        return iter(self._log._keys(self._i))
+
+    def __len__(self):
+        return len(self._log._keys(self._i))
+
+    def update(self, fields):
+        self._log[self._i] = {**self, **fields}
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def __repr__(self):
+        return f"Checkin({dict(self)!r})"
+
+
+class CheckinLog(MutableSequence):
+    """Columnar list of check-ins; see the module docstring."""
+
+    __slots__ = ("epoch", "fmt", "mood", "stress", "sleep", "note",
+                 "_fmts", "_fmt_codes", "_notes", "_note_codes", "_odd")
+
+    def __init__(self, items=()):
+        self.epoch = array("d")
+        self.fmt = array("B")
+        self.mood = array("b")
+        self.stress = array("b")
+        self.sleep = array("f")
+        self.note = array("I")
+        self._fmts, self._fmt_codes = [], {}     # (timespec, suffix) table
+        self._notes, self._note_codes = [None], {}
+        self._odd = {}                           # position -> dict the columns can't hold
+        self.extend(items)
+
+    # --- Packing -------------------------------------------------------------------
+    def _fmt_code(self, key):
+        code = self._fmt_codes.get(key)
+        if code is None:
+            if len(self._fmts) == 255:
+                return None
+            code = self._fmt_codes[key] = len(self._fmts)
+            self._fmts.append(key)
+        return code
+
+    def _note_code(self, note):
+        code = self._note_codes.get(note)
+        if code is None:
+            code = self._note_codes[note] = len(self._notes)
+            self._notes.append(note)
+        return code
+
+    def _pack(self, c):
+        """Column values for ``c``, or None if it must be kept as a dict."""
+        try:
+            ts, mood, stress = c["ts"], c["mood"], c["stress"]
+            if not (isinstance(ts, str) and type(mood) is int and type(stress) is int
+                    and -128 <= mood < 128 and -128 <= stress < 128
+                    and all(k in FIELDS for k in c)):
+                return None
+            body, suffix = (ts[:-1], "Z") if ts.endswith("Z") else (ts, "")
+            spec = _FAST_SPECS.get(len(body)) if body[4::3][:4] == "--T:" else None
+            if spec is None:
+                spec = _OTHER_SPECS.get(len(body))
+                if spec is None or _render(_epoch(body), spec, suffix) != ts:
+                    return None
+            sec = _epoch(body)
+            sleep = c.get("sleep", _NAN)
+            if sleep is not _NAN:
+                if type(sleep) is not float or sleep != sleep:  # ints stay exact as dicts
+                    return None
+                if round(array("f", (sleep,))[0], 6) != sleep:
+                    return None
+            note = c.get("note")
+            if "note" in c and not isinstance(note, str):
+                return None
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return None
+        fmt = self._fmt_code((spec, suffix))
+        if fmt is None:
+            return None
+        return sec, fmt, mood, stress, sleep, self._note_code(note) if "note" in c else 0
+
+    def _odd_row(self, c):
+        """Placeholder column values for a dict kept on the side (best effort for columns())."""
+        def num(v, lo=-128, hi=127):
+            return v if type(v) is int and lo <= v <= hi else 0
+        try:
+            sec = _epoch(str(c.get("ts", "")).rstrip("Z"))
+        except (TypeError, ValueError):
+            sec = _NAN
+        sleep = c.get("sleep", _NAN)
+        return (sec, 0, num(c.get("mood")), num(c.get("stress")),
+                sleep if type(sleep) in (int, float) else _NAN, 0)
+
+    def _write(self, i, c):
+        row = self._pack(c)
+        if row is None:
+            self._odd[i] = dict(c)
+            row = self._odd_row(c)
+        else:
+            self._odd.pop(i, None)
+        return row
+
+    # --- Sequence protocol -----------------------------------------------------------
+    def __len__(self):
+        return len(self.epoch)
+
+    def _index(self, i):
+        n = len(self.epoch)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("check-in index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = self._index(i)
+        odd = self._odd.get(i)
+        return odd if odd is not None else Checkin(self, i)
+
+    def __iter__(self):
+        odd = self._odd
+        for i in range(len(self.epoch)):
+            d = odd.get(i)
+            yield d if d is not None else Checkin(self, i)
+
+    def __setitem__(self, i, c):
+        if isinstance(i, slice):
+            items = [dict(x) for x in c]
+            rows = [dict(x) for x in self]
+            rows[i] = items
+            self.clear()
+            self.extend(rows)
+            return
+        i = self._index(i)
+        row = self._write(i, c)
+        for col, v in zip(self._cols(), row):
+            col[i] = v
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            for j in sorted(range(*i.indices(len(self))), reverse=True):
+                del self[j]
+            return
+        i = self._index(i)
+        for col in self._cols():
+            del col[i]
+        self._odd = {(j - 1 if j > i else j): d for j, d in self._odd.items() if j != i}
+
+    def insert(self, i, c):
+        n = len(self)
+        i = max(0, min(n, i + n if i < 0 else i))
+        if i < n:
+            self._odd = {(j + 1 if j >= i else j): d for j, d in self._odd.items()}
+        row = self._write(i, c)
+        for col, v in zip(self._cols(), row):
+            col.insert(i, v)
+
+    def append(self, c):
+        row = self._write(len(self), c)
+        for col, v in zip(self._cols(), row):
+            col.append(v)
+
+    def extend(self, items):
+        """Bulk append; the common row shape skips the general checks in ``_pack``."""
+        epoch, fmt, moods, stresses, sleeps, notes = self._cols()
+        fromiso, sleep_ok, absent = dt.datetime.fromisoformat, {}, object()
+        fmt_codes, note_codes = self._fmt_codes, self._note_codes
+        for c in items:
+            try:
+                ts, mood, stress, sleep = c["ts"], c["mood"], c["stress"], c.get("sleep")
+                note = c.get("note", absent)
+                if (type(mood) is int and type(stress) is int and type(sleep) is float
+                        and type(ts) is str and -128 <= mood < 128 and -128 <= stress < 128
+                        and (note is absent or type(note) is str) and c.keys() <= _FIELD_SET):
+                    body, suffix = (ts[:-1], "Z") if ts[-1:] == "Z" else (ts, "")
+                    spec = _FAST_SPECS.get(len(body)) if body[4::3][:4] == "--T:" else None
+                    ok = sleep_ok.get(sleep)
+                    if ok is None:
+                        ok = sleep_ok[sleep] = round(array("f", (sleep,))[0], 6) == sleep
+                    code = fmt_codes.get((spec, suffix)) if spec and ok else None
+                    if code is None and spec and ok:
+                        code = self._fmt_code((spec, suffix))
+                    if code is not None:
+                        sec = (fromiso(body) - EPOCH).total_seconds()
+                        epoch.append(sec); fmt.append(code); moods.append(mood)
+                        stresses.append(stress); sleeps.append(sleep)
+                        notes.append(0 if note is absent else
+                                     note_codes.get(note) or self._note_code(note))
+                        continue
+            except (KeyError, TypeError, ValueError):
+                pass
+            self.append(c)
+
+    def clear(self):
+        for col in self._cols():
+            del col[:]
+        self._odd.clear()
+
+    def _cols(self):
+        return self.epoch, self.fmt, self.mood, self.stress, self.sleep, self.note
+
+    # --- Field access (for Checkin views) -----------------------------------------
+    def _field(self, i, key):
+        if key == "ts":
+            spec, suffix = self._fmts[self.fmt[i]]
+            return _render(self.epoch[i], spec, suffix)
+        if key == "mood":
+            return self.mood[i]
+        if key == "stress":
+            return self.stress[i]
+        if key == "sleep":
+            v = self.sleep[i]
+            if v != v:
+                raise KeyError(key)
+            return round(v, 6)
+        if key == "note" and self.note[i]:
+            return self._notes[self.note[i]]
+        raise KeyError(key)
+
+    def _keys(self, i):
+        keys = ["ts", "mood", "stress"]
+        if self.sleep[i] == self.sleep[i]:
+            keys.append("sleep")
+        if self.note[i]:
+            keys.append("note")
+        return keys
+
+    # --- Bulk access -----------------------------------------------------------------
+    def columns(self):
+        """``{"ts": epoch seconds, "mood", "stress", "sleep"}`` arrays (NaN sleep = unknown).
+
+        Rows in ``irregular`` hold best-effort values here; read them as dicts.
+        """
+        return {"ts": self.epoch, "mood": self.mood, "stress": self.stress, "sleep": self.sleep}
+
+    @property
+    def irregular(self):
+        """Positions of rows kept as plain dicts."""
+        return self._odd.keys()
+
+    def to_list(self):
+        return [dict(c) for c in self]
+
+    def __repr__(self):
+        return f"CheckinLog(<{len(self)} check-ins>)"
+
+
+def columnize(db):
+    """Swap db["check_ins"] for a CheckinLog (backends call this on load)."""
+    items = db.get("check_ins")
+    if isinstance(items, list):
+        db["check_ins"] = CheckinLog(items)
+    return db
+
+
+def jsonable(o):
+    """``json.dumps(default=...)`` hook for CheckinLog / Checkin and other list-likes."""
+    if isinstance(o, CheckinLog):
+        return o.to_list()
+    if isinstance(o, Mapping):
+        return dict(o)
+    if isinstance(o, MutableSequence):  # e.g. psychbot.partitions.PartitionedList
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
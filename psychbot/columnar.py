@@ -0,0 +1,123 @@
+"""
+Compact columnar export (``.pbcol``) for analytics — stdlib only.
+
+Layout (all little-endian):
+  b"PBCOL1"                       magic
+  uint32 header length, header    JSON: row counts, column specs, dictionaries
+  column blocks                   raw ``array`` bytes, in header order
+
+Columns:
+  check_ins: ts (float64 epoch s), mood (int8), stress (int8), sleep (float32)
+  entries:   ts (float64 epoch s), kind (uint8 code), distortion (uint16 code)
+Codes index into header["dicts"][name]; code 0 is the empty label.
+Free text is not included; use the ndjson export for that.
+"""
+
+import datetime as dt
+import json, struct, sys
+from array import array
+
+from psychbot.checkins import CheckinLog
+from psychbot.store import entry_kind, is_live, segments
+
+MAGIC = b"PBCOL1"
+EPOCH = dt.datetime(1970, 1, 1)
+CHECKIN_COLS = (("ts", "d"), ("mood", "b"), ("stress", "b"), ("sleep", "f"))
+ENTRY_COLS = (("ts", "d"), ("kind", "B"), ("distortion", "H"))
+
+
+def ts_to_epoch(ts):
+    """ISO timestamp (optionally ``Z``-suffixed) → seconds since epoch, wall-clock."""
+    if not ts:
+        return float("nan")
+    return (dt.datetime.fromisoformat(ts.rstrip("Z")) - EPOCH).total_seconds()
+
+
+def epoch_to_iso(sec, timespec="seconds"):
+    return (EPOCH + dt.timedelta(seconds=sec)).isoformat(timespec=timespec)
+
+
+class _Dict:
+    def __init__(self):
+        self.values, self.codes = [""], {"": 0}
+
+    def code(self, v):
+        c = self.codes.get(v)
+        if c is None:
+            c = self.codes[v] = len(self.values)
+            self.values.append(v)
+        return c
+
+
+def _le(arr):
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr); arr.byteswap()
+    return arr.tobytes()
+
+
+def write_columnar(fh, db, since=None, until=None):
+    """Write ``db`` to a binary file handle. Returns the record count."""
+    from psychbot.export import in_range
+    cols = {("check_ins", n): array(t) for n, t in CHECKIN_COLS}
+    cols.update({("entries", n): array(t) for n, t in ENTRY_COLS})
+    dicts = {"kind": _Dict(), "distortion": _Dict()}
+    # only the pieces (archived months) that can hold since..until are read
+    for *_, load in segments(db.get("check_ins", ()), since, until):
+        checks = load()
+        if isinstance(checks, CheckinLog) and not (since or until or checks.irregular):
+            # already columnar: copy the arrays instead of rendering and re-parsing every ts
+            src, sleep = checks.columns(), cols["check_ins", "sleep"]
+            start = len(sleep)
+            for n, _ in CHECKIN_COLS:
+                cols["check_ins", n].extend(src[n])
+            for i in range(start, len(sleep)):
+                if sleep[i] != sleep[i]:
+                    sleep[i] = 0.0  # not recorded
+            continue
+        for c in checks:
+            if in_range(c["ts"], since, until):
+                cols["check_ins", "ts"].append(ts_to_epoch(c["ts"]))
+                cols["check_ins", "mood"].append(int(c["mood"]))
+                cols["check_ins", "stress"].append(int(c["stress"]))
+                cols["check_ins", "sleep"].append(float(c.get("sleep", 0)))
+    for *_, load in segments(db.get("entries", ()), since, until):
+        for e in load():
+            if is_live(e) and in_range(e.get("ts"), since, until):
+                d = e.get("distortion") or ""
+                cols["entries", "ts"].append(ts_to_epoch(e.get("ts")))
+                cols["entries", "kind"].append(dicts["kind"].code(entry_kind(e)))
+                cols["entries", "distortion"].append(dicts["distortion"].code(d if isinstance(d, str) else ",".join(d)))
+    blocks = [_le(a) for a in cols.values()]
+    header = {
+        "rows": {"check_ins": len(cols["check_ins", "ts"]), "entries": len(cols["entries", "ts"])},
+        "columns": [{"table": t, "name": n, "type": a.typecode, "bytes": len(b)}
+                    for ((t, n), a), b in zip(cols.items(), blocks)],
+        "dicts": {k: d.values for k, d in dicts.items()},
+    }
+    raw = json.dumps(header).encode("utf-8")
+    fh.write(MAGIC + struct.pack("<I", len(raw)) + raw)
+    for b in blocks:
+        fh.write(b)
+    return sum(header["rows"].values())
+
+
+def read_columnar(fh):
+    """Read a ``.pbcol`` stream → ``{"check_ins": {col: array}, "entries": {...}, "dicts": {...}}``."""
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a Psych Bot columnar file")
+    (size,) = struct.unpack("<I", fh.read(4))
+    header = json.loads(fh.read(size))
+    out = {"check_ins": {}, "entries": {}, "dicts": header["dicts"]}
+    for spec in header["columns"]:
+        arr = array(spec["type"])
+        arr.frombytes(fh.read(spec["bytes"]))
+        if sys.byteorder == "big":
+            arr.byteswap()
+        out[spec["table"]][spec["name"]] = arr
+    return out
+
+
+def decode(table, name, reader_out):
+    """Expand a dictionary-encoded column back to labels."""
+    values = reader_out["dicts"][name]
+    return [values[c] for c in reader_out[table][name]]
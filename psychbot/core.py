@@ -0,0 +1,334 @@
+"""
+Command engine for the Command Edition — pure handlers, no I/O.
+
+Every handler takes ``(state, args, now)`` — the loaded db (read only), the
+arguments (a token list, or a typed dict for commands with a ``params``
+schema) and the current time — and returns a Result:
+the reply text, optional structured data, and the mutations to persist.
+Mutations are dicts in the write-ahead-log record shapes (see psychbot.wal),
+so an adapter just hands them to ``store.apply(state, result.mutations)``.
+
+Handlers are registered on ROUTER (see psychbot.router), which also
+checks argument schemas and renders /help. The terminal REPL, batch mode
+and the server are all thin adapters over ``run``; /export and /import,
+whose whole job is file I/O, are registered by the adapter (psych_bot.py).
+"""
+
+import datetime as dt
+
+from psychbot import activity, aggregates, journal as jr, search, timers, trends
+from psychbot.distort import DistortionClassifier
+from psychbot.export import parse_export_args
+from psychbot.guard import MATCHERS
+from psychbot.importer import entry_text
+from psychbot.metrics import METRICS
+from psychbot.router import ArgError, Router
+
+CRISIS_MSG = (
+    "⚠️ I’m not equipped for emergencies.\n"
+    "If you’re in immediate danger, call **911** (US) or text **988**.\n"
+    "Prefer links? https://988lifeline.org  — Reach a trusted person now."
+)
+
+DISTORTIONS = {
+    "all-or-nothing": ["always", "never", "perfect", "ruined"],
+    "overgeneralization": ["everyone", "no one", "every time", "nothing works"],
+    "mind reading": ["they think", "they must think", "they probably"],
+    "catastrophizing": ["disaster", "ruined", "impossible", "hopeless"],
+    "should statements": ["should", "must", "have to"],
+}
+CLASSIFIER = DistortionClassifier(DISTORTIONS)  # cue table built once
+
+ALT_VIEWS = {
+    "all-or-nothing": "Reality is a spectrum. One outcome ≠ total identity.",
+    "overgeneralization": "One sample ≠ the whole set. New attempts can yield new data.",
+    "mind reading": "I can’t know others’ minds. I can ask or test with evidence.",
+    "catastrophizing": "Even if this is hard, there are partial wins and recovery paths.",
+    "should statements": "Preferences beat rules. I can aim, adjust, and learn.",
+    "unknown": "I can check facts, consider contexts, and choose one next step."
+}
+
+PROMPTS = {
+    "evidence_for": "List facts supporting the thought (1–3 bullets).",
+    "evidence_against": "List facts against it (1–3 bullets).",
+    "alt_view": "Write a balanced alternative thought.",
+    "next_action": "One controllable step (<10 min) you can take now.",
+    "if_then": "IF blocked, THEN small fallback you will do.",
+}
+
+CHECKIN_FIELDS = ("mood", "stress", "sleep")
+
+ROUTER = Router()
+
+
+class Result:
+    """What a command produced: reply ``text``, structured ``data``, ``mutations`` to persist."""
+
+    __slots__ = ("text", "data", "mutations", "quit")
+
+    def __init__(self, text="", data=None, mutations=(), quit=False):
+        self.text = text
+        self.data = data or {}
+        self.mutations = list(mutations)
+        self.quit = quit
+
+    def __repr__(self):
+        return f"Result({self.text!r}, mutations={len(self.mutations)})"
+
+
+CRISIS_MATCHER = MATCHERS["command"]  # the command engine's phrases (see psychbot.guard)
+
+
+def risk_screen(text):
+    return CRISIS_MATCHER.is_risky(text)
+
+
+def iso_minutes(now):
+    return now.isoformat(timespec="minutes")
+
+
+def kv_args(args, keys):
+    """Parse ``k=v`` args (or bare values in ``keys`` order) into a dict."""
+    out, pos = {}, iter(keys)
+    for a in args:
+        k, sep, v = a.partition("=")
+        if sep:
+            out[k.lower()] = v
+        else:
+            out[next(pos, "_")] = a
+    return out
+
+
+# --- Reframe cards ------------------------------------------------------------
+def guess_distortion(text):
+    """Primary (first-listed) distortion; CLASSIFIER.labels() has all of them."""
+    labels = CLASSIFIER.labels(text)
+    return labels[0] if labels else "unknown"
+
+
+def reframe_thought(thought, now=None):
+    """Return a structured CBT-style reframe."""
+    labels = CLASSIFIER.labels(thought)
+    distortion = labels[0] if labels else "unknown"
+    return {
+        "ts": iso_minutes(now or dt.datetime.now()),
+        "input": thought,
+        "distortion": distortion,
+        "also": labels[1:],
+        "cues": CLASSIFIER.triggers(thought),
+        "reframe": ALT_VIEWS[distortion],
+        "prompts": PROMPTS,
+    }
+
+
+# --- Handlers -----------------------------------------------------------------
+@ROUTER.command("/help", aliases=("/?",), hidden=True)
+def help_(state, args, now):
+    return Result(
+        "🧭 Psych Bot — Command Edition\n"
+        + "\n".join(ROUTER.help_lines()) + "\n"
+        "Note: I’m a wellness copilot, not a therapist. Crisis? Call **911** or text **988**."
+    )
+
+
+@ROUTER.command("/checkin", usage="/checkin [mood=3 stress=2 sleep=7]",
+                help="quick mood/stress/sleep capture",
+                hint="Usage: /checkin mood=<1–5> stress=<1–5> sleep=<hours> [note=...]",
+                params={"mood": int, "stress": int, "sleep": float, "note": str},
+                required=CHECKIN_FIELDS)
+def checkin(state, args, now):
+    entry = {"ts": iso_minutes(now), "mood": args["mood"], "stress": args["stress"],
+             "sleep": args["sleep"]}
+    if args.get("note"):
+        entry["note"] = args["note"]
+    muts = [{"op": "add", "coll": "check_ins", "item": entry}]
+    muts += aggregates.checkin_mutations(entry)
+    # streak and weekly rollover from the activity calendar
+    day, cal = activity.day_number(entry["ts"]), activity.calendar(state)
+    muts += activity.mark_mutations(cal, day)
+    score = activity.roll_week(state["system_score"], day)
+    score["streak_days"] = cal.current_streak(day)
+    muts.append({"op": "set", "key": "system_score", "value": score})
+    return Result(f"Logged ✅  mood={entry['mood']}, stress={entry['stress']}, sleep={entry['sleep']:g}h",
+                  {"checkin": entry}, muts)
+
+
+@ROUTER.command("/reframe", usage="/reframe <thought>", help="spot distortion & get a reframe card",
+                min_args=1, hint="Usage: /reframe <thought>. Example: /reframe No one will hire me.")
+def reframe(state, args, now):
+    thought = " ".join(args).strip()
+    if risk_screen(thought): return Result(CRISIS_MSG, {"crisis": True})
+    card = reframe_thought(thought, now)
+    eid, id_muts = jr.allocate(state)
+    # store as entry
+    entry = {
+        "id": eid,
+        "ts": card["ts"],
+        "trigger": "thought_reframe",
+        "distortion": card["distortion"],
+        "reframe": card["reframe"],
+        "text": thought
+    }
+    muts = [{"op": "add", "coll": "entries", "item": entry}] + id_muts
+    muts += aggregates.entry_mutations(entry)
+    return Result(
+        "🧠 Reframe Card\n"
+        f"• Distortion: **{card['distortion']}**"
+        + (f" (also: {', '.join(card['also'])})" if card["also"] else "") + "\n"
+        + "".join(f"   “{p}” → {l}\n" for p, l in card["cues"])
+        + f"• Balanced view: {card['reframe']}\n"
+        f"• Next step (10 min): {card['prompts']['next_action']}\n"
+        f"• IF-THEN: {card['prompts']['if_then']}",
+        {"card": card}, muts,
+    )
+
+
+@ROUTER.command("/breathe", help="90-sec box-breathing guide")
+def breathe(state, args, now):
+    return Result(
+        "🫁 Box Breathing (90s)\n"
+        "Inhale 4 • Hold 4 • Exhale 4 • Hold 4 — repeat 6 cycles.\n"
+        "Tip: Relax shoulders. Unclench jaw. Notice 5 things you see/hear/feel."
+    )
+
+
+@ROUTER.command("/journal", usage="/journal add|list|search|delete", help="notes vault", min_args=1,
+                hint="Usage: /journal add <text> | /journal list [--before ID --limit N ...] | "
+                     "/journal search <terms> | /journal delete <id>")
+def journal(state, args, now):
+    sub = args[0].lower()
+    entries = state["entries"]
+    if sub == "add":
+        text = " ".join(args[1:]).strip()
+        if not text: return Result("Add what? Example: /journal add Landed interview; felt proud.")
+        if risk_screen(text): return Result(CRISIS_MSG, {"crisis": True})
+        eid, muts = jr.allocate(state)
+        item = {"id": eid, "ts": iso_minutes(now), "text": text}
+        return Result(f"Added journal #{item['id']} ✅", {"entry": item},
+                      [{"op": "add", "coll": "entries", "item": item}] + muts)
+    if sub == "list":
+        try:
+            opts = jr.parse_list_args(args[1:])
+            recent, older = jr.page(entries, **opts)
+        except ValueError as exc:
+            return Result(f"{exc}. Usage: {jr.LIST_USAGE}")
+        if not recent:
+            return Result("No matching entries." if len(args) > 1 else "No journal entries yet.")
+        lines = [f"#{e['id']}  • {e['ts']}  • {entry_text(e)}" for e in recent]
+        if older:
+            lines.append(f"Older: {jr.list_command({**opts, 'before': older})}")
+        return Result("🗒️ Recent entries:\n" + "\n".join(lines), {"entries": recent, "before": older})
+    if sub == "search":
+        if len(args) < 2:
+            return Result("Search for what? Example: /journal search interview tag:work from:2024-01")
+        hits = [e for _, e in search.search(entries, args[1:])]
+        if not hits: return Result("No matching entries.", {"entries": []})
+        lines = [f"#{e['id']}  • {e['ts']}  • {entry_text(e)}" for e in hits]
+        return Result("🔎 Best matches:\n" + "\n".join(lines), {"entries": hits})
+    if sub == "delete":
+        if len(args) < 2: return Result("Usage: /journal delete <id>")
+        try:
+            target = int(args[1])
+        except ValueError:
+            return Result("ID must be a number.")
+        at = jr.find(entries, target)
+        if at is None:
+            return Result("ID not found.", {"deleted": 0})
+        return Result("Deleted ✅", {"deleted": 1}, jr.delete_mutations(state, at, iso_minutes(now)))
+    return Result("Unknown subcommand. Use: add | list | search | delete")
+
+
+@ROUTER.command("/review", help="weekly wins/lessons")
+def review(state, args, now):
+    # weekly slice: last 7 calendar days from the per-day buckets
+    n_checks, avg_mood, avg_stress, avg_sleep = aggregates.window(state, 7, now.date())
+    cal, today = activity.calendar(state), activity.day_number(now)
+    streak, best = cal.current_streak(today), cal.longest_streak()
+    active = cal.count(activity.week_start(today), today)
+    if not n_checks:
+        return Result("No check-ins this week. Try /checkin to start a streak.")
+    # simple “System Score”
+    score = round(max(0, min(100, 20*avg_mood - 10*avg_stress + 5*avg_sleep)))
+    top = aggregates.top_distortions(state)
+    scanned = 7 + len(state[aggregates.AGG_KEY]["distortions"])  # day buckets + distortion counters
+    return Result(
+        "📊 Weekly Review\n"
+        f"• Check-ins: {n_checks}\n"
+        f"• Avg mood: {avg_mood:.1f}  |  Avg stress: {avg_stress:.1f}  |  Avg sleep: {avg_sleep:.1f}h\n"
+        f"• System Score: **{score} / 100**\n"
+        f"• Streak: {streak} day{'s' if streak != 1 else ''} (best {best})  |  Active this week: {active}/7\n"
+        + "".join(f"• Top thinking trap: {label} ×{n}\n" for label, n in top)
+        + "Next: Log a small win in /journal, then run /reframe on anything sticky.",
+        {"checkins": n_checks, "mood": avg_mood, "stress": avg_stress, "sleep": avg_sleep,
+         "score": score, "top_distortions": top, "scanned": scanned,
+         "streak": streak, "best_streak": best, "active_days": active},
+        [{"op": "set", "key": "system_score",
+          "value": {**activity.roll_week(state["system_score"], today), "weekly": score, "streak_days": streak}}],
+    )
+
+
+@ROUTER.command("/trends", usage="/trends [--from DATE] [--to DATE]",
+                help="rolling averages, sleep/stress links, weekday patterns, unusual days")
+def trends_(state, args, now):
+    _, since, until, _ = parse_export_args(args)
+    try:
+        since, until = (since and dt.date.fromisoformat(since)), (until and dt.date.fromisoformat(until))
+    except ValueError:
+        return Result("Usage: /trends [--from YYYY-MM-DD] [--to YYYY-MM-DD]")
+    report = trends.analyze(state["check_ins"], now.date(), since=since, until=until)
+    return Result(trends.render(report), report)
+
+
+@ROUTER.command("/timer", usage="/timer [minutes what | cancel ID]", help="reminders that survive restarts",
+                hint="Usage: /timer 10 send the email | /timer (list) | /timer cancel <id>")
+def timer(state, args, now):
+    if not args:
+        rows = timers.pending(state)
+        if not rows: return Result("No timers set. Example: /timer 10 tidy the desk", {"timers": []})
+        lines = [f"#{t['id']}  • {timers.local_time(t)}  • {t['text']}" for t in rows]
+        return Result("⏰ Timers:\n" + "\n".join(lines), {"timers": rows})
+    if args[0].lower() == "cancel":
+        try:
+            muts = timers.cancel(state, int(args[1]))
+        except (IndexError, ValueError):
+            return Result("Usage: /timer cancel <id>")
+        if muts is None: return Result("Timer not found.", {"cancelled": 0})
+        return Result("Timer cancelled ✅", {"cancelled": 1}, muts)
+    try:
+        minutes = float(args[0])
+    except ValueError:
+        return Result("Usage: /timer <minutes> [what]. Example: /timer 10 send the email")
+    if not 1 / 60 <= minutes <= 24 * 60:  # timers keep whole seconds
+        return Result("Pick a length of at least 1 second (0.017 min) and up to 1440 minutes (24h).")
+    what = " ".join(args[1:]).strip()
+    if risk_screen(what): return Result(CRISIS_MSG, {"crisis": True})
+    text = f"⏰ {minutes:g} min are up" + (f": {what}" if what else ".")
+    muts = timers.schedule(state, now, [(minutes * 60, "action", text, {})])
+    return Result(f"Timer set for {minutes:g} min ✅  I’ll remind you here.", {"timer": muts[0]["item"]}, muts)
+
+
+@ROUTER.command("/stats", help="command latency, save sizes and review cost since start")
+def stats(state, args, now):
+    return Result(METRICS.render(), METRICS.snapshot())
+
+
+@ROUTER.command("/quit", aliases=("/exit",), hidden=True)
+def quit_(state, args, now):
+    return Result(quit=True)
+
+
+def execute(call, state, now=None):
+    """Check ``call`` against its command's schema and run the handler."""
+    if call.command is None:
+        near = ROUTER.candidates(call.word) if call.word else []
+        return Result(f"Did you mean: {', '.join(near)}?" if near else "Unknown. Try /help")
+    try:
+        args = call.command.bind(call.args)
+    except ArgError as exc:
+        return Result(str(exc))
+    return call.command.handler(state, args, now or dt.datetime.now())
+
+
+def run(line, state, now=None):
+    """Parse and run one command line."""
+    return execute(ROUTER.parse(line), state, now)
@@ -0,0 +1,63 @@
+"""
+Distortion classifier — every matching label, with the phrase and span that hit.
+
+The cue table is built once: cues are lower-cased and de-duplicated across
+labels (a cue such as "ruined" that belongs to two labels is scanned once and
+reported for both). Each text is lower-cased once and scanned per distinct cue
+with ``str.find``, which yields every (overlapping) occurrence with its span.
+
+Why not a pure-Python Aho–Corasick automaton: with the few dozen cues we
+carry, CPython's per-character loop is ~7x slower than the C substring
+search (see benchmarks/bench_distortion.py), so we keep the prebuilt table
+and let ``str.find`` do the scanning.
+"""
+
+from collections import Counter, namedtuple
+
+Hit = namedtuple("Hit", "label cue start end")
+
+
+class DistortionClassifier:
+    """Prebuilt cue → labels table for one ``DISTORTIONS`` mapping."""
+
+    def __init__(self, distortions):
+        self.order = list(distortions)
+        self.cue_labels = {}
+        for label, cues in distortions.items():
+            for cue in cues:
+                self.cue_labels.setdefault(cue.lower(), []).append(label)
+
+    def scan(self, text):
+        """All hits in text order."""
+        low = (text or "").lower()
+        hits = []
+        for cue, labels in self.cue_labels.items():
+            i = low.find(cue)
+            while i != -1:
+                hits.extend(Hit(label, cue, i, i + len(cue)) for label in labels)
+                i = low.find(cue, i + 1)
+        hits.sort(key=lambda h: (h.start, -h.end))
+        return hits
+
+    def counts(self, text):
+        """``Counter`` of label → number of cue hits."""
+        return Counter(h.label for h in self.scan(text))
+
+    def labels(self, text):
+        """Matched labels in ``DISTORTIONS`` order."""
+        low = (text or "").lower()
+        found = set()
+        for cue, labels in self.cue_labels.items():
+            if not found.issuperset(labels) and cue in low:
+                found.update(labels)
+        return [l for l in self.order if l in found]
+
+    def classify_many(self, texts):
+        return [self.labels(t) for t in texts]
+
+    def triggers(self, text):
+        """``[(phrase as written, "label[, label]"), ...]`` for showing what fired."""
+        spans = {}
+        for h in self.scan(text):
+            spans.setdefault((h.start, h.end), []).append(h.label)
+        return [(text[a:b], ", ".join(labels)) for (a, b), labels in spans.items()]
@@ -0,0 +1,106 @@
+"""
+Group commit: how often a store's writes actually reach the disk.
+
+    --durability=strict    every command is written and fsynced before its reply
+    --durability=batched   commands are grouped; one write per MAX_PENDING commands
+                           or MAX_DELAY seconds, whichever comes first (default)
+    --durability=exit      one write when the session ends (Ctrl+C, /quit, EOF)
+
+(or ``PSYCHBOT_DURABILITY``). Grouping rides on ``store.batch()``: the
+scheduler keeps one batch open across commands and closes it to commit,
+so N commands cost one append + one flush instead of N. An open batch
+holds the store's write lock, so other processes sharing the file wait for
+at most one commit window; use ``strict`` when several writers are busy.
+"""
+
+import atexit, os, threading, time
+from contextlib import ExitStack, contextmanager, nullcontext
+
+MODES = ("strict", "batched", "exit")
+MAX_PENDING = 64
+MAX_DELAY = 1.0  # seconds
+
+
+def durability_arg(argv, default=None):
+    """``--durability=MODE`` / ``--durability MODE`` from argv, else the env, else ``default``."""
+    mode = None
+    for i, a in enumerate(argv):
+        if a.startswith("--durability="):
+            mode = a.split("=", 1)[1]
+        elif a == "--durability" and i + 1 < len(argv):
+            mode = argv[i + 1]
+    mode = (mode or os.environ.get("PSYCHBOT_DURABILITY") or default or "batched").lower()
+    if mode not in MODES:
+        raise ValueError(f"unknown durability {mode!r} (use {' | '.join(MODES)})")
+    return mode
+
+
+class CommitScheduler:
+    """Decides when one store's pending writes are committed.
+
+    Wrap each command in ``command()``; call ``commit()`` (or ``close()``)
+    to force pending work out. In ``batched`` mode a timer thread commits
+    an idle window, so a quiet REPL still persists within MAX_DELAY.
+    """
+
+    def __init__(self, store, mode="batched", max_pending=MAX_PENDING, max_delay=MAX_DELAY):
+        self.store = store
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self._mutex = threading.RLock()
+        self._open = None      # ExitStack holding store.batch() while a window is open
+        self._since = 0.0
+        self._count = 0
+        self._timer = None
+        self.commits = 0
+        self.set_mode(mode)
+        atexit.register(self.commit)
+
+    @contextmanager
+    def command(self):
+        """Run one command's reads and writes inside the current commit window."""
+        with self._mutex:
+            if self.mode == "strict":
+                with self.store.batch():
+                    yield
+                self.commits += 1
+                return
+            if self._open is None:
+                self._open = ExitStack()
+                self._open.enter_context(self.store.batch())
+                self._since = time.monotonic()
+                self._count = 0
+            yield
+            self._count += 1
+            if self.mode == "batched":
+                if self._count >= self.max_pending or time.monotonic() - self._since >= self.max_delay:
+                    self.commit()
+                elif self._timer is None:
+                    self._timer = threading.Timer(self.max_delay, self.commit)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def set_mode(self, mode):
+        if mode not in MODES:
+            raise ValueError(f"unknown durability {mode!r}")
+        self.commit()
+        self.mode = mode
+        self.store.fsync = mode == "strict"
+
+    def batch(self):
+        """Context for a whole batch run: ``exit`` mode commits once, at the end."""
+        return self.store.batch() if self.mode == "exit" else nullcontext()
+
+    def commit(self):
+        with self._mutex:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._open is not None:
+                stack, self._open = self._open, None
+                stack.close()  # ends the batch: one flush (and compaction if due)
+                self.commits += 1
+
+    def close(self):
+        self.commit()
+        atexit.unregister(self.commit)
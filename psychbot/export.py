@@ -0,0 +1,161 @@
+"""
+Streaming exporters. Rows are generated and written one at a time, so an
+export never holds more than one record in memory on top of the db itself.
+
+Every format shares one flat row schema (ROW_FIELDS) for check-ins and
+entries; fields that don't apply are left empty.
+
+Formats:
+  json      {"check_ins": [rows], "entries": [rows], "system_score": {...}}, one row per line
+  csv       ROW_FIELDS, one row per check-in/entry
+  ndjson    ROW_FIELDS as one JSON object per line (fastest to parse back)
+  columnar  typed binary columns, see psychbot.columnar (alias: col)
+
+Options understood by parse_export_args():
+  json|csv|ndjson|columnar [--since DATE] [--until DATE] [--gzip]
+DATE is an ISO date or datetime prefix; both bounds are inclusive.
+"""
+
+import csv, gzip, json
+
+from psychbot.checkins import jsonable
+from psychbot.store import entry_kind, is_live, segments
+
+FORMATS = {"json": "json", "csv": "csv", "ndjson": "ndjson", "columnar": "pbcol"}
+ALIASES = {"col": "columnar", "jsonl": "ndjson"}
+ROW_FIELDS = ("type", "ts", "mood", "stress", "sleep", "note",
+              "kind", "text", "distortion", "reframe", "action", "result", "tags")
+
+
+def in_range(ts, since=None, until=None):
+    ts = ts or ""
+    if since and ts < since:
+        return False
+    if until and ts[:len(until)] > until:
+        return False
+    return True
+
+
+def checkin_row(c):
+    return {"type": "checkin", "ts": c["ts"], "mood": c["mood"], "stress": c["stress"],
+            "sleep": c.get("sleep", ""), "note": c.get("note", "")}
+
+
+def entry_row(e):
+    d = e.get("distortion", "")
+    result = e.get("result", "")
+    if result == "" and "done" in e:
+        result = "done" if e["done"] else ""
+    return {"type": "entry", "ts": e.get("ts", ""), "kind": entry_kind(e),
+            "text": e.get("text") or e.get("journal") or e.get("trigger", ""),
+            "distortion": d if isinstance(d, str) else ",".join(d),
+            "reframe": e.get("reframe", ""), "action": e.get("action", ""),
+            "result": result, "tags": " ".join(e.get("tags", []))}
+
+
+def checkin_rows(db, since=None, until=None):
+    for *_, load in segments(db.get("check_ins", ()), since, until):
+        for c in load():
+            if in_range(c["ts"], since, until):
+                yield checkin_row(c)
+
+
+def entry_rows(db, since=None, until=None):
+    for *_, load in segments(db.get("entries", ()), since, until):
+        for e in load():
+            if is_live(e) and in_range(e.get("ts"), since, until):
+                yield entry_row(e)
+
+
+def iter_rows(db, since=None, until=None):
+    """Check-in rows, then entry rows, in the shared schema."""
+    yield from checkin_rows(db, since, until)
+    yield from entry_rows(db, since, until)
+
+
+def open_text(path, gz=False):
+    if gz:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def write_csv(fh, rows):
+    w = csv.DictWriter(fh, fieldnames=ROW_FIELDS, restval="")
+    w.writeheader()
+    n = 0
+    for n, row in enumerate(rows, 1):
+        w.writerow(row)
+    return n
+
+
+def write_ndjson(fh, rows):
+    n = 0
+    for n, row in enumerate(rows, 1):
+        fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return n
+
+
+def iter_ndjson(fh):
+    for line in fh:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_json(fh, db, since=None, until=None):
+    """Write the user's data as one JSON object, one row per line.
+
+    Check-ins and entries are ROW_FIELDS rows, as in csv/ndjson, plus the
+    ``system_score``. Internal bookkeeping (aggregates, journal_meta,
+    timers, ...) and deleted entries are left out.
+    """
+    n = 0
+    fh.write("{")
+    for key, rows in (("check_ins", checkin_rows(db, since, until)), ("entries", entry_rows(db, since, until))):
+        fh.write(("\n  " if key == "check_ins" else ",\n  ") + json.dumps(key) + ": [")
+        first = True
+        for row in rows:
+            fh.write(("\n    " if first else ",\n    ") + json.dumps(row, ensure_ascii=False, default=jsonable))
+            first = False
+            n += 1
+        fh.write("]" if first else "\n  ]")
+    fh.write(',\n  "system_score": ' + json.dumps(db.get("system_score", {}), default=jsonable) + "\n}\n")
+    return n
+
+
+def parse_export_args(tokens, default_kind=""):
+    """``(kind, since, until, gzip)`` from ``["csv", "--since", "2024-01-01", ...]``."""
+    kind, since, until, gz = default_kind, None, None, False
+    it = iter(tokens)
+    for tok in it:
+        if tok in ("--since", "--from"):
+            since = next(it, None)
+        elif tok in ("--until", "--to"):
+            until = next(it, None)
+        elif tok in ("--gzip", "--gz"):
+            gz = True
+        elif not tok.startswith("--"):
+            kind = ALIASES.get(tok.lower(), tok.lower())
+    return kind, since, until, gz
+
+
+def export(db, kind, path, since=None, until=None, gz=False):
+    """Stream ``db`` to ``path`` (``.gz`` appended when gz). Returns (path, records).
+
+    ``path`` should carry the extension from FORMATS[kind].
+    """
+    if kind not in FORMATS:
+        raise ValueError(f"unknown export format: {kind!r}")
+    if gz:
+        path = path.with_name(path.name + ".gz")
+    if kind == "columnar":
+        from psychbot.columnar import write_columnar
+        with (gzip.open(path, "wb") if gz else open(path, "wb")) as fh:
+            return path, write_columnar(fh, db, since, until)
+    with open_text(path, gz) as fh:
+        if kind == "json":
+            n = write_json(fh, db, since, until)
+        elif kind == "csv":
+            n = write_csv(fh, iter_rows(db, since, until))
+        else:
+            n = write_ndjson(fh, iter_rows(db, since, until))
+    return path, n
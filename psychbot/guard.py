@@ -0,0 +1,89 @@
+"""
+Crisis guardrails — one precompiled matcher shared by every edition.
+
+Each edition keeps the phrases it has always watched for (EDITION_PATTERNS),
+compiled once at import into its own CrisisMatcher; MATCHER screens for the
+union. A set's phrases are folded into a single alternation regex (one named
+group per category, shared word-boundary anchors, and a first-letter
+lookahead so the regex engine skips most positions cheaply). A screen is one linear pass over
+the text no matter how many phrases we watch for.
+"""
+
+import bisect, re
+from itertools import accumulate
+
+# Phrase fragments per category and edition. Each is matched as whole words, case-insensitively.
+EDITION_PATTERNS = {
+    "classic": {
+        "self_harm": [r"suicide", r"kill myself", r"self[- ]?harm", r"hurt myself", r"no reason to live"],
+        "harm_others": [r"hurt someone"],
+    },
+    "casual": {
+        "self_harm": [r"suicide", r"kill myself", r"end it", r"self[- ]harm", r"hurt myself"],
+        "harm_others": [r"kill them", r"hurt someone", r"harm others"],
+    },
+    "command": {
+        "self_harm": [r"suicide", r"kill myself", r"self[- ]harm", r"hurt myself", r"no reason to live"],
+        "harm_others": [r"hurt someone"],
+    },
+}
+
+
+def _union(pattern_sets):
+    out = {}
+    for patterns in pattern_sets:
+        for cat, frags in patterns.items():
+            have = out.setdefault(cat, [])
+            have += [f for f in frags if f not in have]
+    return out
+
+
+CRISIS_PATTERNS = _union(EDITION_PATTERNS.values())  # the default screen, e.g. for benchmarks
+
+
+class CrisisMatcher:
+    """Compiled multi-category phrase matcher."""
+
+    def __init__(self, patterns):
+        self.categories_order = list(patterns)
+        groups = "|".join(f"(?P<{cat}>{'|'.join(frags)})" for cat, frags in patterns.items())
+        firsts = {f[0] for frags in patterns.values() for f in frags}
+        lookahead = f"(?=[{''.join(sorted(firsts))}])" if all(c.isalpha() for c in firsts) else ""
+        self.regex = re.compile(rf"{lookahead}\b(?:{groups})\b", re.IGNORECASE)
+
+    def matches(self, text):
+        """Every hit as ``(category, start, end)``."""
+        return [(m.lastgroup, m.start(), m.end()) for m in self.regex.finditer(text or "")]
+
+    def categories(self, text):
+        """Matched categories in declaration order (empty list = safe)."""
+        found = {m.lastgroup for m in self.regex.finditer(text or "")}
+        return [c for c in self.categories_order if c in found]
+
+    def is_risky(self, text):
+        return bool(text) and self.regex.search(text) is not None
+
+    def screen_many(self, texts):
+        """Categories for each text, computed in one pass over the joined batch."""
+        texts = [t or "" for t in texts]
+        starts = list(accumulate((len(t) + 1 for t in texts[:-1]), initial=0))
+        found = {}
+        for m in self.regex.finditer("\n".join(texts)):
+            found.setdefault(bisect.bisect_right(starts, m.start()) - 1, set()).add(m.lastgroup)
+        out = [[] for _ in texts]
+        for i, cats in found.items():
+            out[i] = [c for c in self.categories_order if c in cats]
+        return out
+
+
+MATCHER = CrisisMatcher(CRISIS_PATTERNS)
+MATCHERS = {name: CrisisMatcher(p) for name, p in EDITION_PATTERNS.items()}
+
+
+def screen(text, edition=None):
+    """Matched crisis categories for ``text`` (empty list if none), with ``edition``'s phrases."""
+    return (MATCHERS[edition] if edition else MATCHER).categories(text)
+
+
+def screen_many(texts, edition=None):
+    return (MATCHERS[edition] if edition else MATCHER).screen_many(texts)
@@ -0,0 +1,165 @@
+"""
+Bulk importer for the shapes /export writes (csv or ndjson, optionally .gz).
+
+Rows are read lazily and handled in chunks: each chunk is validated, crisis
+screened in one pass (guard.screen_many), de-duplicated against everything
+already stored on (ts, kind, text hash), then appended with one bulk store
+write. Memory stays bounded by the chunk size plus an 8-byte key per known
+record.
+"""
+
+import csv, datetime as dt, gzip, hashlib, io
+from itertools import islice
+from pathlib import Path
+
+from psychbot.export import iter_ndjson
+from psychbot.guard import screen_many
+from psychbot.store import entry_kind, is_live
+
+CHUNK = 5_000
+MAX_ERRORS = 5
+
+
+class ImportReport:
+    def __init__(self):
+        self.added = self.duplicates = self.invalid = self.flagged = 0
+        self.errors = []  # first few "row N: reason" strings
+
+    def reject(self, n, reason):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"row {n}: {reason}")
+
+    def summary(self):
+        return (f"{self.added} added, {self.duplicates} duplicates skipped, "
+                f"{self.invalid} invalid, {self.flagged} crisis-flagged")
+
+
+def record_key(ts, kind, text):
+    h = hashlib.blake2b(f"{ts}\x1f{kind}\x1f{text}".encode("utf-8"), digest_size=8)
+    return int.from_bytes(h.digest(), "little")
+
+
+def checkin_text(c):
+    return f"{c['mood']}|{c['stress']}|{c.get('sleep')}|{c.get('note', '')}"
+
+
+def entry_text(e):
+    return e.get("text") or e.get("journal") or e.get("trigger", "")
+
+
+def known_keys(db):
+    keys = {record_key(c["ts"], "checkin", checkin_text(c)) for c in db.get("check_ins", ())}
+    keys.update(record_key(e.get("ts", ""), entry_kind(e), entry_text(e)) for e in db.get("entries", ()) if is_live(e))
+    return keys
+
+
+def default_entry(row):
+    """Export row → entry in the Command Edition shape."""
+    e = {"ts": row["ts"], "text": row.get("text", "")}
+    if row.get("kind") == "reframe":
+        e.update(trigger="thought_reframe", distortion=row.get("distortion", ""),
+                 reframe=row.get("reframe", ""))
+    for k in ("action", "result"):
+        if row.get(k):
+            e[k] = row[k]
+    if row.get("tags"):
+        e["tags"] = row["tags"].split()
+    return e
+
+
+def iter_file_rows(path):
+    """Rows from a .csv / .ndjson / .jsonl file, transparently gunzipped."""
+    path = Path(path)
+    name = path.name[:-3] if path.name.endswith(".gz") else path.name
+    raw = gzip.open(path, "rb") if path.name.endswith(".gz") else open(path, "rb")
+    with io.TextIOWrapper(raw, encoding="utf-8", newline="") as fh:
+        if name.endswith(".csv"):
+            yield from csv.DictReader(fh)
+        elif name.endswith((".ndjson", ".jsonl")):
+            yield from iter_ndjson(fh)
+        else:
+            raise ValueError("import expects a .csv or .ndjson file")
+
+
+def _check_ts(ts):
+    """Accept the timestamps the editions write: naive ISO, or UTC with a trailing "Z"."""
+    if not ts:
+        raise ValueError("missing ts")
+    try:
+        t = dt.datetime.fromisoformat(ts[:-1] if ts.endswith("Z") else ts)
+    except ValueError:
+        raise ValueError(f"bad ts {ts!r}") from None
+    if t.tzinfo is not None:
+        raise ValueError(f"ts {ts!r} has a UTC offset (use local time or a trailing Z)")
+
+
+def _parse_checkin(row):
+    mood, stress = int(row["mood"]), int(row["stress"])
+    sleep = None if row.get("sleep") in (None, "") else float(row["sleep"])  # not recorded
+    if not (1 <= mood <= 5 and 1 <= stress <= 5 and (sleep is None or 0 <= sleep <= 24)):
+        raise ValueError("mood/stress must be 1–5 and sleep 0–24h")
+    c = {"ts": row["ts"], "mood": mood, "stress": stress}
+    if sleep is not None:
+        c["sleep"] = sleep
+    if row.get("note"):
+        c["note"] = row["note"]
+    return c
+
+
+def import_rows(db, store, rows, entry_factory=default_entry, chunk=CHUNK, new_id=None, edition=None):
+    """Import an iterable of export rows into ``db`` through ``store``.
+
+    ``new_id()``, if given, numbers each entry once it has passed validation
+    and de-duplication, so rejected rows don't use up ids. ``edition`` picks
+    the crisis phrases rows are flagged with (see psychbot.guard).
+    """
+    report = ImportReport()
+    seen = known_keys(db)
+    rows = enumerate(rows, 1)
+    with store.batch():  # each chunk is committed by flush(); compaction waits for the end
+        while True:
+            batch = list(islice(rows, chunk))
+            if not batch:
+                break
+            _import_chunk(db, store, batch, entry_factory, new_id, edition, seen, report)
+            store.flush()
+    return report
+
+
+def _import_chunk(db, store, batch, entry_factory, new_id, edition, seen, report):
+    check_ins, entries, texts = [], [], []
+    for n, row in batch:
+        try:
+            _check_ts(row.get("ts"))
+            if row.get("type") == "checkin":
+                rec = _parse_checkin(row)
+                key = record_key(rec["ts"], "checkin", checkin_text(rec))
+                target, text = check_ins, rec.get("note", "")
+            elif row.get("type") == "entry":
+                rec = entry_factory(row)
+                key = record_key(rec["ts"], entry_kind(rec), entry_text(rec))
+                target, text = entries, entry_text(rec)
+            else:
+                raise ValueError(f"unknown type {row.get('type')!r}")
+        except (KeyError, TypeError, ValueError) as exc:
+            report.reject(n, exc)
+            continue
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        if new_id is not None and target is entries:
+            rec = {"id": new_id(), **rec}
+        target.append(rec)
+        texts.append(text)
+    report.flagged += sum(1 for cats in screen_many(texts, edition) if cats)
+    if check_ins:
+        store.extend(db, "check_ins", check_ins)
+    if entries:
+        store.extend(db, "entries", entries)
+    report.added += len(check_ins) + len(entries)
+
+
+def import_file(db, store, path, **kw):
+    return import_rows(db, store, iter_file_rows(path), **kw)
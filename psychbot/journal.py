@@ -0,0 +1,284 @@
+"""
+Journal entry ids: stable allocation, an id → position index, tombstone
+deletes, and a time-ordered index for paging (/journal list).
+
+Ids come from a counter kept in the data file (db["journal_meta"]), so they
+are never reused and stay valid across sessions. Deleting an entry patches
+a tombstone onto it in place (one O(1) log record) instead of shifting the
+list; tombstones are purged in one pass once they outnumber the live
+entries, which keeps deletes amortized O(1), and every compaction drops
+them too (store.purge_deleted), so deleted text doesn't outlive the next
+snapshot.
+
+    db["journal_meta"] = {"next_id": 42, "dead": 3}
+
+Paging walks a (ts, id)-sorted key list: bisect to the cursor or date
+bound, then step back one entry at a time, so a page costs O(log n + page)
+however deep into the history it is. Partitioned histories (see
+psychbot.partitions) get one index per archived month, built only for the
+months a lookup or page actually reaches.
+
+The pure helpers return mutation dicts like psychbot.core handlers do.
+"""
+
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from psychbot import aggregates
+from psychbot.store import entry_kind, entry_tags, is_live, segments
+
+META_KEY = "journal_meta"
+PURGE_MIN = 64  # never purge for fewer tombstones than this
+
+
+def ensure(db, store):
+    """One-time upgrade: unique ids on every entry plus the meta counter.
+
+    Older data has entries without ids (classic/casual editions) or with
+    ids reused after a delete (``len(entries)+1``); later duplicates get
+    fresh ids.
+    """
+    if META_KEY in db:
+        return db[META_KEY]
+    entries = db.get("entries", [])
+    seen, fix = set(), []
+    top = max((e["id"] for e in entries if isinstance(e.get("id"), int)), default=0)
+    for i, e in enumerate(entries):
+        eid = e.get("id")
+        if not isinstance(eid, int) or eid in seen:
+            top += 1
+            fix.append((i, top))
+            eid = top
+        seen.add(eid)
+    meta = {"next_id": top + 1, "dead": sum(1 for e in entries if not is_live(e))}
+    with store.batch():
+        for i, eid in fix:
+            store.patch(db, "entries", i, {"id": eid})
+        store.set(db, META_KEY, meta)
+    return meta
+
+
+def meta(db):
+    m = db.get(META_KEY)
+    if m is None:  # not ensured yet (e.g. a bare dict in a test): derive it
+        ids = [e["id"] for e in db.get("entries", ()) if isinstance(e.get("id"), int)]
+        m = {"next_id": max(ids, default=0) + 1, "dead": 0}
+    return m
+
+
+def allocate(db, n=1):
+    """``(first_id, mutations)`` reserving ``n`` consecutive ids."""
+    m = meta(db)
+    first = m["next_id"]
+    return first, [{"op": "set", "key": META_KEY, "value": {**m, "next_id": first + n}}]
+
+
+# --- Id index -------------------------------------------------------------------
+class _IdIndex:
+    __slots__ = ("entries", "pos", "n", "last")
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.pos = {}
+        self.n = 0
+        self.extend()
+
+    def extend(self):
+        entries, pos = self.entries, self.pos
+        for i in range(self.n, len(entries)):
+            eid = entries[i].get("id")
+            if eid is not None:
+                pos[eid] = i
+        self.n, self.last = len(entries), _last_id(entries)
+
+
+_INDEXES = OrderedDict()  # id(list) -> _IdIndex, a few recent entry lists (one per workspace)
+_TIMES = OrderedDict()    # id(list) -> _TimeIndex
+_MAX_INDEXES = 64
+
+
+def _last_id(entries):
+    return entries[-1].get("id") if entries else None
+
+
+def _cached(cache, cls, entries):
+    """The index for ``entries``, extended by appends or rebuilt if the list was purged.
+
+    A purge followed by as many appends leaves the length unchanged, so the
+    id of the entry at the old end is checked too (ids are never reused).
+    """
+    key = id(entries)
+    idx = cache.get(key)
+    if (idx is None or idx.entries is not entries or len(entries) < idx.n
+            or (idx.n and entries[idx.n - 1].get("id") != idx.last)):
+        idx = cache[key] = cls(entries)
+        if len(cache) > _MAX_INDEXES:
+            cache.popitem(last=False)
+    elif len(entries) > idx.n:
+        idx.extend()  # appends since last time
+    cache.move_to_end(key)
+    return idx
+
+
+def _index(entries):
+    return _cached(_INDEXES, _IdIndex, entries)
+
+
+def find(entries, entry_id, deleted=False):
+    """Position of the live (or, with ``deleted``, any) entry with ``entry_id``, or None. O(1) amortized."""
+    for start, _, _, load in reversed(segments(entries, entry_id=entry_id)):  # newest first
+        i = _find_in(load(), entry_id, deleted)
+        if i is not None:
+            return start + i
+    return None
+
+
+def _find_in(entries, entry_id, deleted=False):
+    idx = _index(entries)
+    i = idx.pos.get(entry_id)
+    if i is None or i >= len(entries) or entries[i].get("id") != entry_id:
+        # positions moved under us (a positional delete); rebuild once
+        idx = _INDEXES[id(entries)] = _IdIndex(entries)
+        i = idx.pos.get(entry_id)
+        if i is None:
+            return None
+    return i if deleted or is_live(entries[i]) else None
+
+
+# --- Deletes ----------------------------------------------------------------------
+def delete_mutations(db, at, ts):
+    """Tombstone the entry at position ``at``; purge if tombstones now dominate."""
+    entries = db["entries"]
+    gone = entries[at]
+    m = meta(db)
+    dead = m["dead"] + 1
+    muts = [{"op": "patch", "coll": "entries", "at": at, "fields": {"deleted": ts}}]
+    muts += aggregates.entry_mutations(gone, sign=-1)
+    if dead >= PURGE_MIN and dead > len(entries) - dead:
+        muts.append({"op": "purge", "coll": "entries"})
+        dead = 0
+    muts.append({"op": "set", "key": META_KEY, "value": {**m, "dead": dead}})
+    return muts
+
+
+# --- Time index and paging ------------------------------------------------------
+class _TimeIndex:
+    """Entry keys ``(ts, id)`` in time order, plus each id's ts (for cursors)."""
+
+    __slots__ = ("entries", "keys", "ts_of", "top", "n", "last")
+
+    def __init__(self, entries):
+        self.entries = entries
+        pairs = [(e.get("ts") or "", e["id"]) for e in entries if isinstance(e.get("id"), int)]
+        self.keys = sorted(pairs)
+        self.ts_of = {eid: ts for ts, eid in pairs}
+        self.top = max(self.ts_of, default=0)
+        self.n, self.last = len(entries), _last_id(entries)
+
+    def extend(self):
+        """Add appended entries (ids above ``top``); usually the newest, so an append."""
+        new = []
+        for e in reversed(self.entries):
+            eid = e.get("id")
+            if isinstance(eid, int):
+                if eid <= self.top:
+                    break
+                new.append(e)
+        keys = self.keys
+        for e in reversed(new):
+            key = (e.get("ts") or "", e["id"])
+            if not keys or key > keys[-1]:
+                keys.append(key)
+            else:
+                insort(keys, key)  # back-dated (imported) entry
+            self.ts_of[key[1]] = key[0]
+            self.top = max(self.top, key[1])
+        self.n, self.last = len(self.entries), _last_id(self.entries)
+
+
+LIST_LIMIT = 20
+MAX_LIST_LIMIT = 500
+KINDS = ("journal", "reframe")
+LIST_USAGE = ("/journal list [--before ID] [--limit N] [--kind journal|reframe] [--tag X] "
+              "[--from DATE] [--to DATE]")
+_LIST_FLAGS = {"--before": "before", "--limit": "limit", "--kind": "kind", "--tag": "tag",
+               "--from": "since", "--since": "since", "--to": "until", "--until": "until"}
+
+
+def parse_list_args(args, limit=LIST_LIMIT):
+    """Options for ``page`` from ``--flag value`` / ``--flag=value`` words; ValueError if bad."""
+    opts = {"limit": limit}
+    it = iter(args)
+    for a in it:
+        flag, sep, val = a.partition("=")
+        name = _LIST_FLAGS.get(flag.lower())
+        if name is None:
+            raise ValueError(f"Unknown option {a!r}")
+        if not sep:
+            val = next(it, None)
+            if val is None:
+                raise ValueError(f"{flag} needs a value")
+        opts[name] = val
+    try:
+        if "before" in opts:
+            opts["before"] = int(opts["before"])
+        opts["limit"] = int(opts["limit"])
+    except ValueError:
+        raise ValueError("--before and --limit take numbers") from None
+    if not 0 < opts["limit"] <= MAX_LIST_LIMIT:
+        raise ValueError(f"--limit must be 1–{MAX_LIST_LIMIT}")
+    if "kind" in opts:
+        opts["kind"] = opts["kind"].lower()
+        if opts["kind"] not in KINDS:
+            raise ValueError(f"--kind must be {' or '.join(KINDS)}")
+    if "tag" in opts:
+        opts["tag"] = opts["tag"].lower().lstrip("#")
+    return opts
+
+
+def list_command(opts):
+    """The ``/journal list`` line for ``opts`` (for "older" hints)."""
+    flags = {"before": "--before", "limit": "--limit", "kind": "--kind", "tag": "--tag",
+             "since": "--from", "until": "--to"}
+    return " ".join(["/journal list"] + [f"{flags[k]} {v}" for k, v in opts.items()
+                                         if v is not None and (k != "limit" or v != LIST_LIMIT)])
+
+
+def page(entries, before=None, limit=LIST_LIMIT, kind=None, tag=None, since=None, until=None):
+    """One page of live entries, oldest first, plus the cursor for the next (older) page.
+
+    ``before`` is an entry id: the page ends just before it in time.
+    ``since``/``until`` are inclusive ISO date(time) prefixes.
+    """
+    bound = (until + "\uffff",) if until else None
+    if before is not None:
+        ts = next((t for *_, load in reversed(segments(entries, entry_id=before))
+                   if (t := _cached(_TIMES, _TimeIndex, load()).ts_of.get(before)) is not None), None)
+        if ts is None:
+            raise ValueError(f"No entry #{before}")
+        bound = min(bound, (ts, before)) if bound else (ts, before)
+    # newest piece first (a plain list is the only one); stop once none can make the page.
+    # Look one past the page: a cursor only if an older match really exists, not just tombstones.
+    want = limit + 1
+    pieces = sorted(segments(entries, since, until), key=lambda s: (s[2] is None, s[2] or ""), reverse=True)
+    found = []  # [((ts, id), entry)], newest first
+    for _, _, last, load in pieces:
+        if len(found) >= want and last is not None and last < found[-1][0][0]:
+            break
+        part = load()
+        keys = _cached(_TIMES, _TimeIndex, part).keys
+        lo = bisect_left(keys, (since,)) if since else 0
+        i = bisect_left(keys, bound) if bound else len(keys)
+        got = []
+        while i > lo and len(got) < want:
+            i -= 1
+            at = _find_in(part, keys[i][1])
+            if at is None:
+                continue  # deleted
+            e = part[at]
+            if (kind and entry_kind(e) != kind) or (tag and tag not in entry_tags(e)):
+                continue
+            got.append((keys[i], e))
+        found = sorted(found + got, key=lambda x: x[0], reverse=True)[:want] if found else got
+    out = [e for _, e in reversed(found[:limit])]
+    return out, (out[0]["id"] if len(found) > limit else None)
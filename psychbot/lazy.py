@@ -0,0 +1,50 @@
+"""
+Lazy state: a dict-like proxy that runs its loader on first access.
+
+Commands that never touch data (/help, /breathe) therefore never parse the
+history, and importing the bot has no filesystem side effects.
+"""
+
+from collections.abc import MutableMapping
+
+
+class LazyState(MutableMapping):
+    """Mapping proxy around ``loader()``'s result, loaded on first use."""
+
+    __slots__ = ("_loader", "_data")
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._data = None
+
+    @property
+    def data(self):
+        d = self._data
+        if d is None:
+            d = self._data = self._loader()
+        return d
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def reload(self):
+        self._data = None
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"LazyState({self._data!r})" if self.loaded else "LazyState(<not loaded>)"
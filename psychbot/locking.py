@@ -0,0 +1,110 @@
+"""
+Advisory file locks and crash-safe file replacement.
+
+Several processes (CLI instances, batch runs, a server) may share one data
+file. Writers take an exclusive lock on ``<data file>.lock``; readers take
+a shared one, so reads run concurrently and only wait out an in-flight
+write. Whole-file rewrites go through ``atomic_write``: temp file in the
+same directory, fsync, then ``os.replace``, so a crash leaves either the
+old file or the new one, never a truncated mix.
+
+POSIX uses ``fcntl.flock``; Windows falls back to ``msvcrt.locking``,
+where every lock is exclusive.
+"""
+
+import os, tempfile
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Re-entrant advisory lock on one lock file.
+
+    ``hold(exclusive=False)`` inside ``hold(exclusive=True)`` is a no-op;
+    the reverse upgrades to exclusive for the inner block.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fd = None
+        self._mode = None  # None, "sh" or "ex"
+
+    @contextmanager
+    def hold(self, exclusive=True):
+        prev = self._mode
+        want = "ex" if exclusive else "sh"
+        if prev is None or (want == "ex" and prev == "sh"):
+            self._acquire(want)
+        try:
+            yield self
+        finally:
+            if prev is None:
+                self._release()
+            elif prev != self._mode:
+                self._acquire(prev)  # back down to shared
+
+    def _acquire(self, mode):
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if mode == "ex" else fcntl.LOCK_SH)
+        elif self._mode is None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+        self._mode = mode
+
+    def _release(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        self._mode = None
+
+    def close(self):
+        if self._fd is not None:
+            if self._mode is not None:
+                self._release()
+            os.close(self._fd)
+            self._fd = None
+
+
+def fsync_dir(path):
+    """Make a rename in ``path`` durable (no-op where directories can't be opened)."""
+    with suppress(OSError, AttributeError):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def atomic_write(path, text, encoding="utf-8"):
+    """Replace ``path`` with ``text`` (str or bytes) so readers see the old or new file, never a torn one."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        binary = isinstance(text, bytes)
+        with os.fdopen(fd, "wb" if binary else "w", encoding=None if binary else encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp)
+        raise
+    fsync_dir(path.parent)
@@ -0,0 +1,179 @@
+"""
+Process-wide command metrics: latency histograms, save sizes, review scans.
+
+    /stats                          calls and p50/p95/p99/max latency per command,
+                                    load/save timings, bytes per save, rows per review
+    PSYCHBOT_METRICS=metrics.ndjson append one JSON line per command/load/save
+    PSYCHBOT_PROFILE=1              cProfile each command into PSYCHBOT_PROFILE_DIR
+                                    (default ./profiles), one .prof file per command
+
+Histograms are log-bucketed (four buckets per power of two, so quantiles are
+within ~20%) and never grow with traffic; recording one event is a few dict
+updates, cheap enough to leave on everywhere.
+"""
+
+import cProfile, json, math, os, re, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+
+SUB_BUCKETS = 4  # per power of two
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Counts of positive values in log-spaced buckets, plus count/sum/min/max."""
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, v):
+        self.count += 1
+        self.total += v
+        self.min = min(self.min, v)
+        self.max = max(self.max, v)
+        b = math.floor(math.log2(v) * SUB_BUCKETS) if v > 0 else None
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def quantile(self, q):
+        """Upper edge of the bucket holding the ``q`` quantile (capped at the max seen)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for b in sorted(self.buckets, key=lambda b: -math.inf if b is None else b):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return 0.0 if b is None else min(self.max, 2 ** ((b + 1) / SUB_BUCKETS))
+        return self.max
+
+    def summary(self):
+        return {"count": self.count, "mean": self.total / self.count if self.count else None,
+                "min": self.min if self.count else None, "max": self.max if self.count else None,
+                **{f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES}}
+
+
+class Metrics:
+    """Latency histograms per name (``/review``, ``load``, ``save``) and value
+    histograms per ``(name, field)`` (``("save", "bytes")``)."""
+
+    def __init__(self, sink=None, profile_dir=None):
+        self.latency = {}   # "/review" -> Histogram of seconds
+        self.values = {}    # ("save", "bytes") -> Histogram
+        self.sink = Path(sink) if sink else None
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.started = time.time()
+        self._fh = None
+        self._seq = 0
+        self._mutex = threading.Lock()
+
+    def record(self, kind, name, seconds, **fields):
+        """One finished event; numeric ``fields`` feed the ``(name, field)`` histograms."""
+        with self._mutex:
+            self.latency.setdefault(name, Histogram()).add(seconds)
+            for k, v in fields.items():
+                if isinstance(v, (int, float)) and not isinstance(v, bool):
+                    self.values.setdefault((name, k), Histogram()).add(v)
+            if self.sink:
+                self._emit({"t": round(time.time(), 3), "kind": kind, "name": name,
+                            "ms": round(seconds * 1e3, 3), **fields})
+
+    def observe(self, name, field, value):
+        """A value with no timing of its own (e.g. rows a review read)."""
+        with self._mutex:
+            self.values.setdefault((name, field), Histogram()).add(value)
+
+    @contextmanager
+    def timed(self, kind, name=None):
+        """Time the block; fields put in the yielded dict are recorded with it."""
+        name = name or kind
+        fields = {}
+        t0 = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(kind, name, time.perf_counter() - t0, **fields)
+
+    @contextmanager
+    def command(self, name):
+        """``timed("command", name)``, under cProfile when profiling is on."""
+        with self._profile(name), self.timed("command", name) as fields:
+            yield fields
+
+    @contextmanager
+    def _profile(self, name):
+        if self.profile_dir is None:
+            yield
+            return
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # another profiler is active (e.g. a nested command)
+            yield
+            return
+        try:
+            yield
+        finally:
+            prof.disable()
+            with self._mutex:
+                self._seq += 1
+                seq = self._seq
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            slug = re.sub(r"\W+", "", name) or "unknown"
+            prof.dump_stats(self.profile_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{seq:04d}-{slug}.prof")
+
+    def _emit(self, event):
+        try:
+            if self._fh is None:
+                self.sink.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = open(self.sink, "a", encoding="utf-8")
+            self._fh.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._fh.flush()
+        except OSError:
+            self.sink = None  # metrics must never take a command down with them
+
+    # --- Reporting -------------------------------------------------------------------
+    def snapshot(self):
+        with self._mutex:
+            return {
+                "uptime": time.time() - self.started,
+                "latency": {n: h.summary() for n, h in self.latency.items()},
+                "values": {f"{n} {f}": h.summary() for (n, f), h in self.values.items()},
+            }
+
+    def render(self):
+        snap = self.snapshot()
+        if not snap["latency"]:
+            return "No commands timed yet."
+        lines = [f"⏱️ Stats (since {time.strftime('%H:%M', time.localtime(self.started))})",
+                 f"{'':<16}{'calls':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+        for name, s in sorted(snap["latency"].items(), key=lambda kv: (not kv[0].startswith("/"), kv[0])):
+            lines.append(f"{name:<16}{s['count']:>7}"
+                         + "".join(f"{_ms(s[q]):>10}" for q in ("p50", "p95", "p99", "max")))
+        for key, s in sorted(snap["values"].items()):
+            lines.append(f"• {key}: mean {s['mean']:,.0f} • p95 {s['p95']:,.0f} • max {s['max']:,.0f}")
+        return "\n".join(lines)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def _ms(seconds):
+    if seconds is None:
+        return "—"
+    return f"{seconds * 1e3:.2f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def from_env(env=os.environ):
+    profile = env.get("PSYCHBOT_PROFILE", "").lower() not in ("", "0", "false", "no", "off")
+    return Metrics(env.get("PSYCHBOT_METRICS") or None,
+                   (env.get("PSYCHBOT_PROFILE_DIR") or "profiles") if profile else None)
+
+
+METRICS = from_env()
@@ -0,0 +1,337 @@
+"""
+Month-partitioned JSON storage: a hot snapshot plus compressed cold archives.
+
+    PSYCHBOT_BACKEND=partitioned  [PSYCHBOT_ARCHIVE=gzip|lzma]
+    python -m psychbot.partitions psych_data.json            archive older months now
+    python -m psychbot.partitions --merge psych_data.json    back to one plain file
+
+Everything works as in psychbot.wal (snapshot + append-only log), except
+that compaction moves check-ins and entries dated before the current month
+out of the snapshot into one compressed file per run of a month:
+
+    psych_data.json.archive/entries-2024-05-1830.0.json.gz
+
+The snapshot keeps a manifest of them (count, first/last ts, id range), so
+load() parses only this month, and ``len()``, appends and the newest items
+never open an archive. An archive is read, and then kept in memory, the
+first time something reaches into it: a /journal page further back than
+this month, a search hit, an export, a /trends range or a rollup rebuild
+that covers it (see psychbot.store.segments).
+
+Archives are never modified in place. One whose items changed (a patched
+result, a tombstone, a purge) is written under a new name at the next
+compaction, and files the new snapshot no longer lists are deleted only
+once it is in place, so a crash leaves either the old or the new set.
+"""
+
+import datetime as dt, gzip, json, lzma, os, re, sys, zlib
+from bisect import bisect_right
+from collections.abc import MutableSequence
+from contextlib import suppress
+
+from psychbot.checkins import CheckinLog, jsonable
+from psychbot.locking import atomic_write
+from psychbot.store import ConflictError
+from psychbot.wal import PARTS_KEY, RecordLog
+
+WRAP = {"check_ins": CheckinLog, "entries": list}  # partitioned collections -> in-memory type
+CODECS = {"gzip": (".json.gz", gzip), "lzma": (".json.xz", lzma)}
+_MONTH = re.compile(r"\d{4}-\d{2}")
+
+
+def _month(item):
+    ts = item.get("ts") if hasattr(item, "get") else None
+    m = ts[:7] if isinstance(ts, str) else ""
+    return m if _MONTH.fullmatch(m) else None
+
+
+def _encode(items):
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"), default=jsonable).encode("utf-8")
+
+
+class _Archive:
+    """One archived run of a collection: its manifest entry, items read on first use."""
+
+    __slots__ = ("meta", "path", "wrap", "_items", "_crc")
+
+    def __init__(self, folder, meta, wrap, items=None, crc=None):
+        self.meta = meta
+        self.path = folder / meta["file"]
+        self.wrap = wrap
+        self._items = items
+        self._crc = crc
+
+    @property
+    def opened(self):
+        return self._items is not None
+
+    @property
+    def items(self):
+        if self._items is None:
+            codec = gzip if self.path.suffix == ".gz" else lzma
+            try:
+                raw = codec.decompress(self.path.read_bytes())
+            except FileNotFoundError:
+                # another process compacted and dropped it: our view is stale
+                raise ConflictError(f"{self.path.name} was replaced by another process") from None
+            self._crc = zlib.crc32(raw)
+            self._items = self.wrap(json.loads(raw))
+        return self._items
+
+
+class PartitionedList(MutableSequence):
+    """A collection as archived runs (oldest first, read lazily) followed by a hot list.
+
+    Positions are global, as if it were one list, so log records and the
+    journal's indexes work unchanged; appends always go to the hot list.
+    """
+
+    def __init__(self, archives, hot):
+        self.archives = archives
+        self.hot = hot
+        self._reindex()
+
+    def _reindex(self):
+        self.starts, n = [], 0
+        for a in self.archives:
+            self.starts.append(n)
+            n += a.meta["n"]
+        self.cold_n = n
+
+    def _where(self, i):
+        """``(archive or None for hot, position in it)``."""
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("list index out of range")
+        if i >= self.cold_n:
+            return None, i - self.cold_n
+        k = bisect_right(self.starts, i) - 1
+        return self.archives[k], i - self.starts[k]
+
+    # --- Sequence protocol -----------------------------------------------------------
+    def __len__(self):
+        return self.cold_n + len(self.hot)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        a, j = self._where(i)
+        return (self.hot if a is None else a.items)[j]
+
+    def __setitem__(self, i, value):
+        if isinstance(i, slice):
+            raise TypeError("PartitionedList doesn't support slice assignment")
+        a, j = self._where(i)
+        (self.hot if a is None else a.items)[j] = value
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            for j in sorted(range(*i.indices(len(self))), reverse=True):
+                del self[j]
+            return
+        a, j = self._where(i)
+        if a is None:
+            del self.hot[j]
+            return
+        del a.items[j]
+        a.meta["n"] -= 1
+        if not a.meta["n"]:
+            self.archives.remove(a)
+        self._reindex()
+
+    def insert(self, i, value):
+        n = len(self)
+        i = max(0, min(n, i + n if i < 0 else i))
+        if i >= self.cold_n:
+            self.hot.insert(i - self.cold_n, value)
+            return
+        a, j = self._where(i)
+        a.items.insert(j, value)
+        a.meta["n"] += 1
+        self._reindex()
+
+    def append(self, value):
+        self.hot.append(value)
+
+    def extend(self, values):
+        self.hot.extend(values)
+
+    def __iter__(self):
+        for a in self.archives:
+            yield from a.items
+        yield from self.hot
+
+    def __reversed__(self):
+        yield from reversed(self.hot)
+        for a in reversed(self.archives):
+            yield from reversed(a.items)
+
+    def __repr__(self):
+        opened = sum(a.opened for a in self.archives)
+        return (f"PartitionedList(<{self.cold_n} archived in {len(self.archives)} files, "
+                f"{opened} open; {len(self.hot)} hot>)")
+
+    # --- Partition-aware access --------------------------------------------------------
+    def segments(self, since=None, until=None, entry_id=None):
+        """See psychbot.store.segments; the hot list always qualifies (it may hold imports)."""
+        out = []
+        for start, a in zip(self.starts, self.archives):
+            m = a.meta
+            if since and m["last"] < since:
+                continue
+            if until and m["first"][:len(until)] > until:
+                continue
+            if entry_id is not None and not m.get("lo", entry_id) <= entry_id <= m.get("hi", entry_id):
+                continue
+            out.append((start, m["first"], m["last"], lambda a=a: a.items))
+        out.append((self.cold_n, None, None, lambda: self.hot))
+        return out
+
+    def retain(self, keep):
+        """Drop items failing ``keep`` in place; returns their positions (see store.purge_list).
+
+        Only the hot list and opened archives are checked: an item can only
+        change once its archive was read, and compaction purges before it
+        archives anything, so unopened archives hold no tombstones.
+        """
+        gone = []
+        for start, a in zip(self.starts, list(self.archives)):
+            if not a.opened:
+                continue
+            items = a.items
+            drop = [i for i, x in enumerate(items) if not keep(x)]
+            if drop:
+                gone += [start + i for i in drop]
+                items[:] = [x for x in items if keep(x)]
+                a.meta["n"] = len(items)
+                if not items:
+                    self.archives.remove(a)
+        drop = [i for i, x in enumerate(self.hot) if not keep(x)]
+        if drop:
+            gone += [self.cold_n + i for i in drop]
+            self.hot[:] = [x for x in self.hot if keep(x)]
+        self._reindex()
+        return gone
+
+    def seal(self, month, write):
+        """Archive hot items dated before ``month`` (``YYYY-MM``) and rewrite changed archives.
+
+        Only a prefix of the hot list moves (positions must not change), one
+        archive per run of the same month; ``write(items, data)`` stores one
+        and returns its _Archive.
+        """
+        for k, a in enumerate(self.archives):
+            if a.opened:
+                data = _encode(a.items)
+                if zlib.crc32(data) != a._crc:
+                    self.archives[k] = write(a.items, data)
+        hot, n = self.hot, 0
+        while n < len(hot) and (m := _month(hot[n])) is not None and m < month:
+            n += 1
+        if not n:
+            return
+        wrap = type(hot)
+        run = 0
+        for i in range(1, n + 1):
+            if i == n or _month(hot[i]) != _month(hot[run]):
+                self.archives.append(write(wrap(hot[run:i]), None))
+                run = i
+        self.hot = wrap(hot[n:])
+        self._reindex()
+
+
+class PartitionedLog(RecordLog):
+    """RecordLog whose snapshot holds only this month's check-ins and entries (see above)."""
+
+    def __init__(self, path, codec=None, **kw):
+        super().__init__(path, **kw)
+        self.archive_dir = self.path.with_name(self.path.name + ".archive")
+        self.codec = (codec or os.environ.get("PSYCHBOT_ARCHIVE") or "gzip").lower()
+        if self.codec not in CODECS:
+            raise ValueError(f"unknown archive codec: {self.codec!r} (use {' or '.join(CODECS)})")
+        self.partition = True  # False: compact() folds everything back into the snapshot
+        self._live = None      # archive files the last snapshot we wrote lists
+        self._written = 0      # archives written by this compaction (for unique names)
+
+    def _adopt(self, db):
+        manifest = db.pop(PARTS_KEY, {})
+        for coll, wrap in WRAP.items():
+            archives = [_Archive(self.archive_dir, m, wrap) for m in manifest.get(coll, ())]
+            db[coll] = PartitionedList(archives, wrap(db.get(coll) or []))
+        return db
+
+    def _snapshot(self, db):
+        snap, manifest = dict(db), {}
+        month = dt.date.today().strftime("%Y-%m")
+        self._written = 0
+        for coll, wrap in WRAP.items():
+            items = db.get(coll)
+            if items is None:
+                continue
+            if not isinstance(items, PartitionedList):  # replaced wholesale, or a plain db
+                items = db[coll] = PartitionedList([], items if isinstance(items, wrap) else wrap(items))
+            if not self.partition:
+                rows = snap[coll] = list(items)
+                db[coll] = PartitionedList([], wrap(rows))  # its archives are about to go
+                continue
+            items.seal(month, lambda rows, data, coll=coll: self._write_archive(coll, rows, data))
+            snap[coll] = items.hot
+            manifest[coll] = [a.meta for a in items.archives]
+        if manifest:
+            snap[PARTS_KEY] = manifest
+        self._live = {m["file"] for metas in manifest.values() for m in metas}
+        return snap
+
+    def _write_archive(self, coll, items, data):
+        data = data if data is not None else _encode(items)
+        suffix, codec = CODECS[self.codec]
+        ts = [x.get("ts") or "" for x in items]
+        first = min(ts, default="")
+        while True:
+            name = f"{coll}-{first[:7] or 'undated'}-{self.seq}.{self._written}{suffix}"
+            self._written += 1
+            if not (self.archive_dir / name).exists():
+                break
+        meta = {"file": name, "n": len(items), "first": first, "last": max(ts, default="")}
+        ids = [x["id"] for x in items if isinstance(x.get("id"), int)]
+        if ids:
+            meta["lo"], meta["hi"] = min(ids), max(ids)
+        blob = codec.compress(data)
+        atomic_write(self.archive_dir / name, blob)
+        self.bytes_written += len(blob)
+        return _Archive(self.archive_dir, meta, WRAP[coll], items, zlib.crc32(data))
+
+    def _compacted(self):
+        # only now is nothing pointing at the files the new snapshot dropped
+        if self._live is None or not self.archive_dir.is_dir():
+            return
+        for f in self.archive_dir.iterdir():
+            if f.name not in self._live and f.name.endswith(tuple(s for s, _ in CODECS.values())):
+                with suppress(OSError):
+                    f.unlink()
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    merge = "--merge" in args
+    paths = [a for a in args if a != "--merge"]
+    if len(paths) != 1:
+        sys.exit("usage: python -m psychbot.partitions [--merge] <data.json>")
+    store = PartitionedLog(paths[0])
+    db = store.load(default={})
+    store.partition = not merge
+    store.compact(db)
+    store.close()
+    if merge:
+        print(f"✓ {paths[0]} holds everything again")
+        return
+    for coll in WRAP:
+        items = db.get(coll)
+        if isinstance(items, PartitionedList):
+            print(f"✓ {coll}: {items.cold_n} archived in {len(items.archives)} files, {len(items.hot)} hot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Command router: a registered command table looked up through a prefix trie.
+
+    ROUTER = Router()
+
+    @ROUTER.command("/journal", usage="/journal add|list|delete", help="notes vault",
+                    min_args=1, hint="Usage: /journal add <text> | /journal list | ...")
+    def journal(state, args, now): ...
+
+Each line is tokenized once (``Router.parse``). The command word is
+resolved by one dict hit for exact names/aliases, falling back to a walk
+of a character trie for any unambiguous prefix (``/rev`` → ``/review``);
+both cost O(len(word)) whatever the number of commands. Commands can declare a small argument schema —
+``min_args`` and/or typed ``key=value`` params — which the router checks
+before the handler runs, and ``help_lines`` renders /help from the table.
+"""
+
+from collections import namedtuple
+
+Call = namedtuple("Call", "word command args rest")  # rest = raw text after the command word
+
+
+class ArgError(ValueError):
+    """Arguments don't match the command's schema; str() is the message for the user."""
+
+
+class Command:
+    __slots__ = ("name", "handler", "aliases", "usage", "help", "hint", "min_args",
+                 "params", "required", "hidden")
+
+    def __init__(self, name, handler, aliases=(), usage=None, help="", hint=None,
+                 min_args=0, params=None, required=(), hidden=False):
+        self.name = name
+        self.handler = handler
+        self.aliases = tuple(aliases)
+        self.usage = usage or name
+        self.help = help
+        self.hint = hint or f"Usage: {self.usage}"
+        self.min_args = min_args
+        self.params = params      # {"mood": int, ...}: typed k=v args, bare values fill in order
+        self.required = tuple(required)
+        self.hidden = hidden
+
+    def bind(self, args):
+        """Check ``args`` against the schema; returns the list, or a typed dict if ``params``."""
+        if len(args) < self.min_args:
+            raise ArgError(self.hint)
+        if self.params is None:
+            return args
+        out, pos = {}, iter(self.params)
+        for a in args:
+            k, sep, v = a.partition("=")
+            if not sep:
+                k, v = next(pos, None), a
+            else:
+                k = k.lower()
+            if k not in self.params:
+                raise ArgError(self.hint)
+            try:
+                out[k] = self.params[k](v)
+            except ValueError:
+                raise ArgError(self.hint) from None
+        if any(k not in out for k in self.required):
+            raise ArgError(self.hint)
+        return out
+
+
+class _Node:
+    __slots__ = ("kids", "command", "below")
+
+    def __init__(self):
+        self.kids = {}
+        self.command = None   # set where a name or alias ends
+        self.below = set()    # distinct commands reachable from here, for prefix lookups
+
+
+class Router:
+    def __init__(self):
+        self.root = _Node()
+        self.words = {}       # exact name/alias → Command: the hot path skips the walk
+        self.commands = []    # registration order, for /help
+
+    def add(self, name, handler, **spec):
+        cmd = Command(name, handler, **spec)
+        for word in (name,) + cmd.aliases:
+            node = self.root
+            for ch in word:
+                node = node.kids.setdefault(ch, _Node())
+                node.below.add(cmd.name)
+            node.command = cmd
+            self.words[word] = cmd
+        self.commands.append(cmd)
+        return cmd
+
+    def command(self, name, **spec):
+        """Decorator form of ``add``."""
+        def register(fn):
+            self.add(name, fn, **spec)
+            return fn
+        return register
+
+    def _walk(self, word):
+        node = self.root
+        for ch in word:
+            node = node.kids.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def lookup(self, word):
+        """Command for an exact name/alias or unique prefix; None if unknown or ambiguous."""
+        cmd = self.words.get(word)
+        if cmd is not None:
+            return cmd
+        node = self._walk(word)
+        if node is None:
+            return None
+        if node.command is None and len(node.below) == 1:
+            while node.command is None:  # single path down to the only command
+                node = next(iter(node.kids.values()))
+        return node.command
+
+    def candidates(self, word):
+        """Command names starting with ``word`` (to explain an ambiguous prefix)."""
+        node = self._walk(word)
+        return sorted(node.below) if node else []
+
+    def parse(self, line):
+        """Tokenize ``line`` once; returns a Call (command is None when unknown)."""
+        tokens = line.split()
+        if not tokens:
+            return Call("", None, [], "")
+        head = tokens[0]
+        word = head.lower()
+        rest = line[line.find(head) + len(head):].strip() if len(tokens) > 1 else ""
+        return Call(word, self.lookup(word), tokens[1:], rest)
+
+    def help_lines(self):
+        return [f"{c.usage}  → {c.help}" for c in self.commands if not c.hidden]
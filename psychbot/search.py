@@ -0,0 +1,316 @@
+"""
+Full-text search over journal entries: an inverted index keyed by entry id.
+
+    /journal search interview nerves tag:work from:2024-01 to:2024-03-31
+
+Terms are ANDed; ``tag:X`` matches the entry's tags (or a ``#X`` in its
+text); ``from:``/``to:`` take ISO date prefixes, both inclusive, and on
+their own list every entry in range. Hits are ranked BM25-style (rare
+terms and short entries score higher), newest first on ties.
+
+The index maps token -> posting list of entry ids (one id per occurrence,
+ascending). Ids are never reused (see psychbot.journal), so the index only
+ever grows at the end: entries newer than the last indexed id are indexed
+as they are written (``tracking``) or, if the index isn't open yet, on the
+first lookup. A delete drops the entry's id and rewrites the sidecar, so
+its words don't stay on disk; ids tombstoned behind its back (by another
+process) are dropped as queries meet them.
+It lives in memory per entry list and is persisted to a sidecar file
+(``<data file>.search``) so a restart doesn't re-tokenize the whole
+history; the sidecar is only a cache and is rebuilt whenever it doesn't
+match the data.
+"""
+
+import heapq, json, math, re
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from psychbot import journal as jr
+from psychbot.locking import atomic_write
+from psychbot.store import entry_tags, is_live
+
+VERSION = 1
+LIMIT = 20
+SAVE_MIN = 1000  # persist right away once this many entries were (re)indexed
+TEXT_FIELDS = ("text", "journal", "trigger", "reframe", "evidence", "action", "result")
+K1, B = 1.2, 0.75
+
+_WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+
+def tokens(text):
+    return [w for w in _WORD.findall(text.lower()) if len(w) > 1]
+
+
+def sidecar(data_path):
+    data_path = Path(data_path)
+    return data_path.with_name(data_path.name + ".search")
+
+
+def parse_query(args):
+    """``(terms, tags, since, until)`` from query words."""
+    terms, tags, since, until = [], [], None, None
+    for a in args:
+        key, sep, val = a.partition(":")
+        key = key.lower()
+        if sep and val and key == "tag":
+            tags.append(val.lower().lstrip("#"))
+        elif sep and val and key in ("from", "since"):
+            since = val
+        elif sep and val and key in ("to", "until"):
+            until = val
+        else:
+            terms.extend(tokens(a))
+    return terms, tags, since, until
+
+
+class SearchIndex:
+    __slots__ = ("entries", "terms", "tags", "docs", "top", "total_len", "path", "dirty", "ready")
+
+    def __init__(self, entries, path=None):
+        self.entries = entries
+        self.terms = {}      # token -> [id, ...]
+        self.tags = {}       # tag -> [id, ...]
+        self.docs = {}       # id -> (ts, length in tokens)
+        self.top = 0         # highest id indexed
+        self.total_len = 0
+        self.path = path
+        self.dirty = 0       # entries (re)indexed since the sidecar was written
+        self.ready = False
+
+    def open(self):
+        """Load the sidecar (plus anything newer) or index everything; once."""
+        if not (self.path and self.load()):
+            self.build()
+        self.sync()
+        self.ready = True
+        if self.dirty >= SAVE_MIN:
+            self.save()
+
+    # --- Indexing ------------------------------------------------------------------
+    def add(self, e):
+        eid = e["id"]
+        words = []
+        for f in TEXT_FIELDS:
+            v = e.get(f)
+            if isinstance(v, str) and v and v != "thought_reframe":
+                words += tokens(v)
+        terms = self.terms
+        for w in words:
+            terms.setdefault(w, []).append(eid)
+        for t in entry_tags(e):
+            self.tags.setdefault(t, []).append(eid)
+        self.docs[eid] = (e.get("ts", ""), len(words))
+        self.total_len += len(words)
+        self.dirty += 1
+
+    def sync(self):
+        """Index entries newer than ``top``; they sit at the end of the list."""
+        new = []
+        for e in reversed(self.entries):
+            eid = e.get("id")
+            if not isinstance(eid, int):
+                continue
+            if eid <= self.top:
+                break
+            new.append(e)
+        for e in reversed(new):
+            if is_live(e):
+                self.add(e)
+            self.top = max(self.top, e["id"])
+        return len(new)
+
+    def build(self):
+        for e in self.entries:
+            if isinstance(e.get("id"), int):
+                if is_live(e):
+                    self.add(e)
+                self.top = max(self.top, e["id"])
+
+    def discard(self, eid):
+        """Forget a deleted entry; its postings are pruned on the next save."""
+        doc = self.docs.pop(eid, None)
+        if doc:
+            self.total_len -= doc[1]
+            self.dirty += 1
+
+    # --- Queries -------------------------------------------------------------------
+    def _live(self, eid):
+        """The entry for ``eid`` if it is still live (dropping it from the index if not)."""
+        if eid not in self.docs:
+            return None
+        at = jr.find(self.entries, eid)
+        if at is None:
+            self.discard(eid)
+            return None
+        return self.entries[at]
+
+    def search(self, terms, tags=(), since=None, until=None, limit=LIMIT):
+        """Best ``limit`` live entries as ``[(score, entry), ...]``."""
+        lists = [self.terms.get(t, ()) for t in dict.fromkeys(terms)]
+        lists += [self.tags.get(t, ()) for t in dict.fromkeys(tags)]
+        if lists:
+            lists.sort(key=len)  # intersect from the rarest list up
+            hits = set(lists[0])
+            for ids in lists[1:]:
+                if not hits:
+                    return []
+                hits.intersection_update(ids)
+        elif since or until:
+            hits = set(self.docs)  # dates only: every entry in range, newest first
+        else:
+            return []
+        docs = self.docs
+        hits = {i for i in hits if i in docs and _in_range(docs[i][0], since, until)}  # postings outlive discard()
+        n = len(docs) or 1
+        avg = self.total_len / n or 1
+        weights = []
+        for t in dict.fromkeys(terms):
+            ids = self.terms.get(t, ())
+            df = sum(1 for i in set(ids) if i in docs)  # live documents only, like n
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            weights.append((idf, _counts(ids, hits)))
+
+        def score(eid):
+            dl = docs[eid][1] if eid in docs else avg
+            norm = K1 * (1 - B + B * dl / avg)
+            return sum(idf * tf[eid] * (K1 + 1) / (tf[eid] + norm) for idf, tf in weights)
+
+        while hits:
+            out = []
+            for s, eid in heapq.nlargest(limit, ((score(i), i) for i in hits)):  # ties: newest
+                e = self._live(eid)
+                if e is None:
+                    hits.discard(eid)
+                else:
+                    out.append((s, e))
+            if len(out) == min(limit, len(hits)):
+                return out
+        return []
+
+    # --- Sidecar -------------------------------------------------------------------
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        docs = self.docs
+        terms = {t: kept for t, ids in self.terms.items() if (kept := [i for i in ids if i in docs])}
+        tags = {t: kept for t, ids in self.tags.items() if (kept := [i for i in ids if i in docs])}
+        self.terms, self.tags = terms, tags
+        ids = list(docs)
+        atomic_write(self.path, json.dumps({
+            "v": VERSION, "top": self.top, "top_ts": self._top_ts(),
+            "ids": ids, "ts": [docs[i][0] for i in ids], "lens": [docs[i][1] for i in ids],
+            "terms": terms, "tags": tags,
+        }, ensure_ascii=False, separators=(",", ":")))
+        self.dirty = 0
+
+    def _top_ts(self):
+        at = jr.find(self.entries, self.top, deleted=True)
+        return self.entries[at].get("ts") if at is not None else None
+
+    def load(self):
+        """Adopt the sidecar if it matches these entries; False if it doesn't."""
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if raw.get("v") != VERSION:
+            return False
+        at = jr.find(self.entries, raw["top"], deleted=True)
+        if at is None and raw["top"] > 0:
+            return False  # its newest entry is gone (purged, or another history)
+        if at is not None and self.entries[at].get("ts") != raw["top_ts"]:
+            return False  # a different history with overlapping ids
+        self.top = raw["top"]
+        self.docs = {i: (ts, n) for i, ts, n in zip(raw["ids"], raw["ts"], raw["lens"])}
+        self.total_len = sum(raw["lens"])
+        self.terms, self.tags = raw["terms"], raw["tags"]
+        return True
+
+
+def _in_range(ts, since, until):
+    return (not since or ts >= since) and (not until or ts[:len(until)] <= until)
+
+
+def _counts(ids, hits):
+    tf = {}
+    for i in ids:
+        if i in hits:
+            tf[i] = tf.get(i, 0) + 1
+    return tf
+
+
+# --- Per-list registry ------------------------------------------------------------
+_INDEXES = OrderedDict()  # id(entries) -> SearchIndex, one per workspace
+_MAX_INDEXES = 16
+
+
+def _remember(idx):
+    _INDEXES[id(idx.entries)] = idx
+    _INDEXES.move_to_end(id(idx.entries))
+    if len(_INDEXES) > _MAX_INDEXES:
+        _INDEXES.popitem(last=False)
+    return idx
+
+
+def attach(entries, path):
+    """Tell the index for ``entries`` where its sidecar lives (adapters call this on load).
+
+    Nothing is read until the first search.
+    """
+    return _remember(SearchIndex(entries, Path(path)))
+
+
+def index(entries):
+    """The up-to-date search index for an entry list, opened on first use."""
+    idx = _INDEXES.get(id(entries))
+    if idx is None or idx.entries is not entries:
+        idx = SearchIndex(entries)
+    if idx.ready:
+        idx.sync()
+    else:
+        idx.open()
+    return _remember(idx)
+
+
+def save(entries):
+    """Write the sidecar for ``entries`` if its index changed."""
+    idx = _INDEXES.get(id(entries))
+    if idx is not None and idx.entries is entries and idx.ready:
+        idx.save()
+
+
+def search(entries, args, limit=LIMIT):
+    terms, tags, since, until = parse_query(args)
+    return index(entries).search(terms, tags, since, until, limit)
+
+
+@contextmanager
+def tracking(state, mutations):
+    """Wrap applying ``mutations`` to ``state``: once that succeeded, index the
+    entries it added and drop the ones it deleted (rewriting the sidecar).
+
+    An index nobody has opened this session is left alone unless a sidecar
+    holds the deleted entry; the first search catches up on the rest.
+    """
+    writes = [m for m in mutations if m.get("coll") == "entries"]
+    if not writes:  # don't load state for commands that don't touch entries
+        yield
+        return
+    entries = state["entries"]
+    gone = [entries[m["at"]].get("id") for m in writes if m["op"] == "patch" and "deleted" in m["fields"]]
+    yield
+    idx = _INDEXES.get(id(entries))
+    if idx is None or idx.entries is not entries:
+        return
+    if idx.ready:
+        idx.sync()
+    elif gone and idx.path and idx.path.exists():
+        idx.open()
+    else:
+        return
+    for eid in gone:
+        idx.discard(eid)
+    if gone or idx.dirty >= SAVE_MIN:
+        idx.save()
@@ -0,0 +1,195 @@
+"""
+Multi-user asyncio server: a line protocol over TCP or a Unix socket.
+
+    python -m psychbot --serve 127.0.0.1:7878 [--data-dir users]
+    python -m psychbot --serve unix:/tmp/psychbot.sock
+
+Protocol: every reply is followed by a line holding a single ".", and reply
+lines that start with "." get an extra "." (SMTP-style dot-stuffing).
+
+    S: Psych Bot ready. Send /login <name> <secret>.
+    S: .
+    C: /login alice correct-horse
+    S: Welcome, alice.
+    S: .
+    C: /checkin mood=3 stress=2 sleep=7
+    S: Logged ✅  mood=3, stress=2, sleep=7h
+    S: .
+
+Each connection is one asyncio task, not a thread, so idle sessions cost a
+socket and a few KB. Commands run on the event loop one at a time, so the
+handlers never race on a shared workspace; sessions for the same user share
+one workspace, which is closed when its last session leaves.
+
+Logins are checked against a per-user secret (see Secrets); the first login
+for a name sets it. Traffic is plain text, so the server only listens on
+loopback or a Unix socket unless started with ``--public``.
+"""
+
+import asyncio, hashlib, hmac, ipaddress, json, os, re
+from pathlib import Path
+
+from psychbot.locking import atomic_write
+from psychbot.session import bind
+
+USER_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+MIN_SECRET = 8
+FAIL_DELAY = 1.0  # seconds before answering a bad login
+ROUNDS = 200_000
+
+
+def _hash(secret, salt):
+    return hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), salt, ROUNDS)
+
+
+class Secrets:
+    """Per-user login secrets in ``<root>/<user>/login.json`` (salted PBKDF2, not the secret).
+
+    A name without one is claimed by its first login, including a user
+    directory that predates logins: have each user log in once before the
+    server is reachable by anyone else.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def check(self, user, secret):
+        path = self.root / user / "login.json"
+        try:
+            rec = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            if len(secret) < MIN_SECRET:
+                return False
+            salt = os.urandom(16)
+            atomic_write(path, json.dumps({"salt": salt.hex(), "hash": _hash(secret, salt).hex()}))
+            return True
+        return hmac.compare_digest(bytes.fromhex(rec["hash"]), _hash(secret, bytes.fromhex(rec["salt"])))
+
+
+def check_address(address, public=False):
+    """Refuse a TCP host beyond this machine unless ``public`` (logins and data are not encrypted)."""
+    if address.startswith("unix:") or public:
+        return
+    host = address.rpartition(":")[0] or "127.0.0.1"
+    try:
+        local = ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        local = host == "localhost"
+    if not local:
+        raise ValueError(f"{host} is reachable from other machines and the protocol is plain text; "
+                         "pass --public to serve there anyway")
+
+
+class WorkspacePool:
+    """Reference-counted workspaces, one per user."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.open = {}  # user -> [workspace, sessions]
+
+    def acquire(self, user):
+        slot = self.open.get(user)
+        if slot is None:
+            slot = self.open[user] = [self.factory(user), 0]
+        slot[1] += 1
+        return slot[0]
+
+    def close_all(self):
+        for ws, _ in self.open.values():
+            ws.close()
+        self.open.clear()
+
+    def release(self, user):
+        slot = self.open[user]
+        slot[1] -= 1
+        if not slot[1]:
+            del self.open[user]
+            slot[0].close()
+
+
+def frame(text):
+    lines = [("." + l if l.startswith(".") else l) for l in text.splitlines()]
+    return ("\n".join(lines + ["."]) + "\n").encode("utf-8")
+
+
+class Server:
+    """Routes each session's lines to ``dispatch(line)`` inside its own workspace."""
+
+    def __init__(self, dispatch, workspace_factory, secrets, idle_timeout=None):
+        self.dispatch = dispatch
+        self.pool = WorkspacePool(workspace_factory)
+        self.secrets = secrets
+        self.idle_timeout = idle_timeout
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        user = None
+        try:
+            writer.write(frame("Psych Bot ready. Send /login <name> <secret>."))
+            await writer.drain()
+            while True:
+                try:
+                    raw = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write(frame("Idle timeout. Bye."))
+                    break
+                if not raw:
+                    break
+                line = raw.decode("utf-8", "replace").strip()
+                if not line:
+                    continue
+                if user is None:
+                    parts = line.split(None, 2) if line.startswith("/login") else []
+                    name, secret = (parts[1:] + ["", ""])[:2]
+                    if not (USER_RE.match(name) and secret):
+                        writer.write(frame("Send /login <name> <secret> (name: letters, digits, _ or -)."))
+                    elif not self.secrets.check(name, secret):
+                        await asyncio.sleep(FAIL_DELAY)
+                        writer.write(frame(f"Wrong secret for {name} (a new name needs one of "
+                                           f"{MIN_SECRET}+ characters)."))
+                    else:
+                        user = name
+                        bind(self.pool.acquire(user))  # this task's context only
+                        writer.write(frame(f"Welcome, {user}."))
+                else:
+                    try:
+                        reply = self.dispatch(line)
+                    except Exception as exc:
+                        reply = f"Error: {exc}"
+                    if reply is None:
+                        writer.write(frame("Bye."))
+                        break
+                    writer.write(frame(reply))
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            if user is not None:
+                self.pool.release(user)
+            writer.close()
+
+    async def start(self, address):
+        """Listen on ``host:port`` or ``unix:/path``; returns the asyncio server."""
+        if address.startswith("unix:"):
+            return await asyncio.start_unix_server(self.handle, path=address[5:], limit=1 << 16)
+        host, _, port = address.rpartition(":")
+        return await asyncio.start_server(self.handle, host or "127.0.0.1", int(port), limit=1 << 16)
+
+    async def serve_forever(self, address):
+        srv = await self.start(address)
+        try:
+            async with srv:
+                await srv.serve_forever()
+        finally:
+            self.pool.close_all()  # commit whatever the sessions left pending
+
+
+def serve(address, dispatch, workspace_factory, secrets, idle_timeout=None, public=False):
+    check_address(address, public)
+    try:
+        asyncio.run(Server(dispatch, workspace_factory, secrets, idle_timeout).serve_forever(address))
+    except KeyboardInterrupt:
+        pass
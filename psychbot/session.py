@@ -0,0 +1,119 @@
+"""
+Workspaces: one user's store, aggregates and (lazily loaded) state.
+
+The command handlers talk to module-level STATE / STORE / ROLLUP. Those are
+proxies that resolve to the workspace bound to the current context (see
+``activate``), falling back to the default CLI workspace. asyncio gives each
+connection task its own context, so every server session sees only its own
+user's data without the handlers changing.
+"""
+
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from psychbot import search
+from psychbot.aggregates import Rollup
+from psychbot.durability import CommitScheduler
+from psychbot.lazy import LazyState
+from psychbot.store import open_store
+
+_current = ContextVar("psychbot_workspace", default=None)
+
+
+class Workspace:
+    """Store + rollup + lazy state for one data file.
+
+    ``local_files`` says whether commands may read arbitrary local paths
+    (/import); it is off for server sessions. ``durability`` picks the
+    commit policy (see psychbot.durability).
+    """
+
+    def __init__(self, data_path, loader, export_dir=None, local_files=True, backend=None,
+                 durability="batched"):
+        self.data_path = Path(data_path)
+        self.export_dir = Path(export_dir) if export_dir else self.data_path.parent / "exports"
+        self.local_files = local_files
+        self.store = open_store(data_path, backend)
+        self.rollup = Rollup(self.store)
+        self.state = LazyState(loader)
+        self.commits = CommitScheduler(self.store, durability)
+
+    def close(self):
+        self.commits.close()
+        self.store.flush()
+        self.store.close()
+        if self.state.loaded:
+            search.save(self.state["entries"])  # keep the search index for next time
+
+
+@contextmanager
+def activate(ws):
+    """Bind ``ws`` for the current context (task/thread)."""
+    token = _current.set(ws)
+    try:
+        yield ws
+    finally:
+        _current.reset(token)
+
+
+def current(default=None):
+    return _current.get() or default
+
+
+def bind(ws):
+    """Bind ``ws`` for the rest of the current context (e.g. one server task)."""
+    _current.set(ws)
+
+
+class WorkspaceAttr:
+    """Proxy for ``<current workspace>.<attr>`` (used for STORE and ROLLUP)."""
+
+    __slots__ = ("_default", "_attr")
+
+    def __init__(self, default, attr):
+        self._default = default
+        self._attr = attr
+
+    def __getattr__(self, name):
+        ws = _current.get() or self._default
+        return getattr(getattr(ws, self._attr), name)
+
+
+class WorkspaceState(MutableMapping):
+    """Mapping proxy for the current workspace's state (used for STATE)."""
+
+    __slots__ = ("_default",)
+
+    def __init__(self, default):
+        self._default = default
+
+    @property
+    def data(self):
+        return (_current.get() or self._default).state
+
+    @property
+    def loaded(self):
+        return self.data.loaded
+
+    def reload(self):
+        self.data.reload()
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"WorkspaceState({self.data!r})"
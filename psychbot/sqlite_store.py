@@ -0,0 +1,311 @@
+"""
+SQLite backend: check_ins, entries, tags and system_score tables.
+
+Rows keep the full record as JSON (``doc``) so nothing is lost, and the
+fields we query on are lifted into indexed columns (ts, kind, tag, id).
+
+One-shot migration from the JSON files:
+    python -m psychbot.sqlite_store psych_data.json psych_data.db
+"""
+
+import bisect, json, sqlite3, sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from psychbot.checkins import CheckinLog, columnize, jsonable
+from psychbot.store import (ConflictError, Store, apply_incr, entry_kind, is_live, purge_deleted, purge_list,
+                            trigger_key)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS check_ins (
+    id INTEGER PRIMARY KEY, ts TEXT NOT NULL,
+    mood INTEGER, stress INTEGER, sleep REAL, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_check_ins_ts ON check_ins(ts);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY, ts TEXT, kind TEXT NOT NULL,
+    eid INTEGER, trigger_key TEXT, doc TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_entries_ts ON entries(ts);
+CREATE INDEX IF NOT EXISTS ix_entries_kind ON entries(kind, ts);
+CREATE INDEX IF NOT EXISTS ix_entries_eid ON entries(eid);
+CREATE INDEX IF NOT EXISTS ix_entries_trigger ON entries(trigger_key);
+CREATE TABLE IF NOT EXISTS tags (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_tags_tag ON tags(tag, entry_id);
+CREATE INDEX IF NOT EXISTS ix_tags_entry ON tags(entry_id);
+CREATE TABLE IF NOT EXISTS system_score (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT NOT NULL, path TEXT NOT NULL, value TEXT, PRIMARY KEY (key, path));
+"""
+
+ROW_TABLES = ("check_ins", "entries")
+
+
+class SqliteStore(Store):
+    """Store backed by one SQLite file (WAL journal mode).
+
+    SQLite does the locking and atomic commits; on top of that each write
+    transaction starts with BEGIN IMMEDIATE and compares ``PRAGMA
+    data_version`` with the version our db was loaded at, raising
+    ConflictError if another connection committed in between.
+    """
+
+    def __init__(self, path, migrate_from=None):
+        self.path = Path(path)
+        self.migrate_from = Path(migrate_from) if migrate_from else None  # JSON data to adopt if no db yet
+        self._conn = None
+        self._version = None
+        self._rowids = {t: [] for t in ROW_TABLES}  # list position -> rowid
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            src = self.migrate_from
+            if src and not self.path.exists() and (src.exists() or src.with_name(src.name + ".wal").exists()):
+                migrate_json(src, self.path)  # on first use, so opening the store touches no files
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # one connection per store; callers serialize use (see psychbot.durability)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    # --- Lifecycle ---------------------------------------------------------------
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self, default):
+        c = self.conn
+        began = not c.in_transaction
+        if began:
+            c.execute("BEGIN")  # one read snapshot across all tables
+        try:
+            self._version = self._data_version()
+            return self._read(default)
+        finally:
+            if began:
+                c.commit()
+
+    def _read(self, default):
+        c = self.conn
+        meta = dict(c.execute("SELECT key, value FROM meta"))
+        has_rows = any(c.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone() for t in ROW_TABLES)
+        if not meta and not has_rows:
+            return columnize(default)
+        db = dict(default)
+        for k, v in meta.items():
+            db[k] = json.loads(v)
+        for key, path, value in c.execute("SELECT key, path, value FROM counters"):
+            node = db.setdefault(key, {})
+            path = json.loads(path)
+            for p in path[:-1]:
+                node = node.setdefault(p, {})
+            if value is None:
+                node.pop(path[-1], None)
+            else:
+                node[path[-1]] = json.loads(value)
+        score = {k: json.loads(v) for k, v in c.execute("SELECT key, value FROM system_score")}
+        if score:
+            db["system_score"] = score
+        for t in ROW_TABLES:
+            rows = c.execute(f"SELECT id, doc FROM {t} ORDER BY id").fetchall()
+            self._rowids[t] = [r[0] for r in rows]
+            docs = (json.loads(r[1]) for r in rows)
+            db[t] = CheckinLog(docs) if t == "check_ins" else list(docs)
+        return db
+
+    def stale(self):
+        return self._version is not None and self._data_version() != self._version
+
+    def refresh(self, db):
+        return not self.stale()  # no cheap delta: reload
+
+    def _begin(self):
+        """Open a write transaction unless one is open, then check our version.
+
+        Once we hold the write lock nobody else can commit, so a mismatch can
+        only show up before this transaction wrote anything.
+        """
+        c = self.conn
+        if not c.in_transaction:
+            c.execute("BEGIN IMMEDIATE")
+        if self._version is not None and self._data_version() != self._version:
+            c.rollback()
+            raise ConflictError(f"{self.path} was written by another connection")
+
+    @contextmanager
+    def batch(self, lock=True):
+        # take the write lock up front (like RecordLog) so the batch can't lose a race midway
+        if lock and not self._batch_depth and not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        with super().batch():
+            yield self
+
+    def compact(self, db):
+        self._begin()
+        purge_deleted(db)  # deleted entries don't survive a rewrite
+        with self.conn:
+            for t in ROW_TABLES + ("tags", "system_score", "meta", "counters"):
+                self.conn.execute(f"DELETE FROM {t}")
+            self._rowids = {t: [] for t in ROW_TABLES}
+            for k, v in db.items():
+                if k in ROW_TABLES:
+                    for item in v:
+                        self._insert(k, item)
+                else:
+                    self._put(k, v)
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    @contextmanager
+    def _txn(self):
+        """Commit per mutation, or once at flush() inside batch()."""
+        self._begin()
+        if self._batch_depth:
+            yield self.conn
+        else:
+            with self.conn:
+                yield self.conn
+
+    def flush(self):
+        if self._conn is not None:
+            self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Mutations -----------------------------------------------------------------
+    def add(self, db, coll, item):
+        if coll not in ROW_TABLES:
+            db.setdefault(coll, []).append(item)
+            return self.set(db, coll, db[coll])
+        with self._txn():
+            self._insert(coll, item)
+        db.setdefault(coll, []).append(item)
+
+    def extend(self, db, coll, items):
+        if coll not in ROW_TABLES:
+            db.setdefault(coll, []).extend(items)
+            return self.set(db, coll, db[coll])
+        with self._txn():
+            for item in items:
+                self._insert(coll, item)
+        db.setdefault(coll, []).extend(items)
+
+    def set(self, db, key, value):
+        with self._txn():
+            self._put(key, value)
+        db[key] = value
+
+    def patch(self, db, coll, at, fields):
+        db[coll][at].update(fields)
+        if coll not in ROW_TABLES:
+            return self.set(db, coll, db[coll])
+        rowid = self._rowids[coll][at]
+        with self._txn():
+            self.conn.execute(f"DELETE FROM {coll} WHERE id = ?", (rowid,))
+            self._insert(coll, db[coll][at], rowid=rowid, track=False)
+
+    def delete(self, db, coll, at):
+        del db[coll][at]
+        if coll not in ROW_TABLES:
+            return self.set(db, coll, db[coll])
+        rowid = self._rowids[coll].pop(at)
+        with self._txn():
+            self.conn.execute(f"DELETE FROM {coll} WHERE id = ?", (rowid,))
+
+    def purge(self, db, coll):
+        if coll not in ROW_TABLES:
+            purge_list(db, coll)
+            return self.set(db, coll, db[coll])
+        dead = purge_list(db, coll)
+        if not dead:
+            return
+        rowids = self._rowids[coll]
+        with self._txn():
+            self.conn.executemany(f"DELETE FROM {coll} WHERE id = ?", [(rowids[i],) for i in dead])
+        gone = set(dead)
+        self._rowids[coll] = [r for i, r in enumerate(rowids) if i not in gone]
+
+    def incr(self, db, key, path, delta):
+        new = apply_incr(db, key, path, delta)
+        row = (key, json.dumps(path), None if new is None else json.dumps(new))
+        with self._txn():
+            self.conn.execute("INSERT OR REPLACE INTO counters (key, path, value) VALUES (?,?,?)", row)
+        self.bytes_written += len(row[1]) + len(row[2] or "")
+
+    def _insert(self, coll, item, rowid=None, track=True):
+        doc = json.dumps(item, ensure_ascii=False, default=jsonable)
+        self.bytes_written += len(doc)  # payload size; sqlite's own page writes aren't visible
+        if coll == "check_ins":
+            cur = self.conn.execute(
+                "INSERT INTO check_ins (id, ts, mood, stress, sleep, doc) VALUES (?,?,?,?,?,?)",
+                (rowid, item.get("ts", ""), item.get("mood"), item.get("stress"), item.get("sleep"), doc))
+        else:
+            eid = item.get("id")
+            cur = self.conn.execute(
+                "INSERT INTO entries (id, ts, kind, eid, trigger_key, doc) VALUES (?,?,?,?,?,?)",
+                (rowid, item.get("ts"), entry_kind(item) if is_live(item) else "deleted",
+                 eid if isinstance(eid, int) else None,
+                 trigger_key(item), doc))
+            self.conn.executemany("INSERT INTO tags (entry_id, tag) VALUES (?, ?)",
+                                  [(cur.lastrowid, t) for t in item.get("tags", ())])
+        if track:
+            self._rowids[coll].append(cur.lastrowid)
+
+    def _put(self, key, value):
+        if key == "system_score":
+            rows = [(k, json.dumps(v)) for k, v in value.items()]
+            self.conn.execute("DELETE FROM system_score")
+            self.conn.executemany("INSERT INTO system_score (key, value) VALUES (?, ?)", rows)
+            self.bytes_written += sum(len(v) for _, v in rows)
+        else:
+            doc = json.dumps(value, ensure_ascii=False)
+            self.conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, doc))
+            self.bytes_written += len(doc)
+
+    # --- Indexed queries -----------------------------------------------------------
+    def checkins_since(self, db, ts):
+        rows = self.conn.execute("SELECT doc FROM check_ins WHERE ts >= ? ORDER BY ts", (ts,))
+        return [json.loads(r[0]) for r in rows]
+
+    def recent_entries(self, db, n):
+        rows = self.conn.execute("SELECT doc FROM entries WHERE kind != 'deleted' ORDER BY id DESC LIMIT ?", (n,)).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+    def entries_with_tag(self, db, tag):
+        rows = self.conn.execute(
+            "SELECT e.doc FROM tags t JOIN entries e ON e.id = t.entry_id "
+            "WHERE t.tag = ? AND e.kind != 'deleted' ORDER BY e.id", (tag,))
+        return [json.loads(r[0]) for r in rows]
+
+    def entry_positions(self, db, entry_id):
+        ids = self._rowids["entries"]
+        rows = self.conn.execute("SELECT id FROM entries WHERE eid = ? AND kind != 'deleted' ORDER BY id", (entry_id,))
+        return [bisect.bisect_left(ids, r[0]) for r in rows]
+
+    def trigger_counts(self, db, limit=3):
+        return self.conn.execute(
+            "SELECT trigger_key, COUNT(*) FROM entries WHERE trigger_key IS NOT NULL AND kind != 'deleted' "
+            "GROUP BY trigger_key ORDER BY COUNT(*) DESC LIMIT ?", (limit,)).fetchall()
+
+
+def migrate_json(json_path, db_path):
+    """Copy a JSON data file (snapshot + .wal tail, and any archived months) into a fresh SQLite store."""
+    from psychbot.partitions import PartitionedLog
+    db = PartitionedLog(json_path).load(default={})
+    store = SqliteStore(db_path)
+    store.compact(db)
+    store.close()
+    return {k: len(v) for k, v in db.items() if k in ROW_TABLES}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m psychbot.sqlite_store <data.json> <data.db>")
+    print("✓ Migrated:", migrate_json(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,253 @@
+"""
+Storage backends for Psych Bot.
+
+Every backend speaks the same small mutation API (add / set / patch /
+delete on an in-memory db dict) plus a handful of read queries. The base
+class answers the queries by scanning the in-memory db; backends with an
+index (SQLite) override them with indexed lookups.
+
+Pick a backend with ``PSYCHBOT_BACKEND=json|sqlite`` (default: json).
+"""
+
+import os, re
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def entry_kind(e):
+    """'reframe' or 'journal' — the editions mark reframes with a trigger/reframe field."""
+    return "reframe" if (e.get("trigger") or "reframe" in e) else "journal"
+
+
+_HASHTAG = re.compile(r"#([^\W_][\w-]*)")
+
+
+def entry_tags(e):
+    """Lower-cased tags: the ``tags`` field plus ``#hashtags`` in the entry text."""
+    tags = {t.lower() for t in e.get("tags", ()) if t}
+    text = e.get("text") or e.get("journal") or ""
+    tags.update(t.lower() for t in _HASHTAG.findall(text))
+    return tags
+
+
+def is_live(e):
+    """False for a tombstoned (deleted, not yet purged) entry."""
+    return "deleted" not in e
+
+
+def purge_list(db, coll):
+    """Drop tombstones from db[coll]; returns the positions that were removed."""
+    items = db.get(coll, [])
+    retain = getattr(items, "retain", None)
+    if retain is not None:
+        return retain(is_live)  # psychbot.partitions.PartitionedList
+    dead = [i for i, e in enumerate(items) if not is_live(e)]
+    if dead:
+        items[:] = [e for e in items if is_live(e)]  # in place: indexes key on the list
+    return dead
+
+
+def purge_deleted(db):
+    """Before a full rewrite: drop tombstoned entries so deleted text leaves the disk."""
+    if not purge_list(db, "entries"):
+        return False
+    from psychbot.journal import META_KEY  # journal builds on this module
+    if META_KEY in db:
+        db[META_KEY] = {**db[META_KEY], "dead": 0}
+    return True
+
+
+def segments(items, since=None, until=None, entry_id=None):
+    """``(start, first_ts, last_ts, load)`` for each stored piece of a collection that can
+    hold items dated ``since..until`` (or the entry ``entry_id``); ``load()`` returns the piece.
+
+    A plain list is one piece with unknown bounds. A PartitionedList (see
+    psychbot.partitions) also returns its archived months, oldest first,
+    reading each one only when ``load()`` is called.
+    """
+    parts = getattr(items, "segments", None)
+    if parts is not None:
+        return parts(since, until, entry_id)
+    return [(0, None, None, lambda: items)]
+
+
+def trigger_key(e):
+    t = e.get("trigger")
+    return t.lower()[:40] if t else None
+
+
+def apply_incr(db, key, path, delta):
+    """Add ``delta`` (number or list of numbers) to the leaf at db[key][path...].
+
+    Leaves that drop to zero (or whose first slot, the count, does) are
+    removed so counters stay as small as the live data. Returns the new leaf
+    value, or None if it was removed.
+    """
+    node = db.setdefault(key, {})
+    for p in path[:-1]:
+        node = node.setdefault(p, {})
+    leaf = path[-1]
+    if isinstance(delta, list):
+        cur = node.get(leaf) or [0] * len(delta)
+        new = [a + b for a, b in zip(cur, delta)]
+        dead = new[0] <= 0
+    else:
+        new = node.get(leaf, 0) + delta
+        dead = new <= 0
+    if dead:
+        node.pop(leaf, None)
+        return None
+    node[leaf] = new
+    return new
+
+
+class ConflictError(RuntimeError):
+    """Another process wrote the store since this one last read it.
+
+    Nothing from the failed write was persisted, but the in-memory db has
+    been touched: reload it and re-run the command.
+    """
+
+
+class Store:
+    """Interface shared by all backends."""
+
+    _batch_depth = 0
+    fsync = False  # force each flush to disk (set by durability=strict)
+    bytes_written = 0  # running total, for psychbot.metrics
+
+    # --- Lifecycle ---------------------------------------------------------------
+    def load(self, default):
+        raise NotImplementedError
+
+    def compact(self, db):
+        """Rewrite the whole store from ``db``."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def flush(self):
+        """Persist anything held back by batch()."""
+
+    # --- Sharing one store between processes -------------------------------------
+    def stale(self):
+        """Cheap check: has another process written since our last load/refresh?"""
+        return False
+
+    def refresh(self, db):
+        """Catch ``db`` up with other processes' writes in place.
+
+        Returns False when that isn't possible incrementally and the caller
+        has to reload.
+        """
+        return True
+
+    @contextmanager
+    def batch(self, lock=True):
+        """Hold every mutation in the block and persist them in one flush at the end.
+
+        ``lock=False`` leaves taking the write lock to that flush, for blocks
+        that wait on the user: the writes still land together or, on a
+        ConflictError, not at all.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    # --- Mutations (apply to ``db`` and persist) --------------------------------
+    def add(self, db, coll, item):
+        raise NotImplementedError
+
+    def extend(self, db, coll, items):
+        """Bulk append; backends write the whole batch at once."""
+        for item in items:
+            self.add(db, coll, item)
+
+    def set(self, db, key, value):
+        raise NotImplementedError
+
+    def patch(self, db, coll, at, fields):
+        raise NotImplementedError
+
+    def delete(self, db, coll, at):
+        raise NotImplementedError
+
+    def purge(self, db, coll):
+        """Physically drop tombstoned items from ``db[coll]`` (see psychbot.journal)."""
+        raise NotImplementedError
+
+    def incr(self, db, key, path, delta):
+        """Bump a counter leaf under db[key]; backends persist just the leaf."""
+        apply_incr(db, key, path, delta)
+        self.set(db, key, db[key])
+
+    def apply(self, db, mutations):
+        """Apply mutation dicts (same shapes as the WAL records, minus ``n``) in order."""
+        for m in mutations:
+            op = m["op"]
+            if op == "add":
+                self.add(db, m["coll"], m["item"])
+            elif op == "ext":
+                self.extend(db, m["coll"], m["items"])
+            elif op == "set":
+                self.set(db, m["key"], m["value"])
+            elif op == "patch":
+                self.patch(db, m["coll"], m["at"], m["fields"])
+            elif op == "del":
+                self.delete(db, m["coll"], m["at"])
+            elif op == "inc":
+                self.incr(db, m["key"], m["path"], m["delta"])
+            elif op == "purge":
+                self.purge(db, m["coll"])
+            else:
+                raise ValueError(f"unknown mutation op: {op!r}")
+
+    # --- Queries -------------------------------------------------------------------
+    def checkins_since(self, db, ts):
+        """Check-ins with ``ts >= ts`` (ISO strings compare chronologically)."""
+        return [c for *_, load in segments(db["check_ins"], since=ts) for c in load() if c["ts"] >= ts]
+
+    def recent_entries(self, db, n):
+        return [e for e in db["entries"][-n:] if is_live(e)]
+
+    def entries_with_tag(self, db, tag):
+        return [e for e in db["entries"] if tag in e.get("tags", ()) and is_live(e)]
+
+    def entry_positions(self, db, entry_id):
+        """List positions of live entries whose ``id`` field equals ``entry_id``."""
+        return [i for i, e in enumerate(db["entries"]) if e.get("id") == entry_id and is_live(e)]
+
+    def trigger_counts(self, db, limit=3):
+        """Most frequent reframe triggers as ``[(key, count), ...]``."""
+        trig = {}
+        for e in filter(is_live, db["entries"]):
+            key = trigger_key(e)
+            if key:
+                trig[key] = trig.get(key, 0) + 1
+        return sorted(trig.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+
+def open_store(path, backend=None):
+    """Open the configured backend for a JSON data path.
+
+    Opening touches no files; that waits for the first load or write. The
+    SQLite backend lives next to the JSON file (``psych_data.db``) and is
+    migrated from it once, the first time it is used.
+    """
+    backend = (backend or os.environ.get("PSYCHBOT_BACKEND") or "json").lower()
+    path = Path(path)
+    if backend == "sqlite":
+        from psychbot.sqlite_store import SqliteStore
+        return SqliteStore(path.with_suffix(".db"), migrate_from=path)
+    if backend == "json":
+        from psychbot.wal import RecordLog
+        return RecordLog(path)
+    if backend == "partitioned":
+        from psychbot.partitions import PartitionedLog
+        return PartitionedLog(path)
+    raise ValueError(f"unknown storage backend: {backend!r}")
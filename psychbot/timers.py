@@ -0,0 +1,222 @@
+"""
+Timers and reminders that survive restarts: breathing cues, action timers, nudges.
+
+Pending timers live in the db under ``timers`` (one dict each: id, UTC
+``due``, kind, text, and for nudges the entry they follow up), so they are
+written through the store like any other data and a crash loses nothing.
+Ids come from a counter under ``timer_seq`` and are never reused.
+
+A heap of ``(due, id)`` per timer list answers "what's due?" and "when is
+the next one?" without scanning; it is rebuilt only when a timer was
+removed, so thousands of pending timers cost one heap push each. Nothing
+here sleeps: adapters call ``fire()`` between commands, and the terminal
+REPLs also run a Ticker thread that wakes when the next timer is due. Their
+Tickers idle until a command has loaded the data, so starting one reads
+nothing.
+
+Kinds:
+    breathe   paced breathing cue; dropped (not replayed) if more than a
+              minute late, e.g. after a restart
+    action    "your 10 minutes are up"
+    nudge     follow-up on an entry; skipped once the entry has a result
+"""
+
+import datetime as dt, heapq, threading
+from collections import OrderedDict
+
+from psychbot import journal as jr
+
+KEY = "timers"
+SEQ_KEY = "timer_seq"
+DROP_IF_LATE = {"breathe": 60}  # seconds
+LATE_NOTE = 60  # say when a reminder fires this late
+_MAX_HEAPS = 64
+
+
+def _utc(now):
+    """Naive local (what handlers get) or aware -> aware UTC."""
+    return now.astimezone(dt.timezone.utc)
+
+
+def _iso(t):
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse(due):
+    return dt.datetime.strptime(due, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=dt.timezone.utc)
+
+
+def local_time(t):
+    """``HH:MM`` local time a timer is due (with the date if not today)."""
+    when = _parse(t["due"]).astimezone()
+    fmt = "%H:%M" if when.date() == dt.date.today() else "%Y-%m-%d %H:%M"
+    return when.strftime(fmt)
+
+
+# --- Heap over one timer list ----------------------------------------------------
+class _TimerHeap:
+    __slots__ = ("timers", "heap", "n", "last")
+
+    def __init__(self, timers):
+        self.timers = timers
+        self.rebuild()
+
+    def rebuild(self):
+        self.heap = [(t["due"], t["id"]) for t in self.timers]
+        heapq.heapify(self.heap)
+        self.n = len(self.timers)
+        self.last = self.timers[-1]["id"] if self.timers else None
+
+    def sync(self):
+        """Catch up with the list: push appends, rebuild after any removal."""
+        timers, n = self.timers, self.n
+        if len(timers) < n or (n and timers[n - 1]["id"] != self.last):
+            self.rebuild()  # ids only grow, so a changed tail means something was removed
+        elif len(timers) > n:
+            for t in timers[n:]:
+                heapq.heappush(self.heap, (t["due"], t["id"]))
+            self.n = len(timers)
+            self.last = timers[-1]["id"]
+        return self
+
+    def due(self, cutoff):
+        """``(due, id)`` pairs with ``due <= cutoff``; walks only the heap's due part."""
+        heap, out, stack = self.heap, [], [0] if self.heap else []
+        while stack:
+            i = stack.pop()
+            if heap[i][0] <= cutoff:
+                out.append(heap[i])
+                stack.extend(j for j in (2 * i + 1, 2 * i + 2) if j < len(heap))
+        return sorted(out)
+
+
+_HEAPS = OrderedDict()  # id(timer list) -> _TimerHeap
+
+
+def _heap(timers):
+    h = _HEAPS.get(id(timers))
+    if h is None or h.timers is not timers:
+        h = _HEAPS[id(timers)] = _TimerHeap(timers)
+        if len(_HEAPS) > _MAX_HEAPS:
+            _HEAPS.popitem(last=False)
+    _HEAPS.move_to_end(id(timers))
+    return h.sync()
+
+
+# --- Scheduling --------------------------------------------------------------------
+def schedule(state, now, items):
+    """Mutations adding timers; ``items`` are ``(delay seconds, kind, text, extra fields)``."""
+    seq, base, muts = state.get(SEQ_KEY, 0), _utc(now), []
+    for delay, kind, text, extra in items:
+        seq += 1
+        due = base + dt.timedelta(seconds=delay)
+        if due.microsecond:  # ``due`` keeps whole seconds: round up, never fire early
+            due += dt.timedelta(microseconds=1_000_000 - due.microsecond)
+        item = {"id": seq, "due": _iso(due), "kind": kind,
+                "text": text, **extra}
+        muts.append({"op": "add", "coll": KEY, "item": item})
+    muts.append({"op": "set", "key": SEQ_KEY, "value": seq})
+    return muts
+
+
+def pending(state):
+    """Pending timers, soonest first."""
+    timers = state.get(KEY) or []
+    return sorted(timers, key=lambda t: (t["due"], t["id"]))
+
+
+def cancel(state, timer_id):
+    """Mutations removing timer ``timer_id``, or None if there is no such timer."""
+    for i, t in enumerate(state.get(KEY) or ()):
+        if t["id"] == timer_id:
+            return [{"op": "del", "coll": KEY, "at": i}]
+    return None
+
+
+def next_due(state, now):
+    """Seconds until the next timer is due (0 if overdue), or None if none is pending."""
+    timers = state.get(KEY)
+    if not timers:
+        return None
+    heap = _heap(timers).heap
+    if not heap:
+        return None
+    return max(0.0, (_parse(heap[0][0]) - _utc(now)).total_seconds())
+
+
+def fire(state, now):
+    """``(messages, mutations)`` for the timers due at ``now``; the mutations remove them."""
+    timers = state.get(KEY)
+    if not timers:
+        return [], []
+    now = _utc(now)
+    ids = {i for _, i in _heap(timers).due(_iso(now))}
+    if not ids:
+        return [], []
+    at = [i for i, t in enumerate(timers) if t["id"] in ids]
+    muts = [{"op": "del", "coll": KEY, "at": i} for i in reversed(at)]  # highest first: positions hold
+    msgs = []
+    for t in sorted((timers[i] for i in at), key=lambda t: (t["due"], t["id"])):
+        msg = _message(state, t, (now - _parse(t["due"])).total_seconds())
+        if msg:
+            msgs.append(msg)
+    return msgs, muts
+
+
+def _message(state, t, late):
+    if late > DROP_IF_LATE.get(t["kind"], float("inf")):
+        return None
+    if t["kind"] == "nudge":
+        at = jr.find(state.get("entries", []), t.get("entry"))
+        if at is None or state["entries"][at].get("result"):
+            return None  # deleted, or already followed up
+    text = t["text"]
+    if late > LATE_NOTE:
+        text += f" (was due {local_time(t)})"
+    return text
+
+
+# --- Background delivery (terminal REPLs) ------------------------------------------
+class Ticker:
+    """Daemon thread that calls ``fire()`` when ``next_due()`` says a timer is due.
+
+    ``lock`` is the one the REPL holds while it runs a command, so timers
+    never fire halfway through one; ``poke()`` after a command that may have
+    added a timer so the wait is recomputed.
+    """
+
+    def __init__(self, lock, fire, next_due, out=print, idle=30.0):
+        self.lock = lock
+        self.fire = fire
+        self.next_due = next_due
+        self.out = out
+        self.idle = idle
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="psychbot-timers", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def poke(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop = True
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop:
+            try:
+                with self.lock:
+                    wait = self.next_due()
+                self._wake.wait(self.idle if wait is None else min(wait, self.idle))
+                self._wake.clear()
+                if self._stop:
+                    break
+                with self.lock:
+                    for msg in self.fire():
+                        self.out(msg)
+            except Exception:  # a reminder must never kill the REPL; try again next tick
+                self._wake.wait(self.idle)
@@ -0,0 +1,252 @@
+"""
+Trend analytics over the check-in history (/trends).
+
+    rolling   mood / stress / sleep means over the last 7, 30 and 90 days,
+              each with the change against the window before it
+    links     Pearson r for sleep↔mood and stress↔mood across all check-ins
+    weekdays  mean mood per day of the week
+    unusual   days in the last 30 whose mean mood, stress or sleep is ≥ 2
+              standard deviations from the history's daily means
+
+The only O(check-ins) step is one reduction to per-day sums plus the
+correlation sums. It runs vectorized over the CheckinLog arrays when
+NumPy is installed (zero-copy via the buffer protocol) and as a plain
+loop otherwise; everything after it works on the per-day table, which is
+a few thousand rows even for years of history. ``--from``/``--to`` limit
+the history to a date range; with partitioned storage only the months in
+it are read.
+"""
+
+import datetime as dt
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+from psychbot.checkins import EPOCH, CheckinLog
+from psychbot.store import segments
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python path gives the same numbers
+    np = None
+
+WINDOWS = (7, 30, 90)
+Z_FLAG = 2.0
+FLAG_DAYS = 30
+MIN_BASELINE_DAYS = 14
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+METRICS = ("mood", "stress", "sleep")
+
+
+def _series(check_ins, since=None, until=None):
+    """``(ts, mood, stress, sleep)`` arrays; ts in epoch seconds, NaN sleep = not recorded.
+
+    Reads only the stored pieces that overlap ``since..until`` (dates); rows
+    outside the range get a NaN ts, which the reductions skip.
+    """
+    parts = [_columns(load()) for *_, load in
+             segments(check_ins, since and since.isoformat(), until and until.isoformat())]
+    if len(parts) == 1:
+        cols = parts[0]
+    else:  # one array per column; mixed piece types fall back to float64
+        cols = []
+        for k in range(4):
+            codes = {p[k].typecode for p in parts}
+            col = array(codes.pop() if len(codes) == 1 else "d")
+            for p in parts:
+                col.extend(p[k] if p[k].typecode == col.typecode else iter(p[k]))
+            cols.append(col)
+    if since or until:
+        lo = (dt.datetime.combine(since, dt.time()) - EPOCH).total_seconds() if since else -math.inf
+        hi = (dt.datetime.combine(until, dt.time()) - EPOCH).total_seconds() + 86400 if until else math.inf
+        cols = [array("d", (t if lo <= t < hi else math.nan for t in cols[0])), *cols[1:]]
+    return tuple(cols)
+
+
+def _columns(check_ins):
+    if isinstance(check_ins, CheckinLog) and not check_ins.irregular:
+        cols = check_ins.columns()
+        return cols["ts"], cols["mood"], cols["stress"], cols["sleep"]
+    ts, mood, stress, sleep = array("d"), array("d"), array("d"), array("d")
+    for c in check_ins:
+        try:
+            sec = (dt.datetime.fromisoformat(c["ts"].rstrip("Z")) - EPOCH).total_seconds()
+            m, s = float(c["mood"]), float(c["stress"])
+        except (KeyError, TypeError, ValueError):
+            continue  # tz-aware or malformed: skip rather than guess
+        ts.append(sec); mood.append(m); stress.append(s)
+        sleep.append(float(c.get("sleep", math.nan)))
+    return ts, mood, stress, sleep
+
+
+# --- Reduction: per-day sums + correlation sums ------------------------------------
+# days: {day number: [n, mood_sum, stress_sum, sleep_n, sleep_sum]}
+
+def _reduce_numpy(ts, mood, stress, sleep):
+    if not len(ts):
+        return {}, {"sleep": None, "stress": None}
+    t = np.frombuffer(ts, dtype=ts.typecode)
+    ok = ~np.isnan(t)
+    day = np.floor_divide(t[ok], 86400).astype(np.int64)
+    m = np.frombuffer(mood, dtype=mood.typecode)[ok].astype(np.float64)
+    s = np.frombuffer(stress, dtype=stress.typecode)[ok].astype(np.float64)
+    sl = np.frombuffer(sleep, dtype=sleep.typecode)[ok].astype(np.float64)
+    if not len(day):
+        return {}, {"sleep": None, "stress": None}
+    lo = int(day.min())
+    idx = day - lo
+    has_sleep = ~np.isnan(sl)
+    sl0 = np.where(has_sleep, np.round(sl, 6), 0.0)
+    cols = [np.bincount(idx, weights=w, minlength=int(idx.max()) + 1)
+            for w in (None, m, s, has_sleep.astype(np.float64), sl0)]
+    present = np.nonzero(cols[0])[0]
+    days = {int(i) + lo: [float(c[i]) for c in cols] for i in present}
+    links = {"sleep": _pearson_numpy(sl0[has_sleep], m[has_sleep]),
+             "stress": _pearson_numpy(s, m)}
+    return days, links
+
+
+def _pearson_numpy(x, y):
+    if len(x) < 3 or not x.std() or not y.std():
+        return None
+    return float(np.corrcoef(x, y)[0, 1])
+
+
+def _reduce_python(ts, mood, stress, sleep):
+    days = {}
+    pairs = {"sleep": [0, 0.0, 0.0, 0.0, 0.0, 0.0], "stress": [0, 0.0, 0.0, 0.0, 0.0, 0.0]}
+    ps, pt = pairs["sleep"], pairs["stress"]
+    for sec, m, s, sl in zip(ts, mood, stress, sleep):
+        if sec != sec:
+            continue
+        d = days.get(sec // 86400)
+        if d is None:
+            d = days[sec // 86400] = [0.0, 0.0, 0.0, 0.0, 0.0]
+        d[0] += 1; d[1] += m; d[2] += s
+        pt[0] += 1; pt[1] += s; pt[2] += m; pt[3] += s * s; pt[4] += m * m; pt[5] += s * m
+        if sl == sl:
+            sl = round(sl, 6)
+            d[3] += 1; d[4] += sl
+            ps[0] += 1; ps[1] += sl; ps[2] += m; ps[3] += sl * sl; ps[4] += m * m; ps[5] += sl * m
+    return {int(k): v for k, v in days.items()}, {k: _pearson(*v) for k, v in pairs.items()}
+
+
+def _pearson(n, sx, sy, sxx, syy, sxy):
+    if n < 3:
+        return None
+    vx, vy = n * sxx - sx * sx, n * syy - sy * sy
+    if vx <= 1e-12 or vy <= 1e-12:
+        return None
+    return (n * sxy - sx * sy) / math.sqrt(vx * vy)
+
+
+def daily_sums(check_ins, use_numpy=None, since=None, until=None):
+    """``(days, links)`` for a check-in list or CheckinLog (optionally within ``since..until``)."""
+    use_numpy = np is not None if use_numpy is None else use_numpy
+    series = _series(check_ins, since, until)
+    return (_reduce_numpy if use_numpy else _reduce_python)(*series)
+
+
+# --- Per-day analysis (pure Python, small) -----------------------------------------
+def _day_name(d):
+    return (EPOCH + dt.timedelta(days=d)).date().isoformat()
+
+
+def _window(keys, prefix, first, last):
+    """Summed day rows with first <= day <= last, from prefix sums."""
+    i, j = bisect_left(keys, first), bisect_right(keys, last)
+    return [b - a for a, b in zip(prefix[i], prefix[j])]
+
+
+def _means(row):
+    n, m, s, sn, sl = row
+    return {"n": int(n), "mood": m / n if n else None, "stress": s / n if n else None,
+            "sleep": sl / sn if sn else None}
+
+
+def analyze(check_ins, today=None, use_numpy=None, since=None, until=None):
+    """The /trends report as a dict (see render); windows end at ``until`` if it is earlier."""
+    today = min(today or dt.date.today(), until or dt.date.max)
+    t = (dt.datetime.combine(today, dt.time()) - EPOCH).days
+    days, links = daily_sums(check_ins, use_numpy, since, until)
+    keys = sorted(days)
+    prefix = [[0.0] * 5]
+    for k in keys:
+        prefix.append([a + b for a, b in zip(prefix[-1], days[k])])
+
+    rolling = []
+    for w in WINDOWS:
+        cur = _means(_window(keys, prefix, t - w + 1, t))
+        prev = _means(_window(keys, prefix, t - 2 * w + 1, t - w))
+        cur["days"] = w
+        cur["change"] = {k: cur[k] - prev[k] for k in METRICS
+                         if cur[k] is not None and prev[k] is not None}
+        rolling.append(cur)
+
+    week = [[0.0, 0.0] for _ in WEEKDAYS]
+    for k in keys:
+        wd = week[(k + 3) % 7]  # 1970-01-01 was a Thursday
+        wd[0] += days[k][0]; wd[1] += days[k][1]
+    weekdays = {WEEKDAYS[i]: (n and m / n, int(n)) for i, (n, m) in enumerate(week) if n}
+
+    unusual = []
+    daily = {k: _means(days[k]) for k in keys}
+    if len(keys) >= MIN_BASELINE_DAYS:
+        for metric in METRICS:
+            vals = [v[metric] for v in daily.values() if v[metric] is not None]
+            if len(vals) < MIN_BASELINE_DAYS:
+                continue
+            mean = sum(vals) / len(vals)
+            sd = math.sqrt(sum((x - mean) ** 2 for x in vals) / len(vals))
+            if sd < 1e-9:
+                continue
+            for k in keys[bisect_left(keys, t - FLAG_DAYS + 1):bisect_right(keys, t)]:
+                v = daily[k][metric]
+                if v is not None and abs(v - mean) / sd >= Z_FLAG:
+                    unusual.append({"day": _day_name(k), "metric": metric, "value": v,
+                                    "z": (v - mean) / sd})
+        unusual.sort(key=lambda u: -abs(u["z"]))
+
+    return {"checkins": int(prefix[-1][0]), "days": len(keys), "rolling": rolling,
+            "links": links, "weekdays": weekdays, "unusual": unusual,
+            "since": since and since.isoformat(), "until": until and until.isoformat()}
+
+
+# --- Text ----------------------------------------------------------------------------
+def _strength(r):
+    a = abs(r)
+    return "strong" if a >= 0.5 else "moderate" if a >= 0.3 else "weak" if a >= 0.1 else "none"
+
+
+def _fmt(v, change, unit=""):
+    if v is None:
+        return "—"
+    return f"{v:.1f}{unit}" + (f" ({change:+.1f})" if change is not None else "")
+
+
+def render(report, unusual_limit=5):
+    if not report["checkins"]:
+        return "No check-ins yet. Try /checkin to start tracking trends."
+    span = (f" ({report.get('since') or '…'} → {report.get('until') or 'today'})"
+            if report.get("since") or report.get("until") else "")
+    lines = [f"📈 Trends — {report['checkins']} check-ins over {report['days']} days{span}"]
+    for r in report["rolling"]:
+        ch = r["change"]
+        lines.append(f"• Last {r['days']}d (n={r['n']}): mood {_fmt(r['mood'], ch.get('mood'))}"
+                     f" • stress {_fmt(r['stress'], ch.get('stress'))}"
+                     f" • sleep {_fmt(r['sleep'], ch.get('sleep'), 'h')}")
+    links = [f"{name} ↔ mood r={r:+.2f} ({_strength(r)})"
+             for name, r in (("Sleep", report["links"]["sleep"]), ("Stress", report["links"]["stress"]))
+             if r is not None]
+    if links:
+        lines.append("• " + "  |  ".join(links))
+    wd = report["weekdays"]
+    if len(wd) >= 2:
+        best = max(wd, key=lambda d: wd[d][0])
+        worst = min(wd, key=lambda d: wd[d][0])
+        lines.append(f"• Best day: {best} (mood {wd[best][0]:.1f}) • Toughest: {worst} (mood {wd[worst][0]:.1f})")
+        lines.append("  " + " · ".join(f"{d} {m:.1f}" for d, (m, _) in wd.items()))
+    for u in report["unusual"][:unusual_limit]:
+        unit = "h" if u["metric"] == "sleep" else ""
+        lines.append(f"⚠️ {u['day']}: {u['metric']} {u['value']:.1f}{unit} (z {u['z']:+.1f})")
+    return "\n".join(lines)
@@ -0,0 +1,84 @@
+import os, sys
+from contextlib import ExitStack
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from psychbot.session import Workspace, activate  # noqa: E402
+
+BACKENDS = ("json", "sqlite", "partitioned")
+
+
+class Bot:
+    """The command edition run against its own data file, as the server does per user."""
+
+    def __init__(self, path, backend="json"):
+        import psych_bot
+        self.bot = psych_bot
+        self.path, self.backend = Path(path), backend
+        self._stack = ExitStack()
+        self.open()
+
+    def open(self):
+        self.ws = Workspace(self.path, loader=self.bot._load, export_dir=self.path.parent / "exports",
+                            backend=self.backend, durability="strict")
+        self._stack.enter_context(activate(self.ws))
+
+    def close(self):
+        self.ws.close()
+        self._stack.close()
+
+    def restart(self):
+        """Close everything and open the data file again, like a new process."""
+        self.close()
+        self.open()
+
+    def run(self, line):
+        return self.bot.dispatch(line, interactive=False)
+
+    @property
+    def state(self):
+        return self.ws.state
+
+    @property
+    def store(self):
+        return self.ws.store
+
+    def ids(self, line="/journal list --limit 500"):
+        """Entry ids a listing shows, in order."""
+        return [int(w[1:]) for w in self.run(line).split() if w.startswith("#") and w[1:].isdigit()]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the editions resolve their default paths against the cwd
+    monkeypatch.delenv("PSYCHBOT_BACKEND", raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def make_bot(workdir):
+    bots = []
+
+    def make(backend="json", name="psych_data.json"):
+        bot = Bot(workdir / name, backend)
+        bots.append(bot)
+        return bot
+
+    yield make
+    for bot in bots:
+        bot.close()
+
+
+@pytest.fixture(params=BACKENDS)
+def bot(request, make_bot):
+    return make_bot(request.param)
+
+
+def write_csv(path, rows, fields=("type", "ts", "mood", "stress", "sleep", "note", "kind", "text", "tags")):
+    lines = [",".join(fields)] + [",".join(str(r.get(f, "")) for f in fields) for r in rows]
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return os.fspath(path)
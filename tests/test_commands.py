@@ -0,0 +1,26 @@
+def test_commands_without_data_touch_no_files(make_bot, workdir):
+    bot = make_bot()
+    assert "/checkin" in bot.run("/help")
+    bot.run("/breathe")
+    bot.run("/nope")
+    assert not bot.state.loaded
+    assert list(workdir.iterdir()) == []
+
+
+def test_a_command_is_one_write(make_bot, monkeypatch):
+    bot = make_bot()
+    bot.run("/journal list")  # load first: the one-time upgrade steps write on their own
+    checks = []
+    real = bot.store._check_version
+    monkeypatch.setattr(bot.store, "_check_version", lambda: checks.append(1) or real())
+    bot.run("/checkin mood=3 stress=2 sleep=7")  # check-in, score and aggregate records
+    assert len(checks) == 1
+
+
+def test_another_process_sees_the_write(make_bot):
+    a = make_bot()
+    b = make_bot()  # same data file, its own store and state
+    a.run("/journal add from a")
+    assert b.ids() == [1]
+    b.run("/journal add from b")
+    assert a.ids() == [1, 2]
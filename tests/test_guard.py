@@ -0,0 +1,26 @@
+from psychbot.guard import MATCHER, screen, screen_many
+
+
+def test_each_edition_keeps_its_own_phrases():
+    text = "I just want to end it with this project"
+    assert screen(text, "casual") == ["self_harm"]
+    assert screen(text, "classic") == [] and screen(text, "command") == []
+    assert screen("selfharm", "classic") == ["self_harm"] and screen("selfharm", "command") == []
+
+
+def test_whole_words_only():
+    assert screen("I feel suicidal") == []
+    assert screen("thinking about SUICIDE") == ["self_harm"]
+    assert screen("I might hurt someone, or kill myself") == ["self_harm", "harm_others"]
+
+
+def test_screen_many_matches_screening_one_by_one():
+    texts = ["fine", "", None, "no reason to live", "kill them\nall", "ok then"]
+    assert screen_many(texts) == [MATCHER.categories(t) for t in texts]
+
+
+def test_the_command_edition_refuses_only_its_own_phrases(make_bot):
+    bot = make_bot()
+    assert "Added journal" in bot.run("/journal add I just want to end it with this project")
+    assert "Added journal" not in bot.run("/journal add I want to kill myself")
+    assert bot.ids() == [1]
@@ -0,0 +1,44 @@
+from conftest import write_csv
+
+
+def test_invalid_rows_are_counted_not_stored(make_bot, workdir):
+    bot = make_bot()
+    path = write_csv(workdir / "in.csv", [
+        {"type": "checkin", "ts": "2024-01-02T10:00:00", "mood": 3, "stress": 2, "sleep": 7},
+        {"type": "checkin", "ts": "2024-01-03T10:00:00Z", "mood": 4, "stress": 2},  # UTC, no sleep
+        {"type": "checkin", "ts": "yesterday", "mood": 3, "stress": 2, "sleep": 7},
+        {"type": "checkin", "ts": "2024-01-01T10:00:00+02:00", "mood": 3, "stress": 2, "sleep": 7},
+        {"type": "checkin", "ts": "2024-01-04T10:00", "mood": 9, "stress": 2, "sleep": 7},
+        {"type": "checkin", "ts": "", "mood": 3, "stress": 2, "sleep": 7},
+        {"type": "entry", "ts": "2024-01-02T11:00", "kind": "journal", "text": "first"},
+        {"type": "entry", "ts": "2024-01-02T11:00", "kind": "journal", "text": "first"},  # duplicate
+        {"type": "entry", "ts": "not a date", "kind": "journal", "text": "lost"},
+        {"type": "entry", "ts": "2024-01-05", "kind": "journal", "text": "second"},
+        {"type": "mystery", "ts": "2024-01-05"},
+    ])
+    reply = bot.run(f"/import {path}")
+    assert "4 added, 1 duplicates skipped, 6 invalid" in reply
+    reasons = [l.strip(" •").split(":")[0] for l in reply.splitlines() if l.startswith("  • row")]
+    assert reasons == ["row 3", "row 4", "row 5", "row 6", "row 9"]  # the first MAX_ERRORS
+    assert len(bot.state["check_ins"]) == 2 and "sleep" not in bot.state["check_ins"][1]
+    assert [(e["id"], e["text"]) for e in bot.state["entries"]] == [(1, "first"), (2, "second")]
+    assert "#3" in bot.run("/journal add after the import")  # rejected rows used up no ids
+
+
+def test_reimporting_an_export_adds_nothing(make_bot):
+    bot = make_bot()
+    bot.run("/checkin mood=3 stress=2 sleep=7")
+    bot.run("/journal add hello")
+    path = bot.run("/export csv").split("→ ")[1].strip()
+    assert "0 added, 2 duplicates skipped, 0 invalid" in bot.run(f"/import {path}")
+
+
+def test_imported_rows_feed_columnar_and_trends(make_bot, workdir):
+    bot = make_bot()
+    path = write_csv(workdir / "in.csv", [
+        {"type": "checkin", "ts": "2024-01-02T10:00:00", "mood": 3, "stress": 2, "sleep": 7},
+        {"type": "checkin", "ts": "2024-01-03T10:00:00Z", "mood": 4, "stress": 2},
+    ])
+    bot.run(f"/import {path}")
+    assert "(2 records)" in bot.run("/export columnar")
+    assert "No check-ins" not in bot.run("/trends --from 2024-01-01 --to 2024-01-31")
@@ -0,0 +1,76 @@
+import random
+
+from psychbot import journal as jr
+from psychbot.store import entry_kind, entry_tags, is_live
+
+
+def test_ids_are_never_reused(bot):
+    for w in ("one", "two", "three"):
+        bot.run(f"/journal add {w}")
+    bot.run("/journal delete 3")
+    bot.restart()
+    assert "#4" in bot.run("/journal add four")
+    assert bot.ids() == [1, 2, 4]
+
+
+def test_delete_compact_add_shows_up(bot):
+    for w in ("one", "two", "three"):
+        bot.run(f"/journal add {w}")
+    assert bot.ids() == [1, 2, 3]
+    bot.run("/journal delete 2")
+    bot.store.compact(bot.state)  # purges the tombstone: same length once #4 is in
+    bot.run("/journal add four")
+    assert bot.ids() == [1, 3, 4]
+    assert bot.ids("/journal search four") == [4]
+    assert bot.ids("/journal search two") == []
+    assert "Deleted" in bot.run("/journal delete 4")
+
+
+def test_deleted_text_leaves_the_disk_on_compaction(bot):
+    bot.run("/journal add keep this")
+    bot.run("/journal add secret words")
+    bot.run("/journal delete 2")
+    bot.store.compact(bot.state)
+    bot.close()
+    blobs = [p.read_bytes() for p in bot.path.parent.rglob("*") if p.is_file()]
+    assert not any(b"secret" in b for b in blobs)
+    bot.open()
+    assert bot.state["journal_meta"]["dead"] == 0
+
+
+def naive_page(entries, before=None, limit=10, kind=None, tag=None, since=None, until=None):
+    rows = sorted(entries, key=lambda e: (e["ts"], e["id"]))
+    if before is not None:
+        b = next(e for e in entries if e["id"] == before)
+        rows = [e for e in rows if (e["ts"], e["id"]) < (b["ts"], b["id"])]
+    rows = [e for e in rows if is_live(e) and (not kind or entry_kind(e) == kind)
+            and (not tag or tag in entry_tags(e)) and (not since or e["ts"] >= since)
+            and (not until or e["ts"][:len(until)] <= until)]
+    page = rows[-limit:]
+    return page, (page[0]["id"] if page and len(rows) > limit else None)
+
+
+def test_page_matches_a_full_sort():
+    rnd = random.Random(7)
+    for _ in range(500):
+        entries = []
+        for i in range(1, rnd.randint(0, 30) + 1):
+            e = {"id": i, "ts": f"2024-01-{rnd.randint(1, 5):02d}T00:00", "journal": "x",
+                 "tags": rnd.choice([[], ["w"]])}
+            if rnd.random() < 0.4:
+                e["deleted"] = "2024-02-01"
+            entries.append(e)
+        kw = dict(limit=rnd.randint(1, 6), tag=rnd.choice([None, "w"]),
+                  since=rnd.choice([None, "2024-01-02"]), until=rnd.choice([None, "2024-01-04"]))
+        if entries and rnd.random() < 0.5:
+            kw["before"] = rnd.choice(entries)["id"]
+        page, cursor = jr.page(entries, **kw)
+        want, want_cursor = naive_page(entries, **kw)
+        assert ([e["id"] for e in page], cursor) == ([e["id"] for e in want], want_cursor), kw
+
+
+def test_no_cursor_when_only_deleted_entries_are_older(bot):
+    bot.run("/journal add old")
+    bot.run("/journal add new")
+    bot.run("/journal delete 1")
+    assert "Older:" not in bot.run("/journal list --limit 1")
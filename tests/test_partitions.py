@@ -0,0 +1,74 @@
+import json
+
+from psychbot import partitions
+from psychbot.partitions import PartitionedList
+
+from conftest import write_csv
+
+
+def archived(make_bot, workdir):
+    """A partitioned store with Jan and Feb 2024 sealed into archives and two entries this month."""
+    bot = make_bot("partitioned")
+    path = write_csv(workdir / "old.csv", [
+        {"type": "checkin", "ts": "2024-01-02T10:00:00", "mood": 3, "stress": 2, "sleep": 7},
+        {"type": "checkin", "ts": "2024-02-02T10:00:00", "mood": 4, "stress": 1, "sleep": 8},
+        {"type": "entry", "ts": "2024-01-03T09:00", "kind": "journal", "text": "january"},
+        {"type": "entry", "ts": "2024-02-03T09:00", "kind": "journal", "text": "february"},
+    ])
+    bot.run(f"/import {path}")
+    bot.run("/journal add today")
+    bot.run("/journal add today again")
+    bot.store.compact(bot.state)
+    bot.restart()
+    return bot
+
+
+def opened(bot, coll="entries"):
+    return [a.opened for a in bot.state[coll].archives]
+
+
+def test_compaction_seals_older_months(make_bot, workdir):
+    bot = archived(make_bot, workdir)
+    entries = bot.state["entries"]
+    assert isinstance(entries, PartitionedList)
+    assert [a.meta["first"][:7] for a in entries.archives] == ["2024-01", "2024-02"]
+    assert len(entries.hot) == 2 and len(entries) == 4
+    snap = json.loads(bot.path.read_text(encoding="utf-8"))
+    assert [e["text"] for e in snap["entries"]] == ["today", "today again"]
+    files = sorted(p.name for p in (workdir / "psych_data.json.archive").iterdir())
+    assert len(files) == 4 and all(f.endswith(".gz") for f in files)
+
+
+def test_archives_open_only_when_a_query_reaches_them(make_bot, workdir):
+    bot = archived(make_bot, workdir)
+    assert opened(bot) == [False, False] and opened(bot, "check_ins") == [False, False]
+    assert bot.ids("/journal list --limit 1") == [4]  # its "Older:" check stays in the hot list too
+    month = bot.state["entries"].hot[0]["ts"][:7]
+    bot.run(f"/export csv --since {month}")
+    bot.run(f"/export columnar --since {month}")
+    assert opened(bot) == [False, False] and opened(bot, "check_ins") == [False, False]
+    assert bot.ids("/journal list --limit 1 --before 3") == [2]  # looks one further: into Jan
+    assert opened(bot) == [True, True]
+    assert opened(bot, "check_ins") == [False, False]
+    assert "(2 records)" in bot.run("/export ndjson --until 2024-01")
+    assert opened(bot, "check_ins") == [True, False]
+
+
+def test_edits_to_an_archived_entry_survive(make_bot, workdir):
+    bot = archived(make_bot, workdir)
+    bot.run("/journal delete 1")
+    bot.store.compact(bot.state)
+    bot.restart()
+    assert bot.ids() == [2, 3, 4]
+    assert [a.meta["first"][:7] for a in bot.state["entries"].archives] == ["2024-02"]  # Jan emptied
+
+
+def test_merge_puts_everything_back_in_one_file(make_bot, workdir):
+    bot = archived(make_bot, workdir)
+    bot.close()
+    partitions.main(["--merge", str(bot.path)])
+    snap = json.loads(bot.path.read_text(encoding="utf-8"))
+    assert [e["text"] for e in snap["entries"]] == ["january", "february", "today", "today again"]
+    assert "_partitions" not in snap
+    bot.open()
+    assert bot.ids() == [1, 2, 3, 4]
@@ -0,0 +1,52 @@
+import json
+
+from psychbot import search
+
+
+def test_short_entries_rank_first_even_after_deletes(make_bot):
+    bot = make_bot()
+    bot.run("/journal add zebra one two three four five six seven")
+    bot.run("/journal add zebra")
+    for i in range(6):
+        bot.run(f"/journal add filler{i} words")
+    for w in ("zebra stripes", "zebra again", "zebra more"):
+        bot.run(f"/journal add {w}")
+    for eid in (9, 10, 11):
+        bot.run(f"/journal delete {eid}")
+    assert bot.ids("/journal search zebra") == [2, 1]
+
+
+def test_index_follows_adds_and_deletes(make_bot):
+    bot = make_bot()
+    bot.run("/journal add apples and pears")
+    assert bot.ids("/journal search apples") == [1]
+    bot.run("/journal add more apples")
+    assert bot.ids("/journal search apples") == [2, 1]
+    bot.run("/journal delete 1")
+    side = json.loads(search.sidecar(bot.path).read_text(encoding="utf-8"))
+    assert "pears" not in side["terms"] and side["terms"]["apples"] == [2]  # rewritten on delete
+    bot.restart()
+    assert bot.ids("/journal search apples") == [2]
+
+
+def test_dates_alone_list_every_entry_in_range(make_bot):
+    bot = make_bot()
+    bot.run("/journal add first")
+    bot.run("/journal add second")
+    month = bot.state["entries"][0]["ts"][:7]
+    assert bot.ids(f"/journal search from:{month}") == [2, 1]
+    assert bot.ids("/journal search to:2001") == []
+
+
+def test_a_sidecar_for_other_data_is_rebuilt(make_bot):
+    bot = make_bot()
+    bot.run("/journal add alpha")
+    bot.run("/journal search alpha")
+    bot.close()
+    path = search.sidecar(bot.path)
+    side = json.loads(path.read_text(encoding="utf-8"))
+    side.update(top=99, terms={"ghost": [99]})  # points past the data
+    path.write_text(json.dumps(side), encoding="utf-8")
+    bot.open()
+    assert bot.ids("/journal search ghost") == []
+    assert bot.ids("/journal search alpha") == [1]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from psychbot.server import Secrets, Server, check_address
+
+
+def test_only_loopback_without_public():
+    for ok in ("127.0.0.1:7878", ":7878", "localhost:7878", "[::1]:7878", "unix:/tmp/p.sock"):
+        check_address(ok)
+    for bad in ("0.0.0.0:7878", "192.168.1.5:7878", "example.com:7878"):
+        with pytest.raises(ValueError):
+            check_address(bad)
+    check_address("0.0.0.0:7878", public=True)
+
+
+def test_first_login_sets_the_secret(tmp_path):
+    secrets = Secrets(tmp_path)
+    assert not secrets.check("alice", "short")
+    assert secrets.check("alice", "correct-horse")
+    assert not secrets.check("alice", "wrong-horse")
+    assert secrets.check("alice", "correct-horse")
+    assert "correct-horse" not in (tmp_path / "alice" / "login.json").read_text()
+
+
+def test_sessions_need_the_right_secret(make_bot, workdir, monkeypatch):
+    import psych_bot
+    from psychbot import server
+    from psychbot.session import Workspace
+    monkeypatch.setattr(server, "FAIL_DELAY", 0)
+    users = workdir / "users"
+
+    def workspace_for(user):
+        return Workspace(users / user / "psych_data.json", loader=psych_bot._load, local_files=False)
+
+    async def talk(*lines):
+        reader, writer = await asyncio.open_unix_connection(str(workdir / "s.sock"))
+        replies = []
+        for line in (None, *lines):
+            if line is not None:
+                writer.write((line + "\n").encode())
+            reply = []
+            while (l := (await reader.readline()).decode().rstrip("\n")) != ".":
+                reply.append(l)
+            replies.append("\n".join(reply))
+        writer.close()
+        return replies[1:]
+
+    async def main():
+        srv = Server(lambda line: psych_bot.dispatch(line, interactive=False), workspace_for, Secrets(users))
+        listener = await srv.start(f"unix:{workdir / 's.sock'}")
+        try:
+            first = await talk("/login alice correct-horse", "/journal add private", "/export csv")
+            other = await talk("/login alice guessing-game", "/journal list")
+            again = await talk("/login alice correct-horse", "/journal list")
+        finally:
+            listener.close()
+            srv.pool.close_all()
+        return first, other, again
+
+    first, other, again = asyncio.run(main())
+    assert first[0] == "Welcome, alice." and "only available in the CLI" in first[2]
+    assert other[0].startswith("Wrong secret") and "private" not in other[1]
+    assert "private" in again[1]
+    assert not (workdir / "exports").exists() and not (users / "alice" / "exports").exists()
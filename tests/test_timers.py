@@ -0,0 +1,19 @@
+import datetime as dt
+
+from psychbot import timers
+
+
+def test_a_timer_never_fires_early():
+    now = dt.datetime(2024, 1, 1, 12, 0, 0, 400_000, tzinfo=dt.timezone.utc)
+    state = {}
+    muts = timers.schedule(state, now, [(1.5, "action", "up", {})])
+    state["timers"] = [muts[0]["item"]]
+    assert muts[0]["item"]["due"] == "2024-01-01T12:00:02Z"
+    assert timers.fire(state, now + dt.timedelta(seconds=1.5)) == ([], [])
+    assert timers.fire(state, now + dt.timedelta(seconds=1.6))[0] == ["up"]
+
+
+def test_sub_second_timers_are_refused(make_bot):
+    bot = make_bot()
+    assert "at least 1 second" in bot.run("/timer 0.01 stretch")
+    assert "Timer set" in bot.run("/timer 0.02 stretch")